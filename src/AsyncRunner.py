@@ -0,0 +1,104 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 30, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import threading
+
+from tornado.ioloop import IOLoop
+
+#===============================================================================
+# Class
+#===============================================================================
+class AsyncRunner(object):
+    '''
+    This class is intended to be a singleton. API functions run synchronously
+    (Flask under a WSGIContainer blocks the server's IOLoop), so non-blocking
+    clients (e.g. AsyncIDTClient) run on a separate IOLoop in a background
+    thread. Synchronous code can then have many requests in flight at once
+    without a thread per request. Threads do not survive a fork, so a forked
+    process (e.g. a job worker) starts its own loop on first use.
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._io_loop = None
+        self._pid     = None
+        self._lock    = threading.Lock()
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = AsyncRunner()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    @property
+    def io_loop(self):
+        ''' The background IOLoop of this process, started if necessary. '''
+        with self._lock:
+            if self._pid != os.getpid():
+                self._io_loop = IOLoop()
+                self._pid     = os.getpid()
+                thread = threading.Thread(target=self._io_loop.start,
+                                          name="AsyncRunner")
+                thread.daemon = True
+                thread.start()
+            return self._io_loop
+
+    def run(self, function, *args, **kwargs):
+        '''
+        Call function, which must return a Future (e.g. a coroutine), on the
+        background IOLoop and block until it completes. Return its result or
+        raise its exception.
+        '''
+        io_loop = self.io_loop
+        done    = threading.Event()
+        futures = list()
+
+        def on_done(future):
+            futures.append(future)
+            done.set()
+
+        io_loop.add_callback(lambda: io_loop.add_future(function(*args, **kwargs),
+                                                        on_done))
+        done.wait()
+        return futures[0].result()
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    from tornado import gen
+
+    @gen.coroutine
+    def example():
+        yield gen.Task(AsyncRunner.Instance().io_loop.add_callback)
+        raise gen.Return("done")
+    print AsyncRunner.Instance().run(example)
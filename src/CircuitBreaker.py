@@ -0,0 +1,161 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 25, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import time
+import logging
+import threading
+
+from collections import deque
+from datetime import datetime
+
+from .apis.ApiConstants import TIME_FORMAT, BREAKER_STATE
+
+#===============================================================================
+# Class
+#===============================================================================
+class CircuitBreaker(object):
+    '''
+    Guards calls to a remote service and is shared by every thread calling
+    it. While closed, calls go through and the outcomes of the last window
+    calls are recorded. Once at least min_calls outcomes are recorded and the
+    fraction of failures reaches failure_rate, the breaker trips open and
+    calls are rejected without reaching the service. After reset_timeout
+    seconds the breaker is half-open and lets a single trial call through,
+    which closes it on success or opens it again on failure.
+    '''
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self, name, failure_rate=0.5, window=20, min_calls=5,
+                 reset_timeout=30.0):
+        self._name          = name
+        self._failure_rate  = failure_rate
+        self._min_calls     = min_calls
+        self._reset_timeout = reset_timeout
+        self._outcomes      = deque(maxlen=window)
+        self._state         = BREAKER_STATE.closed      # @UndefinedVariable
+        self._opened_at     = None
+        self._trial_running = False
+        self._num_trips     = 0
+        self._num_rejected  = 0
+        self._lock          = threading.Lock()
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    @property
+    def state(self):
+        with self._lock:
+            return self._get_state()
+
+    def allow(self):
+        '''
+        Return True if a call may be made now. A caller that is allowed
+        through must report the outcome with record_success or
+        record_failure.
+        '''
+        with self._lock:
+            state = self._get_state()
+            if state == BREAKER_STATE.closed:               # @UndefinedVariable
+                return True
+            if state == BREAKER_STATE.half_open and not self._trial_running:  # @UndefinedVariable
+                self._trial_running = True
+                return True
+            self._num_rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != BREAKER_STATE.closed:         # @UndefinedVariable
+                logging.info("%s circuit breaker closed." % self._name)
+                self._state = BREAKER_STATE.closed          # @UndefinedVariable
+                self._outcomes.clear()
+            self._trial_running = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._trial_running = False
+            if self._state != BREAKER_STATE.closed:         # @UndefinedVariable
+                self._trip()
+                return
+            self._outcomes.append(False)
+            num_failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self._min_calls and \
+               num_failures >= self._failure_rate * len(self._outcomes):
+                self._trip()
+
+    def call(self, function, *args, **kwargs):
+        ''' Call function through the breaker, raising if it is open. '''
+        if not self.allow():
+            raise Exception("%s circuit breaker is open." % self._name)
+        try:
+            result = function(*args, **kwargs)
+        except:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def status(self):
+        ''' Return a dictionary describing the state of the breaker. '''
+        with self._lock:
+            opened_at = None
+            if self._opened_at is not None:
+                opened_at = datetime.fromtimestamp(self._opened_at).strftime(TIME_FORMAT)
+            num_calls = len(self._outcomes)
+            return {
+                    "name": self._name,
+                    "state": self._get_state(),
+                    "failure_rate": float(self._outcomes.count(False)) / num_calls if num_calls else 0.0,
+                    "trips": self._num_trips,
+                    "rejected": self._num_rejected,
+                    "opened_at": opened_at,
+                   }
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _get_state(self):
+        ''' Current state, moving from open to half-open once it is due. '''
+        if self._state == BREAKER_STATE.open and \
+           time.time() - self._opened_at >= self._reset_timeout:  # @UndefinedVariable
+            self._state = BREAKER_STATE.half_open           # @UndefinedVariable
+        return self._state
+
+    def _trip(self):
+        logging.warning("%s circuit breaker opened." % self._name)
+        self._state     = BREAKER_STATE.open                # @UndefinedVariable
+        self._opened_at = time.time()
+        self._num_trips += 1
+        self._outcomes.clear()
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    breaker = CircuitBreaker("Example", min_calls=2)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    print breaker.status()
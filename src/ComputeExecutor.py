@@ -0,0 +1,174 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 22, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import time
+import logging
+import tempfile
+import threading
+import numpy as np
+
+from uuid import uuid4
+from collections import OrderedDict
+from multiprocessing import Pool, current_process
+
+from . import COMPUTE_PROCESSES
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+# Shared arrays are written to a RAM-backed file system when there is one.
+_SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# Number of shared arrays each process keeps mapped.
+_MAX_MAPPED = 8
+_MAPPED     = OrderedDict()
+
+#===============================================================================
+# Classes
+#===============================================================================
+class SharedArray(object):
+    '''
+    Picklable handle to a read-only array written once to a memory-mapped
+    file. Passing the handle to a worker process only pickles the path, and
+    every process mapping the file shares the same pages.
+    '''
+    def __init__(self, path):
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    def get(self):
+        ''' Return the array, mapping it in this process if necessary. '''
+        if self._path in _MAPPED:
+            array = _MAPPED.pop(self._path)
+        else:
+            array = np.load(self._path, mmap_mode='r')
+            while len(_MAPPED) >= _MAX_MAPPED:
+                _MAPPED.popitem(last=False)
+        _MAPPED[self._path] = array
+        return array
+
+class ComputeExecutor(object):
+    '''
+    This class is intended to be a singleton. It runs CPU-bound work, split
+    into independent shards (e.g. one per targets file), across a persistent
+    pool of COMPUTE_PROCESSES worker processes. Large read-only inputs should
+    be passed to shards as SharedArray handles rather than pickled with every
+    shard. Shards run in the calling process when there is a single shard,
+    when the pool would have a single process or when the caller is itself a
+    daemonic process (e.g. a job worker), which may not have children.
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = ComputeExecutor()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def start(self):
+        '''
+        Fork the worker processes. Call before any background thread starts,
+        since a child forked while another thread holds a lock (e.g. of the 
+        logging module) inherits it held and deadlocks on it.
+        '''
+        if COMPUTE_PROCESSES > 1:
+            self._get_pool()
+
+    def share(self, array):
+        ''' Write array to a shared file and return its SharedArray handle. '''
+        path     = os.path.join(_SHARED_DIR, "compute_%s.npy" % uuid4())
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.rename(tmp_path, path)
+        return SharedArray(path)
+
+    def release(self, *shared_arrays):
+        '''
+        Remove the files behind shared arrays. Processes still mapping them
+        keep their pages until they unmap them.
+        '''
+        for shared_array in shared_arrays:
+            try:
+                os.remove(shared_array.path)
+            except OSError, e:
+                logging.warning("Unable to remove %s: %s" % (shared_array.path, e))
+
+    def map(self, function, shards, progress=None):
+        '''
+        Apply function, which must be a module level function, to every shard
+        and return the list of results in the order of shards along with the
+        number of seconds spent on each shard. If provided, progress is
+        called with the number of shards completed and the number of shards
+        as each shard completes.
+        '''
+        results = [None] * len(shards)
+        timings = [0.0] * len(shards)
+        tasks   = [(function, i, shard) for i, shard in enumerate(shards)]
+        if len(shards) < 2 or COMPUTE_PROCESSES < 2 or current_process().daemon:
+            completed = (_run_shard(task) for task in tasks)
+        else:
+            completed = self._get_pool().imap_unordered(_run_shard, tasks)
+
+        for num_done, (i, result, seconds, pid) in enumerate(completed, 1):
+            results[i] = result
+            timings[i] = seconds
+            logging.info("%s shard %d/%d took %.3f s in process %d." %
+                         (function.__name__, i + 1, len(shards), seconds, pid))
+            if progress:
+                progress(num_done, len(shards))
+        return results, timings
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = Pool(COMPUTE_PROCESSES)
+            return self._pool
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def _run_shard(task):
+    (function, i, shard) = task
+    start = time.time()
+    result = function(shard)
+    return (i, result, time.time() - start, os.getpid())
@@ -20,16 +20,166 @@ limitations under the License.
 #===============================================================================
 # Imports
 #===============================================================================
-from . import DB
+import os
+import time
+import threading
+
+from bson import BSON
+from collections import namedtuple
+from pymongo import MongoClient
+from pymongo.pool import Pool
+from pymongo.errors import BulkWriteError
+
+from . import FIND_BATCH_SIZE, BULK_MAX_DOCUMENTS, BULK_MAX_BYTES, \
+    DATABASE_URL, DATABASE_PORT, DATABASE_NAME, DATABASE_MAX_POOL_SIZE, \
+    DATABASE_WARM_CONNECTIONS, DATABASE_CONNECT_TIMEOUT_MS, \
+    DATABASE_SOCKET_TIMEOUT_MS, DATABASE_WAIT_QUEUE_TIMEOUT_MS, \
+    DATABASE_READ_PREFERENCE, DATABASE_WRITE_CONCERN
 
 #===============================================================================
-# Class
+# Bulk Write Requests
+#===============================================================================
+class InsertOne(namedtuple('insertOne', 'document')):
+    pass
+
+class UpdateOne(namedtuple('updateOne', 'criteria document upsert')):
+    def __new__(cls, criteria, document, upsert=False):
+        return super(UpdateOne, cls).__new__(cls, criteria, document, upsert)
+
+class UpdateMany(namedtuple('updateMany', 'criteria document upsert')):
+    def __new__(cls, criteria, document, upsert=False):
+        return super(UpdateMany, cls).__new__(cls, criteria, document, upsert)
+
+class DeleteOne(namedtuple('deleteOne', 'criteria')):
+    pass
+
+class DeleteMany(namedtuple('deleteMany', 'criteria')):
+    pass
+
 #===============================================================================
+# Classes
+#===============================================================================
+class BulkWriteResult(object):
+    '''
+    Outcome of a bulk write. Each entry of write_errors is a dictionary with
+    the index of the failed request among the requests written, the error
+    code and the error message. Acknowledged is False when the write concern
+    did not ask for acknowledgement (w=0), in which case nothing is known of
+    the outcome.
+    '''
+    def __init__(self):
+        self.num_inserted         = 0
+        self.num_matched          = 0
+        self.num_modified         = 0
+        self.num_removed          = 0
+        self.num_upserted         = 0
+        self.write_errors         = list()
+        self.write_concern_errors = list()
+        self.acknowledged         = True
+
+    @property
+    def ok(self):
+        return not self.write_errors and not self.write_concern_errors
+
+    def add(self, details, offset):
+        ''' Add the outcome of a batch starting at request offset. '''
+        if details is None:
+            self.acknowledged = False
+            return
+        self.num_inserted += details.get("nInserted", 0)
+        self.num_matched  += details.get("nMatched", 0)
+        self.num_modified += details.get("nModified") or 0
+        self.num_removed  += details.get("nRemoved", 0)
+        self.num_upserted += details.get("nUpserted", 0)
+        for error in details.get("writeErrors", []):
+            self.write_errors.append({"index": offset + error["index"],
+                                      "code": error.get("code"),
+                                      "errmsg": error.get("errmsg")})
+        self.write_concern_errors.extend(details.get("writeConcernErrors", []))
+
+    def __repr__(self):
+        return "BulkWriteResult(inserted=%d, matched=%d, modified=%d, " \
+               "removed=%d, upserted=%d, write_errors=%s, " \
+               "write_concern_errors=%s)" % \
+               (self.num_inserted, self.num_matched, self.num_modified,
+                self.num_removed, self.num_upserted, self.write_errors,
+                self.write_concern_errors)
+
+class PoolStats(object):
+    '''
+    Connection pool metrics of a process. Wait is the time taken to check 
+    out a connection: waiting for one to be returned to a full pool, or 
+    opening a new one.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.num_checkouts = 0
+            self.num_opened    = 0
+            self.num_timeouts  = 0
+            self.total_wait    = 0.0
+            self.max_wait      = 0.0
+
+    def add_checkout(self, wait):
+        with self._lock:
+            self.num_checkouts += 1
+            self.total_wait    += wait
+            self.max_wait       = max(self.max_wait, wait)
+
+    def add_opened(self):
+        with self._lock:
+            self.num_opened += 1
+
+    def add_timeout(self):
+        with self._lock:
+            self.num_timeouts += 1
+
+    def status(self):
+        with self._lock:
+            mean_wait = self.total_wait / self.num_checkouts \
+                        if self.num_checkouts else 0.0
+            return {
+                    "checkouts": self.num_checkouts,
+                    "connections_opened": self.num_opened,
+                    "wait_queue_timeouts": self.num_timeouts,
+                    "mean_wait_ms": round(mean_wait * 1000, 3),
+                    "max_wait_ms": round(self.max_wait * 1000, 3),
+                   }
+
+class _MeteredPool(Pool):
+    '''
+    A pymongo connection pool recording its metrics in a PoolStats (Pool is
+    an old-style class, hence no super).
+    '''
+    def __init__(self, stats, *args, **kwargs):
+        Pool.__init__(self, *args, **kwargs)
+        self._stats = stats
+
+    def get_socket(self, force=False):
+        start     = time.time()
+        sock_info = Pool.get_socket(self, force)
+        self._stats.add_checkout(time.time() - start)
+        return sock_info
+
+    def connect(self):
+        sock_info = Pool.connect(self)
+        self._stats.add_opened()
+        return sock_info
+
+    def _raise_wait_queue_timeout(self):
+        self._stats.add_timeout()
+        Pool._raise_wait_queue_timeout(self)
+
 class DbConnector(object):
     '''
     This class is intended to be a singleton. It handles communication (i.e.
     queries) with MongoDB. Every call to the DB should go through this 
-    class.
+    class. Connections are never shared across a fork: each process creates
+    its own client, configured by the DATABASE_* settings, the first time it 
+    uses the database.
     '''
     _INSTANCE = None
     
@@ -40,6 +190,12 @@ class DbConnector(object):
         # Enforce that it's a singleton
         if self._INSTANCE:
             raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._client = None
+        self._db     = None
+        self._pool   = None
+        self._pid    = None
+        self._stats  = PoolStats()
+        self._lock   = threading.Lock()
     
     @classmethod
     def Instance(cls):
@@ -47,21 +203,198 @@ class DbConnector(object):
             cls._INSTANCE = DbConnector()
         return cls._INSTANCE
     
+    #===========================================================================
+    # Connection methods
+    #===========================================================================
+    @property
+    def db(self):
+        ''' The database of this process, connected on first use. '''
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._connect()
+        return self._db
+
+    def warm_up(self, num_connections=DATABASE_WARM_CONNECTIONS):
+        '''
+        Open num_connections (at most DATABASE_MAX_POOL_SIZE) connections of
+        this process's pool, so the first requests do not wait for them.
+        '''
+        self.db.command("ping")
+        num_connections = min(num_connections, DATABASE_MAX_POOL_SIZE)
+        sockets = [self._pool.get_socket() for _ in range(num_connections)]
+        for sock_info in sockets:
+            self._pool.maybe_return_socket(sock_info)
+
+    def pool_status(self):
+        ''' Return a dictionary of the settings and metrics of the pool. '''
+        status = {
+                  "pid": os.getpid(),
+                  "connected": self._pid == os.getpid(),
+                  "max_pool_size": DATABASE_MAX_POOL_SIZE,
+                  "wait_queue_timeout_ms": DATABASE_WAIT_QUEUE_TIMEOUT_MS,
+                 }
+        status.update(self._stats.status())
+        return status
+
     #===========================================================================
     # Simple get methods
     #===========================================================================
     def insert(self, collection, rows):
-        return DB[collection].insert(rows)
-    
-    def find(self, collection, criteria, projection):
-        return list(DB[collection].find(criteria, projection))
-    
-    def distinct(self, collection, column_name):
-        return list(DB[collection].distinct(column_name))
+        return self.db[collection].insert(rows)
     
+    def find(self, collection, criteria, projection, sort=None, skip=0, 
+             limit=0, **kwargs):
+        return list(self.find_iter(collection, criteria, projection, sort=sort,
+                                   skip=skip, limit=limit, **kwargs))
+
+    def find_iter(self, collection, criteria, projection, sort=None, skip=0,
+                  limit=0, batch_size=FIND_BATCH_SIZE, hint=None, 
+                  max_time_ms=None):
+        '''
+        Return a cursor over the matching records, which are fetched from the
+        server batch_size at a time as the cursor is iterated, rather than
+        a list of every record. Hint is an index specification (e.g. 
+        [("uuid", 1)]) and max_time_ms bounds the time the server spends on 
+        the query.
+        '''
+        cursor = self.db[collection].find(criteria, projection, sort=sort,
+                                          skip=skip, limit=limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        if hint:
+            cursor = cursor.hint(hint)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        return cursor
+
+    def count(self, collection, criteria):
+        return self.db[collection].find(criteria).count()
+
+    def distinct(self, collection, column_name, criteria=None):
+        if criteria:
+            return list(self.db[collection].find(criteria).distinct(column_name))
+        return list(self.db[collection].distinct(column_name))
+
+    def update(self, collection, criteria, document, multi=True, upsert=False):
+        return self.db[collection].update(criteria, document, multi=multi,
+                                          upsert=upsert)
+
     def remove(self, collection, criteria):
-        return DB[collection].remove(criteria)
+        return self.db[collection].remove(criteria)
+
+    #===========================================================================
+    # Bulk write methods
+    #===========================================================================
+    def bulk_write(self, collection, requests, ordered=True, write_concern=None):
+        '''
+        Execute requests (InsertOne, UpdateOne, UpdateMany, DeleteOne and
+        DeleteMany, from any iterable) in batches of at most 
+        BULK_MAX_DOCUMENTS requests and about BULK_MAX_BYTES of BSON. Ordered
+        writes stop at the first failed request, unordered writes attempt
+        every request. Write_concern (e.g. {"w": "majority", "j": True}) 
+        overrides that of the connection. Failed requests are reported in
+        the returned BulkWriteResult rather than raised.
+        '''
+        result = BulkWriteResult()
+        for (offset, batch) in _batches(requests):
+            if ordered:
+                bulk = self.db[collection].initialize_ordered_bulk_op()
+            else:
+                bulk = self.db[collection].initialize_unordered_bulk_op()
+            for request in batch:
+                _add_request(bulk, request)
+            try:
+                details = bulk.execute(write_concern)
+            except BulkWriteError, e:
+                details = e.details
+            result.add(details, offset)
+            if ordered and result.write_errors:
+                break
+        return result
+
+    def insert_many(self, collection, rows, ordered=True, write_concern=None):
+        ''' Insert rows (from any iterable) with bulk_write. '''
+        return self.bulk_write(collection, (InsertOne(row) for row in rows),
+                               ordered=ordered, write_concern=write_concern)
+
+    def delete_many(self, collection, criteria, write_concern=None):
+        ''' Remove every matching record with bulk_write. '''
+        return self.bulk_write(collection, [DeleteMany(criteria)],
+                               write_concern=write_concern)
+
+    def ensure_index(self, collection, key, **kwargs):
+        return self.db[collection].ensure_index(key, **kwargs)
         
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _connect(self):
+        '''
+        Create the client of this process. A client inherited through a fork
+        is abandoned rather than closed, its sockets belonging to the parent. 
+        '''
+        options = {
+                   "connectTimeoutMS": DATABASE_CONNECT_TIMEOUT_MS,
+                   "socketTimeoutMS": DATABASE_SOCKET_TIMEOUT_MS,
+                   "waitQueueTimeoutMS": DATABASE_WAIT_QUEUE_TIMEOUT_MS,
+                   "readPreference": DATABASE_READ_PREFERENCE,
+                  }
+        options.update(DATABASE_WRITE_CONCERN or {})
+
+        self._stats.reset()
+        self._client = MongoClient(DATABASE_URL, DATABASE_PORT,
+                                   max_pool_size=DATABASE_MAX_POOL_SIZE,
+                                   _connect=False, _pool_class=self._create_pool,
+                                   **options)
+        self._db     = self._client[DATABASE_NAME]
+        self._pid    = os.getpid()
+
+    def _create_pool(self, *args, **kwargs):
+        ''' Create the connection pool of the client (see _connect). '''
+        self._pool = _MeteredPool(self._stats, *args, **kwargs)
+        return self._pool
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def _batches(requests):
+    '''
+    Generate (offset, batch) pairs of consecutive requests, each batch 
+    holding at most BULK_MAX_DOCUMENTS requests and, unless a single request
+    is larger, at most BULK_MAX_BYTES of BSON.
+    '''
+    (offset, batch, num_bytes) = (0, list(), 0)
+    for request in requests:
+        size = sum(len(BSON.encode(d)) for d in request[:2] if isinstance(d, dict))
+        if batch and (len(batch) >= BULK_MAX_DOCUMENTS or
+                      num_bytes + size > BULK_MAX_BYTES):
+            yield (offset, batch)
+            (offset, batch, num_bytes) = (offset + len(batch), list(), 0)
+        batch.append(request)
+        num_bytes += size
+    if batch:
+        yield (offset, batch)
+
+def _add_request(bulk, request):
+    ''' Add a request to a pymongo bulk operation. '''
+    if isinstance(request, InsertOne):
+        bulk.insert(request.document)
+    elif isinstance(request, (UpdateOne, UpdateMany)):
+        view = bulk.find(request.criteria)
+        if request.upsert:
+            view = view.upsert()
+        if isinstance(request, UpdateOne):
+            view.update_one(request.document)
+        else:
+            view.update(request.document)
+    elif isinstance(request, DeleteOne):
+        bulk.find(request.criteria).remove_one()
+    elif isinstance(request, DeleteMany):
+        bulk.find(request.criteria).remove()
+    else:
+        raise Exception("Unrecognized bulk write request: %s" % str(request))
+
 #===========================================================================
 # Ensure the initial instance is created.
 #===========================================================================    
@@ -0,0 +1,215 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 7, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import glob
+import time
+import errno
+import logging
+import threading
+
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+
+from .DbConnector import DbConnector
+from .apis.ApiConstants import ID, UUID, FILEPATH, TOMBSTONE, TIME_FORMAT
+from . import TARGETS_COLLECTION, PROBES_COLLECTION, TARGETS_UPLOAD_FOLDER, \
+    PROBES_UPLOAD_FOLDER, REAPER_INTERVAL, REAPER_THREADS, \
+    ORPHAN_SWEEP_INTERVAL, ORPHAN_GRACE_PERIOD, PROBE_ANNOTATIONS_COLLECTION
+
+#===============================================================================
+# Class
+#===============================================================================
+class FileReaper(object):
+    '''
+    This class is intended to be a singleton. Delete functions tombstone
+    records instead of removing them and the reaper reclaims the files behind
+    tombstoned records in a background thread. Files are unlinked in parallel
+    and a tombstone is only purged once its file is gone, so a failed unlink
+    (or a crash) leaves the tombstone in place to be retried on the next pass.
+    '''
+    _INSTANCE = None
+
+    # Collections managed by the reaper and the folders holding their files.
+    _MANAGED = [
+                (TARGETS_COLLECTION, TARGETS_UPLOAD_FOLDER),
+                (PROBES_COLLECTION, PROBES_UPLOAD_FOLDER),
+               ]
+
+    # Collections holding documents derived from the records of a managed
+    # collection, keyed by their uuid, which are purged along with them.
+    _DERIVED = {
+                PROBES_COLLECTION: [PROBE_ANNOTATIONS_COLLECTION],
+               }
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._db_connector = DbConnector.Instance()
+        self._wakeup       = threading.Event()
+        self._thread       = None
+        self._pool         = None
+        self._last_sweep   = 0
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = FileReaper()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def start(self):
+        ''' Ensure tombstone indexes exist and start the reaper thread. '''
+        if self._thread and self._thread.is_alive():
+            return
+
+        for collection, _ in self._MANAGED:
+            self._db_connector.ensure_index(collection, UUID)
+            self._db_connector.ensure_index(collection, TOMBSTONE, sparse=True)
+
+        self._thread = threading.Thread(target=self._run, name="FileReaper")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def wake(self):
+        ''' Request a reaping pass now rather than at the next interval. '''
+        self._wakeup.set()
+
+    def reap(self):
+        '''
+        Unlink the files of all tombstoned records in parallel, then purge
+        the tombstones whose files were reclaimed. Return a dictionary mapping
+        collection name to the list of purged uuids.
+        '''
+        reaped = dict()
+        for collection, _ in self._MANAGED:
+            criteria = {TOMBSTONE: {"$exists": True}}
+            records  = self._db_connector.find(collection, criteria,
+                                               {ID: 0, UUID: 1, FILEPATH: 1})
+            if len(records) < 1:
+                continue
+
+            results   = self._get_pool().map(_unlink_record, records)
+            reclaimed = [uuid for uuid, success in results if success]
+            if reclaimed:
+                for derived_collection in self._DERIVED.get(collection, []):
+                    self._db_connector.remove(derived_collection,
+                                              {UUID: {"$in": reclaimed}})
+                criteria[UUID] = {"$in": reclaimed}
+                self._db_connector.remove(collection, criteria)
+            reaped[collection] = reclaimed
+
+            if len(reclaimed) < len(records):
+                logging.warning("Failed to reclaim files for %d tombstoned " \
+                                "%s record(s), will retry." %
+                                (len(records) - len(reclaimed), collection))
+        return reaped
+
+    def sweep_orphans(self):
+        '''
+        Reconcile upload folders against their collections. Files whose uuid
+        has no record (e.g. left behind by a failed upload) are unlinked once
+        they are older than ORPHAN_GRACE_PERIOD, and live records whose file
+        is missing are tombstoned. Return a dictionary mapping collection name
+        to the orphaned files removed and the uuids of records tombstoned.
+        '''
+        report = dict()
+        now    = time.time()
+        for collection, folder in self._MANAGED:
+            if not os.path.isdir(folder):
+                continue
+
+            known_uuids    = set(self._db_connector.distinct(collection, UUID))
+            orphaned_files = list()
+            for filename in os.listdir(folder):
+                path = os.path.join(folder, filename)
+                if filename.split(".")[0] in known_uuids:
+                    continue
+                if now - os.path.getmtime(path) < ORPHAN_GRACE_PERIOD:
+                    continue
+                if _unlink(path):
+                    orphaned_files.append(path)
+
+            live_criteria = {TOMBSTONE: {"$exists": False}}
+            records       = self._db_connector.find(collection, live_criteria,
+                                                    {ID: 0, UUID: 1, FILEPATH: 1})
+            missing_uuids = [r[UUID] for r in records
+                             if not os.path.exists(r[FILEPATH])]
+            if missing_uuids:
+                live_criteria[UUID] = {"$in": missing_uuids}
+                tombstone = datetime.today().strftime(TIME_FORMAT)
+                self._db_connector.update(collection, live_criteria,
+                                          {"$set": {TOMBSTONE: tombstone}})
+
+            report[collection] = {"orphaned_files": orphaned_files,
+                                  "missing_files": missing_uuids}
+            if orphaned_files or missing_uuids:
+                logging.info("Orphan sweep of %s: %s" % (collection,
+                                                         report[collection]))
+        return report
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPool(REAPER_THREADS)
+        return self._pool
+
+    def _run(self):
+        while True:
+            try:
+                self.reap()
+                if time.time() - self._last_sweep >= ORPHAN_SWEEP_INTERVAL:
+                    self.sweep_orphans()
+                    self._last_sweep = time.time()
+            except:
+                logging.exception("File reaper pass failed.")
+            self._wakeup.wait(REAPER_INTERVAL)
+            self._wakeup.clear()
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def _unlink(path):
+    ''' Remove path, returning True if it is gone (including already gone). '''
+    try:
+        os.remove(path)
+    except OSError, e:
+        if e.errno != errno.ENOENT:
+            logging.warning("Unable to remove %s: %s" % (path, e))
+            return False
+    return True
+
+def _unlink_record(record):
+    '''
+    Remove the record's file along with any artifacts derived from it, which
+    are stored next to it as <filepath>.<extension>.
+    '''
+    paths = [record[FILEPATH]] + glob.glob(record[FILEPATH] + ".*")
+    return (record[UUID], all([_unlink(path) for path in paths]))
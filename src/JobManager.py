@@ -0,0 +1,215 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 21, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import sys
+import time
+import logging
+import threading
+
+from uuid import uuid4
+from datetime import datetime
+from collections import defaultdict
+from multiprocessing import Pool
+
+from .DbConnector import DbConnector
+from .apis.AbstractFunction import AbstractFunction
+from .apis.ApiConstants import ID, UUID, JOB, STATUS, PROGRESS, ERROR, \
+    DATESTAMP, TIME_FORMAT, JOB_STATUS
+from . import JOBS_COLLECTION, JOB_RESULTS_COLLECTION, JOB_PROCESSES
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_PROGRESS_INTERVAL = 1.0    # Minimum seconds between progress updates
+
+#===============================================================================
+# Class
+#===============================================================================
+class JobManager(object):
+    '''
+    This class is intended to be a singleton. GET functions that opt in (see
+    AbstractGetFunction.supports_jobs) can be submitted as jobs instead of
+    being processed inline. A job is persisted with its parameters and status
+    and is executed by a pool of worker processes. Workers record progress
+    while running and store result rows in JOB_RESULTS_COLLECTION, one
+    document per row, so that results can be retrieved a page at a time.
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._db_connector = DbConnector.Instance()
+        self._pool         = None
+        self._lock         = threading.Lock()
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = JobManager()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def start(self):
+        '''
+        Ensure job indexes exist and fail jobs left queued or running by a
+        previous server instance, since their workers are gone.
+        '''
+        self._db_connector.ensure_index(JOBS_COLLECTION, UUID)
+        self._db_connector.ensure_index(JOB_RESULTS_COLLECTION, JOB)
+
+        criteria = {STATUS: {"$in": [JOB_STATUS.queued, JOB_STATUS.running]}}  # @UndefinedVariable
+        self._db_connector.update(JOBS_COLLECTION, criteria,
+                                  {"$set": {STATUS: JOB_STATUS.failed,  # @UndefinedVariable
+                                            ERROR: "Interrupted by a server restart."}})
+
+    def start_workers(self):
+        '''
+        Fork the worker processes. Call before any background thread starts,
+        since a child forked while another thread holds a lock (e.g. of the 
+        logging module) inherits it held and deadlocks on it.
+        '''
+        self._get_pool()
+
+    def submit(self, api_name, path, query_params):
+        '''
+        Queue the GET function at path of API api_name, with query_params (a
+        dictionary mapping lower case parameter names to lists of strings), as
+        a job. Parameters are parsed before queuing so that invalid requests
+        fail immediately. Return the job record.
+        '''
+        (function, path_fields) = _get_function(api_name, path)
+        if function is None:
+            raise Exception("Function %s not found in API %s." % (path, api_name))
+        if not function.supports_jobs():
+            raise Exception("Function %s cannot be run as a job." % function.name())
+        (params_dict, _) = function._parse_query_params(defaultdict(list, query_params))
+        function._handle_path_fields(path_fields, params_dict)
+
+        job = {
+               UUID: str(uuid4()),
+               "api": api_name,
+               "function": path,
+               "parameters": dict(query_params),
+               STATUS: JOB_STATUS.queued,                   # @UndefinedVariable
+               PROGRESS: 0.0,
+               DATESTAMP: datetime.today().strftime(TIME_FORMAT),
+              }
+        self._db_connector.insert(JOBS_COLLECTION, [job])
+        del job[ID]
+
+        self._get_pool().apply_async(_run_job, (job[UUID], api_name, path,
+                                                job["parameters"]))
+        return job
+
+    def get(self, uuid):
+        ''' Return the job record with this uuid or None if there is none. '''
+        jobs = self._db_connector.find(JOBS_COLLECTION, {UUID: uuid}, {ID: 0})
+        if len(jobs) < 1:
+            return None
+        return jobs[0]
+
+    def get_results(self, uuid, skip=0, limit=0):
+        ''' Return result rows [skip, skip + limit) of a finished job. '''
+        rows = self._db_connector.find(JOB_RESULTS_COLLECTION, {JOB: uuid},
+                                       {ID: 0, "row": 1}, sort=[("index", 1)],
+                                       skip=skip, limit=limit)
+        return [row["row"] for row in rows]
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = Pool(JOB_PROCESSES)
+            return self._pool
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def _get_function(api_name, path):
+    '''
+    Return the GET function at path of an API and the dynamic fields of the
+    path, as the controller would for an inline request.
+    '''
+    # Imported here since APIs import this module to submit jobs.
+    from .apis.ApiManager import ApiManager
+    function = ApiManager.get_api_function(api_name, "v1", path, "GET")
+    if function is None:
+        return (None, None)
+
+    dynamic_path = path[len(function.static_path()):].lstrip(os.path.sep)
+    return (function, dynamic_path.split(os.path.sep))
+
+def _run_job(uuid, api_name, path, query_params):
+    ''' Execute a job in a worker process and record its outcome. '''
+    db_connector = DbConnector.Instance()
+    criteria     = {UUID: uuid}
+    db_connector.update(JOBS_COLLECTION, criteria,
+                        {"$set": {STATUS: JOB_STATUS.running}})  # @UndefinedVariable
+
+    last_update = [0]
+    def report_progress(completed, total):
+        now = time.time()
+        if total > 0 and now - last_update[0] >= _PROGRESS_INTERVAL:
+            last_update[0] = now
+            db_connector.update(JOBS_COLLECTION, criteria,
+                                {"$set": {PROGRESS: float(completed) / total}})
+    AbstractFunction._PROGRESS_CALLBACK = staticmethod(report_progress)
+
+    try:
+        (function, path_fields) = _get_function(api_name, path)
+        (params_dict, _) = function._parse_query_params(defaultdict(list, query_params))
+        function._handle_path_fields(path_fields, params_dict)
+        (items, columns, _) = function.process_request(params_dict)
+
+        # Items may be an iterator (e.g. a generator or a database cursor), 
+        # which insert_many consumes a batch at a time.
+        rows   = ({JOB: uuid, "index": i, "row": item} 
+                  for i, item in enumerate(items if items is not None else []))
+        result = db_connector.insert_many(JOB_RESULTS_COLLECTION, rows, 
+                                          ordered=False)
+        if not result.ok:
+            raise Exception("Unable to store results: %s" % result)
+        num_results = result.num_inserted
+
+        db_connector.update(JOBS_COLLECTION, criteria,
+                            {"$set": {STATUS: JOB_STATUS.succeeded,  # @UndefinedVariable
+                                      PROGRESS: 1.0,
+                                      "columns": columns,
+                                      "num_results": num_results}})
+    except:
+        logging.exception("Job %s failed." % uuid)
+        db_connector.remove(JOB_RESULTS_COLLECTION, {JOB: uuid})
+        db_connector.update(JOBS_COLLECTION, criteria,
+                            {"$set": {STATUS: JOB_STATUS.failed,  # @UndefinedVariable
+                                      ERROR: str(sys.exc_info()[1])}})
+    finally:
+        AbstractFunction._PROGRESS_CALLBACK = None
@@ -0,0 +1,159 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import sys
+import threading
+
+#===============================================================================
+# Class
+#===============================================================================
+class SingleFlight(object):
+    '''
+    Coalesces concurrent calls for the same key into a single call and is
+    shared by every thread making them. The first caller of a key (the
+    leader) makes the call and every caller arriving while it is in flight
+    waits for, and receives, its result instead of calling again. The key is
+    forgotten as soon as the call completes, so results are never reused by
+    later callers (caching is left to the caller).
+
+    Flights are per process: a forked child starts with none rather than
+    waiting on calls that only its parent will ever finish.
+    '''
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self, name):
+        self._name      = name
+        # Only taken in a process that has just been forked, so it is never
+        # held by a parent thread at the time of a fork.
+        self._fork_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        ''' Forget every flight, counter and lock inherited from another process. '''
+        self._flights    = dict()
+        self._num_calls  = 0
+        self._num_shared = 0
+        self._lock       = threading.Lock()
+        self._pid        = os.getpid()
+
+    def _check_pid(self):
+        ''' Reset the flights the first time they are used in a forked process. '''
+        if self._pid != os.getpid():
+            with self._fork_lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def join(self, key):
+        '''
+        Return the Flight of key and whether the caller is its leader. The
+        leader must make the call and report its outcome with finish.
+        '''
+        self._check_pid()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._num_shared += 1
+                return (flight, False)
+            flight = Flight()
+            self._flights[key] = flight
+            self._num_calls += 1
+            return (flight, True)
+
+    def finish(self, key, result=None, error=None):
+        ''' Release the callers waiting on key with result or error. '''
+        self._check_pid()
+        with self._lock:
+            flight = self._flights.pop(key)
+        flight.set(result, error)
+
+    def call(self, key, function, *args, **kwargs):
+        '''
+        Call function unless a call for key is already in flight, in which
+        case wait for it. Return its result or raise its exception.
+        '''
+        (flight, leader) = self.join(key)
+        if leader:
+            try:
+                result = function(*args, **kwargs)
+            except:
+                self.finish(key, error=sys.exc_info()[1])
+                raise
+            self.finish(key, result)
+        flight.wait()
+        return flight.result()
+
+    def status(self):
+        ''' Return a dictionary describing the calls made and saved. '''
+        self._check_pid()
+        with self._lock:
+            return {
+                    "name": self._name,
+                    "calls": self._num_calls,
+                    "shared": self._num_shared,
+                    "in_flight": len(self._flights),
+                   }
+
+class Flight(object):
+    ''' Outcome of a call that may still be in flight. '''
+    def __init__(self):
+        self._result = None
+        self._error  = None
+        self._event  = threading.Event()
+
+    def set(self, result=None, error=None):
+        self._result = result
+        self._error  = error
+        self._event.set()
+
+    def wait(self, timeout=None):
+        ''' Return True once the call has completed, False on timeout. '''
+        return self._event.wait(timeout)
+
+    def result(self):
+        ''' Return the result of the completed call or raise its exception. '''
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    import time
+
+    flights = SingleFlight("Example")
+    def slow_square(x):
+        time.sleep(0.1)
+        return x * x
+    threads = [threading.Thread(target=flights.call, args=(3, slow_square, 3))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print flights.status()
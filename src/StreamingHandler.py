@@ -0,0 +1,185 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import sys
+import json
+import logging
+
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.concurrent import TracebackFuture
+from tornado.web import RequestHandler, asynchronous
+
+from .apis.ApiManager import ApiManager, API_BASE_ROUTE
+from .apis.ApiConstants import ERROR, FORMATS, METHODS
+from . import STREAM_THREADS
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_CHUNKS_PER_WRITE = 100     # Output chunks (about one per item) per write
+
+_POOL = None
+
+#===============================================================================
+# Class
+#===============================================================================
+class StreamingHandler(RequestHandler):
+    '''
+    Serves a GET function that supports streaming (see
+    AbstractGetFunction.supports_streaming) directly from Tornado. Its items
+    are produced on a pool of STREAM_THREADS threads, so the IOLoop is never
+    blocked, and written a few at a time. The next items are only produced
+    once the previous ones have been flushed to the client, so memory does
+    not grow with the response, and production stops when the client
+    disconnects. Requests with any other method on the same path (e.g. 
+    POST and DELETE functions of the same name) are passed to fallback.
+    '''
+    def initialize(self, function, fallback=None):
+        self._function  = function
+        self._fallback  = fallback
+        self._cancelled = False
+        self._flushed   = None
+
+    def prepare(self):
+        # As FallbackHandler does.
+        if self.request.method != "GET" and self._fallback is not None:
+            self._fallback(self.request)
+            self._finished = True
+
+    @asynchronous
+    @gen.coroutine
+    def get(self, dynamic_path=None):
+        self.set_header("Access-Control-Allow-Origin", "*")
+
+        # Query parameters are parsed as the Flask controller parses them.
+        query_params = defaultdict(list)
+        for name, values in self.request.arguments.iteritems():
+            for value in values:
+                query_params[name.lower()].extend(value.split(","))
+        try:
+            (params_dict, _format) = self._function._parse_query_params(query_params)
+            self._function._handle_path_fields((dynamic_path or "").split("/"),
+                                               params_dict)
+            (items, columns, _) = yield _run_in_pool(self._function.process_request,
+                                                     params_dict)
+            (chunks, mimetype) = self._function._stream_output(iter(items),
+                                                               _format, columns)
+        except:
+            self.set_status(500)
+            self.finish({ERROR: str(sys.exc_info()[1])})
+            return
+
+        self.set_header("Content-Type", mimetype)
+        try:
+            while not self._cancelled:
+                data = yield _run_in_pool(_take, chunks, _CHUNKS_PER_WRITE)
+                if not data:
+                    break
+                self.write(data)
+                yield self._flush()
+        except Exception:
+            logging.exception("Streaming %s failed." % self._function.name())
+            if _format == FORMATS.ndjson and not self._cancelled:  # @UndefinedVariable
+                self.write(json.dumps({ERROR: str(sys.exc_info()[1])}) + "\n")
+        finally:
+            yield _run_in_pool(_close, chunks, items)
+
+        if self._cancelled:
+            logging.info("Client disconnected, stopped streaming %s." %
+                         self._function.name())
+        else:
+            self.finish()
+
+    def on_connection_close(self):
+        self._cancelled = True
+        if self._flushed is not None and not self._flushed.done():
+            self._flushed.set_result(None)
+
+    def _flush(self):
+        '''
+        Flush written data and return a Future resolved once it has been
+        sent, or once the client disconnects since it never will be.
+        '''
+        self._flushed = TracebackFuture()
+        flushed = self._flushed
+        self.flush(callback=lambda: flushed.done() or flushed.set_result(None))
+        return flushed
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def get_streaming_routes(fallback=None):
+    '''
+    Return a Tornado route for every GET function supporting streaming, to
+    be added ahead of the WSGI fallback, which serves their other methods.
+    '''
+    routes = list()
+    for api in ApiManager.get_apis():
+        for function in api.functions:
+            if function.method() == METHODS.GET and \
+               function.supports_streaming():               # @UndefinedVariable
+                route = "%s/%s/%s/%s(?:/(.*))?" % (API_BASE_ROUTE, api.version(),
+                                                   api.name(),
+                                                   function.static_path())
+                routes.append((route, StreamingHandler, {"function": function,
+                                                         "fallback": fallback}))
+    return routes
+
+def _take(chunks, n):
+    ''' Return the next n chunks joined, an empty string once exhausted. '''
+    data = list()
+    for chunk in chunks:
+        data.append(chunk)
+        if len(data) >= n:
+            break
+    return "".join(data)
+
+def _close(*iterators):
+    ''' Close the iterators that are generators, stopping their work. '''
+    for iterator in iterators:
+        if hasattr(iterator, "close"):
+            iterator.close()
+
+def _run_in_pool(function, *args):
+    '''
+    Call function on the streaming thread pool and return a Future of its
+    result, resolved on the IOLoop.
+    '''
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadPool(STREAM_THREADS)
+
+    io_loop = IOLoop.current()
+    future  = TracebackFuture()
+    def call():
+        try:
+            result = function(*args)
+        except:
+            io_loop.add_callback(future.set_exc_info, sys.exc_info())
+            return
+        io_loop.add_callback(future.set_result, result)
+    _POOL.apply_async(call)
+    return future
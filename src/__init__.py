@@ -2,7 +2,6 @@
 # Imports
 #=============================================================================
 from flask import Flask
-from pymongo import MongoClient
 
 #=============================================================================
 # Create Flask app and read in configuration files
@@ -11,12 +10,6 @@ app = Flask(__name__)
 app.config.from_object('src.default_settings')
 app.config.from_envvar('FLASKR_SETTINGS', silent=True)
 
-#=============================================================================
-# Connect to MongoDB
-#=============================================================================
-CLIENT = MongoClient(app.config['DATABASE_URL'], app.config['DATABASE_PORT'])
-DB     = CLIENT[app.config['DATABASE_NAME']]
-
 #=============================================================================
 # Parse configuration
 #=============================================================================
@@ -28,5 +21,33 @@ PROBES_UPLOAD_FOLDER    = app.config['PROBES_UPLOAD_FOLDER']
 TORNADO_LOG_FILE_PREFIX = app.config['TORNADO_LOG_FILE_PREFIX']
 TARGETS_COLLECTION      = app.config['TARGETS_COLLECTION']
 PROBES_COLLECTION       = app.config['PROBES_COLLECTION']
+REAPER_INTERVAL         = app.config['REAPER_INTERVAL']
+REAPER_THREADS          = app.config['REAPER_THREADS']
+ORPHAN_SWEEP_INTERVAL   = app.config['ORPHAN_SWEEP_INTERVAL']
+ORPHAN_GRACE_PERIOD     = app.config['ORPHAN_GRACE_PERIOD']
+KMER_SIZES              = app.config['KMER_SIZES']
+COMPUTE_PROCESSES       = app.config['COMPUTE_PROCESSES']
+JOBS_COLLECTION         = app.config['JOBS_COLLECTION']
+JOB_RESULTS_COLLECTION  = app.config['JOB_RESULTS_COLLECTION']
+JOB_PROCESSES           = app.config['JOB_PROCESSES']
+TM_CACHE_COLLECTION     = app.config['TM_CACHE_COLLECTION']
+TM_LATENCY_BUDGET       = app.config['TM_LATENCY_BUDGET']
+IDT_MAX_CLIENTS         = app.config['IDT_MAX_CLIENTS']
+IDT_MAX_PENDING         = app.config['IDT_MAX_PENDING']
+PROBE_ANNOTATIONS_COLLECTION = app.config['PROBE_ANNOTATIONS_COLLECTION']
+STREAM_THREADS          = app.config['STREAM_THREADS']
+FIND_BATCH_SIZE         = app.config['FIND_BATCH_SIZE']
+BULK_MAX_DOCUMENTS      = app.config['BULK_MAX_DOCUMENTS']
+BULK_MAX_BYTES          = app.config['BULK_MAX_BYTES']
+DATABASE_URL            = app.config['DATABASE_URL']
+DATABASE_PORT           = app.config['DATABASE_PORT']
+DATABASE_NAME           = app.config['DATABASE_NAME']
+DATABASE_MAX_POOL_SIZE  = app.config['DATABASE_MAX_POOL_SIZE']
+DATABASE_WARM_CONNECTIONS = app.config['DATABASE_WARM_CONNECTIONS']
+DATABASE_CONNECT_TIMEOUT_MS = app.config['DATABASE_CONNECT_TIMEOUT_MS']
+DATABASE_SOCKET_TIMEOUT_MS = app.config['DATABASE_SOCKET_TIMEOUT_MS']
+DATABASE_WAIT_QUEUE_TIMEOUT_MS = app.config['DATABASE_WAIT_QUEUE_TIMEOUT_MS']
+DATABASE_READ_PREFERENCE = app.config['DATABASE_READ_PREFERENCE']
+DATABASE_WRITE_CONCERN  = app.config['DATABASE_WRITE_CONCERN']
 
 from . import controller
\ No newline at end of file
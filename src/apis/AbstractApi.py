@@ -89,6 +89,7 @@ class AbstractApiV1(object):
     def produces():
         return [
                 "application/json",
+                "application/x-ndjson",
                 "text/tab-separated-values",
                 "text/plain"
                ]
@@ -38,6 +38,9 @@ class AbstractFunction(object):
     
     _DB_CONNECTOR = DbConnector.Instance()
     
+    # Set by JobManager while a request is processed as a job.
+    _PROGRESS_CALLBACK = None
+    
     #===========================================================================
     # Constructor
     #===========================================================================    
@@ -271,6 +274,15 @@ class AbstractFunction(object):
             # path parameter, hence the split
             params_dict[path_parameter] = path_parameter.parse_args(path_fields[i].split(","))
             
+    @staticmethod
+    def _report_progress(completed, total):
+        ''' 
+        Report that completed out of total units of work are done. This is a 
+        no-op unless the request is being processed as a job.
+        '''
+        if AbstractFunction._PROGRESS_CALLBACK:
+            AbstractFunction._PROGRESS_CALLBACK(completed, total)
+            
     def __repr__(self):
         return pformat(self.getSwaggerDeclaration("resourcePath"))
 
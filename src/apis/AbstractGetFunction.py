@@ -21,9 +21,12 @@ limitations under the License.
 # Imports
 #=============================================================================
 import math    
+import json
+
+from collections import Iterator
 
 from abc import ABCMeta
-from flask import jsonify, make_response
+from flask import jsonify, make_response, Response
 
 from src.apis.AbstractFunction import AbstractFunction 
 from src.apis.ApiConstants import FORMATS, MISSING_VALUE, METHODS
@@ -41,6 +44,24 @@ class AbstractGetFunction(AbstractFunction):
     def method():
         return METHODS.GET                                  # @UndefinedVariable
     
+    @staticmethod
+    def supports_jobs():
+        ''' 
+        Functions that may take longer than an HTTP request allows override 
+        this to return True, allowing them to be submitted to the Jobs API.
+        '''
+        return False
+    
+    @staticmethod
+    def supports_streaming():
+        '''
+        Functions returning a generator of items override this to return True
+        so that the server streams their output from Tornado as items are
+        produced (see StreamingHandler), rather than from the WSGI container,
+        which buffers the whole response.
+        '''
+        return False
+    
     @classmethod
     def handle_request(cls, query_params, path_fields):
         '''
@@ -55,6 +76,17 @@ class AbstractGetFunction(AbstractFunction):
         cls._handle_path_fields(path_fields, params_dict)
         
         (items, column_names, page_info) = cls.process_request(params_dict)
+        
+        # Functions producing large results return an iterator of dict items
+        # (e.g. a generator or a database cursor), which is streamed rather 
+        # than built up in memory. Delimited output can only be streamed with
+        # known column names.
+        if isinstance(items, Iterator):
+            if _format in [FORMATS.json, FORMATS.ndjson] or column_names:  # @UndefinedVariable
+                return cls._generate_streamed_output(items, _format, column_names), _format, page_info
+            items = list(items)
+        if _format == FORMATS.ndjson:                       # @UndefinedVariable
+            return cls._generate_streamed_output(items, _format, column_names), _format, page_info
 
         dict_items = False        
         if len(items) > 0:
@@ -93,7 +125,7 @@ class AbstractGetFunction(AbstractFunction):
         new_list = list()
         for item in l:
             if isinstance(item, list):
-                new_list.append(cls.handle_list(item))
+                new_list.append(cls._remove_nans_from_list(item))
             elif isinstance(item, dict):
                 for k,v in item.iteritems():
                     cls._remove_nans_from_dict(item, k, v)
@@ -111,7 +143,7 @@ class AbstractGetFunction(AbstractFunction):
             in_dict[in_key] = cls._remove_nans_from_list(in_value)
         elif isinstance(in_value, dict):
             for key, value in in_value.iteritems():
-                cls.a(in_value, key, value)
+                cls._remove_nans_from_dict(in_value, key, value)
         elif isinstance(in_value, float) and math.isnan(in_value):
             in_dict[in_key] = None
         
@@ -132,6 +164,47 @@ class AbstractGetFunction(AbstractFunction):
             delimited_output += "\n" + delimiter.join(fields)
         return delimited_output
     
+    @classmethod
+    def _generate_streamed_output(cls, items, _format, column_names=None):
+        '''
+        Stream dict items in the requested format. Delimited output requires
+        column_names since the items cannot be scanned ahead of time.
+        '''
+        (chunks, mimetype) = cls._stream_output(items, _format, column_names)
+        return Response(chunks, mimetype=mimetype)
+    
+    @classmethod
+    def _stream_output(cls, items, _format, column_names=None):
+        '''
+        Return a generator of the chunks of dict items in the requested 
+        format, along with its mimetype.
+        '''
+        if _format == FORMATS.json:                         # @UndefinedVariable
+            def generate():
+                yield '{"%s": [' % cls.name()
+                for i, item in enumerate(items):
+                    item = cls._remove_nans_from_list([item])[0]
+                    yield (",\n" if i > 0 else "\n") + json.dumps(item)
+                yield "\n]}"
+            return (generate(), "application/json")
+        elif _format == FORMATS.ndjson:                     # @UndefinedVariable
+            def generate():
+                for item in items:
+                    item = cls._remove_nans_from_list([item])[0]
+                    yield json.dumps(item) + "\n"
+            return (generate(), "application/x-ndjson")
+        elif _format in [FORMATS.tsv, FORMATS.csv]:         # @UndefinedVariable
+            delimiter = "\t" if _format == FORMATS.tsv else ","  # @UndefinedVariable
+            def generate():
+                yield delimiter.join(column_names)
+                for item in items:
+                    fields = [str(item[c]) if c in item else MISSING_VALUE 
+                              for c in column_names]
+                    yield "\n" + delimiter.join(fields)
+            return (generate(), "text/plain")
+        else:
+            raise Exception("Unrecognized output format: %s." % _format)
+    
     @staticmethod
     def _get_unique_attributes_sorted(records):
         ''' 
@@ -110,6 +110,12 @@ DATESTAMP     = "datestamp"
 TYPE          = "type"
 ERROR         = "error"
 UUID          = "uuid"
+TOMBSTONE     = "tombstone"
+PAGE_SIZE     = "page_size"
+JOB           = "job"
+STATUS        = "status"
+PROGRESS      = "progress"
+ANNOTATIONS   = "annotations"
 
 #=============================================================================
 # Miscellaneous namedtuples 
@@ -119,6 +125,7 @@ FORMATS_TUPLE = namedtuple('Formats',
                             'json',
                             'tsv',
                             'csv',
+                            'ndjson',
                            ])
 
 FORMATS = FORMATS_TUPLE(*FORMATS_TUPLE._fields)
@@ -133,6 +140,31 @@ METHODS_TUPLE = namedtuple('Methods',
 
 METHODS = METHODS_TUPLE(*METHODS_TUPLE._fields)
 
+JOB_STATUS_TUPLE = namedtuple('JobStatus',
+                              [
+                               'queued',
+                               'running',
+                               'succeeded',
+                               'failed',
+                              ])
+JOB_STATUS = JOB_STATUS_TUPLE(*JOB_STATUS_TUPLE._fields)
+
+TM_SOURCES_TUPLE = namedtuple('TmSources',
+                              [
+                               'cache',
+                               'idt',
+                               'local',
+                              ])
+TM_SOURCES = TM_SOURCES_TUPLE(*TM_SOURCES_TUPLE._fields)
+
+BREAKER_STATE_TUPLE = namedtuple('BreakerState',
+                                 [
+                                  'closed',
+                                  'open',
+                                  'half_open',
+                                 ])
+BREAKER_STATE = BREAKER_STATE_TUPLE(*BREAKER_STATE_TUPLE._fields)
+
 EQUALITY_TUPLE = namedtuple('Equality',
                             [
                              'greater_than',
@@ -25,6 +25,8 @@ from collections import defaultdict
 from src.apis.snp_search.SnpSearchApi import SnpSearchApiV1
 from src.apis.melting_temperature.MeltingTemperatureApi import MeltingTemperatureApiV1
 from src.apis.probe_design.ProbeDesignApi import ProbeDesignApiV1
+from src.apis.jobs.JobsApi import JobsApiV1
+from src.apis.status.StatusApi import StatusApiV1
 from src.apis.ApiConstants import API, API_DOCS, SWAGGER_VERSION
 
 #=============================================================================
@@ -40,6 +42,8 @@ _APIS = [
          SnpSearchApiV1(),
          MeltingTemperatureApiV1(),
          ProbeDesignApiV1(),
+         JobsApiV1(),
+         StatusApiV1(),
         ]
 
 _APIS_DICT = defaultdict(dict)
@@ -0,0 +1,76 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 21, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import API_BASE_URL, PARAMETER_TYPES, UUID, URL, \
+    STATUS, JOB_STATUS
+from src.JobManager import JobManager
+
+#=============================================================================
+# Class
+#=============================================================================
+class JobGetFunction(AbstractGetFunction):
+    
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================    
+    @staticmethod
+    def name():
+        return "Job"
+   
+    @staticmethod
+    def summary():
+        return "Retrieve the status of a job."
+    
+    @staticmethod
+    def notes():
+        return "Status is one of queued, running, succeeded or failed and " \
+               "progress is the fraction of the job completed. Once a job " \
+               "has succeeded, url links to its results."
+    
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.uuid(allow_multiple=False, 
+                                            param_type=PARAMETER_TYPES.path), # @UndefinedVariable
+                     ]
+        return parameters
+    
+    @classmethod
+    def process_request(cls, params_dict):
+        uuid = params_dict[cls.parameters()[1]][0]
+        job  = JobManager.Instance().get(uuid)
+        if job is None:
+            return ([], None, None)
+        
+        if job[STATUS] == JOB_STATUS.succeeded:                 # @UndefinedVariable
+            job[URL] = "%s/v1/Jobs/Results/%s" % (API_BASE_URL, job[UUID])
+        return ([job], None, None)
+         
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = JobGetFunction()
+    print function
@@ -0,0 +1,120 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 21, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+import sys
+
+from flask import make_response, jsonify
+
+from src.apis.AbstractPostFunction import AbstractPostFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import API_BASE_URL, UUID, URL, STATUS, ERROR
+from src.JobManager import JobManager
+
+#=============================================================================
+# Class
+#=============================================================================
+class JobPostFunction(AbstractPostFunction):
+    
+    # Key of params_dict holding the parameters of the submitted function.
+    _FUNCTION_PARAMS = "function_params"
+    
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================    
+    @staticmethod
+    def name():
+        return "Job"
+   
+    @staticmethod
+    def summary():
+        return "Submit a request to run as a job."
+    
+    @staticmethod
+    def notes():
+        return "Run the GET function at path function (e.g. Validity) of API " \
+               "api (e.g. ProbeDesign) as a job. Every other query parameter " \
+               "is passed on to the function. Only functions that support " \
+               "jobs can be submitted. The returned url reports the status of " \
+               "the job."
+    
+    @staticmethod
+    def response_messages():
+        return [
+                { "code": 202, 
+                  "message": "Job submitted successfully."},
+                { "code": 500, 
+                  "message": "Operation failed."},
+               ]
+    
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.string("api", "Name of the API.", required=True),
+                      ParameterFactory.string("function", "Path of the function.", required=True),
+                     ]
+        return parameters
+    
+    @classmethod
+    def handle_request(cls, query_params, path_fields):
+        '''
+        Parameters other than api and function belong to the submitted 
+        function, so they are passed on unparsed rather than discarded.
+        '''
+        (params_dict, _) = cls._parse_query_params(query_params)
+        own_params       = [p.alias.lower() for p in cls.parameters()]
+        function_params  = dict()
+        for name, args in query_params.items():
+            if name not in own_params:
+                function_params[name] = args
+        params_dict[cls._FUNCTION_PARAMS] = function_params
+        
+        return (cls.process_request(params_dict), None, None)
+    
+    @classmethod
+    def process_request(cls, params_dict):
+        api        = ParameterFactory.string("api", "Name of the API.", required=True)
+        function   = ParameterFactory.string("function", "Path of the function.", required=True)
+        response   = dict()
+        http_status_code = 202
+        
+        try:
+            for name, args in params_dict[cls._FUNCTION_PARAMS].items():
+                if not all(isinstance(arg, basestring) for arg in args):
+                    raise Exception("Parameter %s cannot be passed to a job." % name)
+            job = JobManager.Instance().submit(params_dict[api][0],
+                                               params_dict[function][0],
+                                               params_dict[cls._FUNCTION_PARAMS])
+            response[UUID]   = job[UUID]
+            response[STATUS] = job[STATUS]
+            response[URL]    = "%s/v1/Jobs/Job/%s" % (API_BASE_URL, job[UUID])
+        except:
+            response[ERROR]  = str(sys.exc_info()[1])
+            http_status_code = 500
+        
+        return make_response(jsonify(response), http_status_code)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = JobPostFunction()
+    print function
@@ -0,0 +1,60 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 21, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractApi import AbstractApiV1
+from src.apis.jobs.JobPostFunction import JobPostFunction
+from src.apis.jobs.JobGetFunction import JobGetFunction
+from src.apis.jobs.ResultsFunction import ResultsFunction
+
+#=============================================================================
+# Class
+#=============================================================================
+class JobsApiV1(AbstractApiV1):
+
+    _FUNCTIONS = [
+                  JobPostFunction(),
+                  JobGetFunction(),
+                  ResultsFunction(),
+                 ]
+
+    @staticmethod
+    def name():
+        return "Jobs"
+   
+    @staticmethod
+    def description():
+        return "Functions for running long requests as jobs."
+    
+    @staticmethod
+    def preferred():
+        return True
+    
+    @property
+    def functions(self):
+        return self._FUNCTIONS
+    
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    api = JobsApiV1()
+    print api
@@ -0,0 +1,87 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 21, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import PARAMETER_TYPES, PAGE, PAGE_SIZE, STATUS, \
+    JOB_STATUS
+from src.JobManager import JobManager
+
+#=============================================================================
+# Class
+#=============================================================================
+class ResultsFunction(AbstractGetFunction):
+    
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================    
+    @staticmethod
+    def name():
+        return "Results"
+   
+    @staticmethod
+    def summary():
+        return "Retrieve the results of a job."
+    
+    @staticmethod
+    def notes():
+        return "Results of a succeeded job are returned page_size rows at a " \
+               "time, in the same columns as when the function is run " \
+               "inline. Links to other pages are provided in the Link header."
+    
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.uuid(allow_multiple=False, 
+                                            param_type=PARAMETER_TYPES.path), # @UndefinedVariable
+                      ParameterFactory.integer(PAGE, "Page of results.", 
+                                               default=1, minimum=1),
+                      ParameterFactory.integer(PAGE_SIZE, "Number of results per page.",
+                                               default=1000, minimum=1),
+                     ]
+        return parameters
+    
+    @classmethod
+    def process_request(cls, params_dict):
+        uuid       = params_dict[ParameterFactory.uuid(allow_multiple=False, 
+                                                   param_type=PARAMETER_TYPES.path)][0] # @UndefinedVariable
+        page       = params_dict[ParameterFactory.integer(PAGE, "Page of results.", 
+                                                          default=1, minimum=1)][0]
+        page_size  = params_dict[ParameterFactory.integer(PAGE_SIZE, "Number of results per page.",
+                                                          default=1000, minimum=1)][0]
+        
+        job = JobManager.Instance().get(uuid)
+        if job is None or job[STATUS] != JOB_STATUS.succeeded:  # @UndefinedVariable
+            return ([], None, None)
+        
+        num_pages = max((job["num_results"] + page_size - 1) // page_size, 1)
+        rows      = JobManager.Instance().get_results(uuid, (page - 1) * page_size,
+                                                      page_size)
+        return (rows, job["columns"], (page, page_size, num_pages))
+         
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = ResultsFunction()
+    print function
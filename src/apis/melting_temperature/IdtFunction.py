@@ -20,17 +20,23 @@ limitations under the License.
 #=============================================================================
 # Imports
 #=============================================================================
+import numpy as np
+
 from src.apis.AbstractGetFunction import AbstractGetFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
-from src.apis.melting_temperature.idtClient import IDTClient
+from src import TM_LATENCY_BUDGET, PROBES_COLLECTION, \
+    PROBE_ANNOTATIONS_COLLECTION
+from src.apis.ApiConstants import ID, UUID, SEQUENCE, TOMBSTONE, ANNOTATIONS, \
+    TM_SOURCES, JOB_STATUS
+from src.apis.melting_temperature.tmRouter import TmRouter
+from src.apis.melting_temperature.nearest_neighbor import condition_grid, \
+    salt_corrections, sequence_thermodynamics, melting_temperature_grid
 
 #=============================================================================
 # Class
 #=============================================================================
 class IdtFunction(AbstractGetFunction):
     
-    _IDT_CLIENT = IDTClient()
-    
     #===========================================================================
     # Overridden Methods
     #===========================================================================    
@@ -48,35 +54,150 @@ class IdtFunction(AbstractGetFunction):
                "DNA Technologies) SOAP service for sequence analysis. " \
                "Please note, every provided sequence must have an " \
                "accompanying name. Names are assigned to sequences in the " \
-               "order in which they are provided, so order matters."
+               "order in which they are provided, so order matters. " \
+               "A row is returned for every sequence under every combination " \
+               "of the provided oligo, Na+, Mg2+ and dNTP concentrations. " \
+               "When more than one combination is requested, melting " \
+               "temperatures are computed locally in a single pass with " \
+               "nearest-neighbor thermodynamics and the Owczarzy salt " \
+               "corrections rather than with one IDT request per sequence " \
+               "and condition. Melting temperatures are first looked up in a " \
+               "cache of previous IDT results and any sequence IDT has not " \
+               "answered within the latency budget is also computed " \
+               "locally. The Source column reports where each melting " \
+               "temperature came from (cache, idt or local). Instead of " \
+               "names and sequences, probes_uuid may specify an uploaded " \
+               "probes file, whose melting temperatures were computed when " \
+               "it was uploaded."
+    
+    @staticmethod
+    def supports_jobs():
+        return True
     
     @classmethod
     def parameters(cls):
         parameters = [
                       ParameterFactory.format(),
-                      ParameterFactory.sequence_names(required=True),
-                      ParameterFactory.sequences(required=True),
+                      ParameterFactory.sequence_names(),
+                      ParameterFactory.sequences(),
+                      ParameterFactory.floats("oligo", "Comma separated oligo concentration(s) (uM).",
+                                              default=2),
+                      ParameterFactory.floats("na", "Comma separated Na+ concentration(s) (mM).",
+                                              default=40),
+                      ParameterFactory.floats("mg", "Comma separated Mg2+ concentration(s) (mM).",
+                                              default=2),
+                      ParameterFactory.floats("dntp", "Comma separated dNTP concentration(s) (mM).",
+                                              default=0.2),
+                      ParameterFactory.float("budget", "Seconds to wait for IDT before computing melting temperatures locally.",
+                                             default=TM_LATENCY_BUDGET),
+                      ParameterFactory.string("probes_uuid", "UUID of an uploaded probes file."),
                      ]
         return parameters
     
     @classmethod
     def process_request(cls, params_dict):
-        sequences      = params_dict[ParameterFactory.sequences(required=True)]
-        sequence_names = params_dict[ParameterFactory.sequence_names(required=True)]
+        oligo       = params_dict[ParameterFactory.floats("oligo", "Comma separated oligo concentration(s) (uM).",
+                                                          default=2)]
+        na          = params_dict[ParameterFactory.floats("na", "Comma separated Na+ concentration(s) (mM).",
+                                                          default=40)]
+        mg          = params_dict[ParameterFactory.floats("mg", "Comma separated Mg2+ concentration(s) (mM).",
+                                                          default=2)]
+        dntp        = params_dict[ParameterFactory.floats("dntp", "Comma separated dNTP concentration(s) (mM).",
+                                                          default=0.2)]
+        budget      = params_dict.get(ParameterFactory.float("budget", "Seconds to wait for IDT before computing melting temperatures locally.",
+                                                             default=TM_LATENCY_BUDGET),
+                                      [TM_LATENCY_BUDGET])[0]
+        probes_uuid = ParameterFactory.string("probes_uuid", "UUID of an uploaded probes file.")
+        conditions  = condition_grid(oligo, na, mg, dntp)
+        annotations = None
+        if probes_uuid in params_dict:
+            annotations    = cls._get_annotations(params_dict[probes_uuid][0])
+            sequences      = [a[SEQUENCE] for a in annotations]
+            sequence_names = [a["name"] for a in annotations]
+        else:
+            sequences      = params_dict.get(ParameterFactory.sequences(), [])
+            sequence_names = params_dict.get(ParameterFactory.sequence_names(), [])
         
         # Every sequence must have an accompanying name
-        if len(sequences) != len(sequence_names):
+        if len(sequences) < 1 or len(sequences) != len(sequence_names):
             return (None, None, None)
         
+        if annotations is not None and len(conditions[0]) == 1 and \
+           all(annotations[0][k] == float(c[0]) for k, c in 
+               zip(["oligo", "na", "mg", "dntp"], conditions)):
+            tms     = [[a["tm"]] for a in annotations]
+            sources = [[a["source"]] for a in annotations]
+        elif len(conditions[0]) > 1:
+            tms     = cls._melting_temp_grid(sequences, conditions)
+            sources = [[TM_SOURCES.local] * len(conditions[0])] * len(sequences)  # @UndefinedVariable
+        else:
+            results = TmRouter.Instance().get_melting_temps(sequences,
+                                                            *[c[0] for c in conditions],
+                                                            budget=budget,
+                                                            progress=cls._report_progress)
+            tms     = [[result.tm] for result in results]
+            sources = [[result.source] for result in results]
+
         data = list()
         for i, sequence in enumerate(sequences):
-            melting_temp = cls._IDT_CLIENT.get_melting_temp(sequence)
-            data.append({"Name": sequence_names[i], 
-                         "Sequence": sequence,
-                         "Tm": melting_temp.tm})
-        columns = ["Name", "Sequence", "Tm"]
+            for j in range(len(conditions[0])):
+                data.append({"Name": sequence_names[i],
+                             "Sequence": sequence,
+                             "Oligo": float(conditions[0][j]),
+                             "Na": float(conditions[1][j]),
+                             "Mg": float(conditions[2][j]),
+                             "dNTP": float(conditions[3][j]),
+                             "Tm": tms[i][j],
+                             "Source": sources[i][j]})
+        columns = ["Name", "Sequence", "Oligo", "Na", "Mg", "dNTP", "Tm", "Source"]
+        
+        # Self-dimer checks are reported when the probes file was annotated 
+        # with them.
+        if annotations is not None and "self_dimer" in annotations[0]:
+            n = len(conditions[0])
+            for i, row in enumerate(data):
+                row["Self_dimer"]   = annotations[i // n]["self_dimer"]
+                row["DeltaG"]       = annotations[i // n]["deltaG"]
+                row["Comp_percent"] = annotations[i // n]["compPercent"]
+            columns.extend(["Self_dimer", "DeltaG", "Comp_percent"])
         return (data, columns, None)
-#         
+
+    #===========================================================================
+    # Helper Methods
+    #===========================================================================
+    @classmethod
+    def _get_annotations(cls, probes_uuid):
+        '''
+        Return the annotations of every record of an uploaded probes file in
+        file order, raising if the file is not annotated.
+        '''
+        criteria = {UUID: probes_uuid, TOMBSTONE: {"$exists": False}}
+        records  = cls._DB_CONNECTOR.find(PROBES_COLLECTION, criteria, 
+                                          {ID: 0, ANNOTATIONS: 1})
+        if len(records) < 1:
+            raise Exception("Probes file %s not found." % probes_uuid)
+        status = records[0].get(ANNOTATIONS)
+        if status != JOB_STATUS.succeeded:                  # @UndefinedVariable
+            raise Exception("Probes file %s is not annotated (%s)." % 
+                            (probes_uuid, status))
+        return cls._DB_CONNECTOR.find(PROBE_ANNOTATIONS_COLLECTION, 
+                                      {UUID: probes_uuid}, 
+                                      {ID: 0, "index": 0, UUID: 0},
+                                      sort=[("index", 1)],
+                                      hint=[(UUID, 1), ("index", 1)])
+
+    @staticmethod
+    def _melting_temp_grid(sequences, conditions):
+        '''
+        Return a sequences x conditions matrix of melting temperatures rounded
+        like IDT's, with -1 where a sequence cannot be scored.
+        '''
+        (dh, ds, gc, lengths) = sequence_thermodynamics([s.upper() for s in sequences])
+        tms = melting_temperature_grid(dh, ds, gc, lengths,
+                                       salt_corrections(*conditions))
+        tms[np.isnan(tms)] = -1
+        return np.round(tms, 1).tolist()
+
 #===============================================================================
 # Run Main
 #===============================================================================
@@ -0,0 +1,75 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 25, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.melting_temperature.idtClient import BREAKER, TM_FLIGHTS, \
+    DIMER_FLIGHTS
+
+#=============================================================================
+# Class
+#=============================================================================
+class IdtStatusFunction(AbstractGetFunction):
+    
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================    
+    @staticmethod
+    def name():
+        return "IdtStatus"
+   
+    @staticmethod
+    def summary():
+        return "Retrieve the state of the IDT circuit breaker and coalesced calls."
+    
+    @staticmethod
+    def notes():
+        return "Calls to IDT go through a circuit breaker that opens when " \
+               "too many recent calls have failed, so that requests fail " \
+               "fast while IDT is down. State is one of closed, open or " \
+               "half_open (a trial call is allowed through). Trips is the " \
+               "number of times the breaker has opened and rejected is the " \
+               "number of calls refused while it was open. Concurrent " \
+               "lookups of the same sequence and conditions share one IDT " \
+               "call: for each IDT operation, calls is the number of calls " \
+               "made, shared the number of calls saved and in_flight the " \
+               "number of calls currently waiting on IDT. Note that each " \
+               "server process has its own breaker and counts."
+    
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                     ]
+        return parameters
+    
+    @classmethod
+    def process_request(cls, params_dict):
+        return ([BREAKER.status(), TM_FLIGHTS.status(), DIMER_FLIGHTS.status()],
+                None, None)
+         
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = IdtStatusFunction()
+    print function
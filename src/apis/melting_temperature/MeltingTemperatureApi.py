@@ -22,6 +22,8 @@ limitations under the License.
 #=============================================================================
 from src.apis.AbstractApi import AbstractApiV1
 from src.apis.melting_temperature.IdtFunction import IdtFunction
+from src.apis.melting_temperature.IdtStatusFunction import IdtStatusFunction
+from src.apis.melting_temperature.TmStreamFunction import TmStreamFunction
 
 #=============================================================================
 # Class
@@ -30,6 +32,8 @@ class MeltingTemperatureApiV1(AbstractApiV1):
 
     _FUNCTIONS = [
                   IdtFunction(),
+                  IdtStatusFunction(),
+                  TmStreamFunction(),
                  ]
 
     @staticmethod
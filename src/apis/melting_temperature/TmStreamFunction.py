@@ -0,0 +1,149 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from itertools import islice
+from Bio import SeqIO
+
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import ID, FILEPATH, UUID, TOMBSTONE
+from src.apis.melting_temperature.tmRouter import TmRouter
+from src.apis.melting_temperature.localClient import LocalClient
+from src.apis.melting_temperature.nearest_neighbor import DEFAULT_OLIGO, \
+    DEFAULT_NA, DEFAULT_MG, DEFAULT_DNTP
+from src import PROBES_COLLECTION, TM_LATENCY_BUDGET
+
+#=============================================================================
+# Private Global Variables
+#=============================================================================
+_BATCH_SIZE = 500   # Records read and scored at a time
+
+#=============================================================================
+# Class
+#=============================================================================
+class TmStreamFunction(AbstractGetFunction):
+
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================
+    @staticmethod
+    def name():
+        return "TmStream"
+
+    @staticmethod
+    def summary():
+        return "Stream the melting temperatures of an uploaded probes file."
+
+    @staticmethod
+    def notes():
+        return "Rows (name, sequence, tm) are streamed as the records of " \
+               "the probes file are scored, a batch at a time, so memory " \
+               "use does not grow with the size of the file. Use format " \
+               "ndjson for one JSON object per line. Melting temperatures " \
+               "are computed locally with nearest-neighbor thermodynamics " \
+               "unless idt is true, in which case each batch is sent to IDT " \
+               "concurrently (see IDT). Closing the connection stops the " \
+               "computation."
+
+    @staticmethod
+    def supports_streaming():
+        return True
+
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.uuid(allow_multiple=False),
+                      ParameterFactory.float("oligo", "Oligo concentration (uM).",
+                                             default=DEFAULT_OLIGO),
+                      ParameterFactory.float("na", "Na+ concentration (mM).",
+                                             default=DEFAULT_NA),
+                      ParameterFactory.float("mg", "Mg2+ concentration (mM).",
+                                             default=DEFAULT_MG),
+                      ParameterFactory.float("dntp", "dNTP concentration (mM).",
+                                             default=DEFAULT_DNTP),
+                      ParameterFactory.boolean("idt", "Retrieve melting temperatures via IDT.",
+                                               default_value=False),
+                      ParameterFactory.float("budget", "Seconds to wait for IDT per batch before computing melting temperatures locally.",
+                                             default=TM_LATENCY_BUDGET),
+                     ]
+        return parameters
+
+    @classmethod
+    def process_request(cls, params_dict):
+        uuid       = params_dict[ParameterFactory.uuid(allow_multiple=False)][0]
+        oligo      = params_dict[ParameterFactory.float("oligo", "Oligo concentration (uM).",
+                                                        default=DEFAULT_OLIGO)][0]
+        na         = params_dict[ParameterFactory.float("na", "Na+ concentration (mM).",
+                                                        default=DEFAULT_NA)][0]
+        mg         = params_dict[ParameterFactory.float("mg", "Mg2+ concentration (mM).",
+                                                        default=DEFAULT_MG)][0]
+        dntp       = params_dict[ParameterFactory.float("dntp", "dNTP concentration (mM).",
+                                                        default=DEFAULT_DNTP)][0]
+        idt        = params_dict.get(ParameterFactory.boolean("idt", "Retrieve melting temperatures via IDT.",
+                                                              default_value=False),
+                                     [False])[0]
+        budget     = params_dict.get(ParameterFactory.float("budget", "Seconds to wait for IDT per batch before computing melting temperatures locally.",
+                                                            default=TM_LATENCY_BUDGET),
+                                     [TM_LATENCY_BUDGET])[0]
+        conditions = [oligo, na, mg, dntp]
+
+        criteria = {UUID: uuid, TOMBSTONE: {"$exists": False}}
+        records  = cls._DB_CONNECTOR.find(PROBES_COLLECTION, criteria,
+                                          {ID: 0, FILEPATH: 1})
+        if len(records) < 1:
+            raise Exception("Probes file %s not found." % uuid)
+
+        items = cls._stream_melting_temps(records[0][FILEPATH], conditions,
+                                          idt, budget)
+        return (items, ["name", "sequence", "tm"], None)
+
+    #===========================================================================
+    # Helper Methods
+    #===========================================================================
+    @staticmethod
+    def _stream_melting_temps(path, conditions, idt, budget):
+        ''' Generate a row per record of the FASTA file at path. '''
+        local_client = LocalClient()
+        seq_records  = SeqIO.parse(path, "fasta")
+        while True:
+            batch = list(islice(seq_records, _BATCH_SIZE))
+            if not batch:
+                break
+            sequences = [str(seq_record.seq).upper() for seq_record in batch]
+            if idt:
+                tms = [result.tm for result in
+                       TmRouter.Instance().get_melting_temps(sequences,
+                                                             *conditions,
+                                                             budget=budget)]
+            else:
+                tms = [result.tm for result in
+                       local_client.get_melting_temps(sequences, *conditions)]
+            for seq_record, sequence, tm in zip(batch, sequences, tms):
+                yield {"name": seq_record.id, "sequence": sequence, "tm": tm}
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = TmStreamFunction()
+    print function
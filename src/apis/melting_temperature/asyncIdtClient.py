@@ -0,0 +1,260 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 29, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import time
+import random
+import logging
+
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+from xml.etree import cElementTree as ElementTree
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPError
+
+from src.apis.melting_temperature.idtClient import OligoTemp, DimerResult, \
+    BREAKER, RETRY_ATTEMPTS, TIMEOUT, DEADLINE, BACKOFF_BASE, BACKOFF_MAX, \
+    URL, WSDL_PATH
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_WSDL_NS   = "http://schemas.xmlsoap.org/wsdl/"
+_SOAP_NS   = "http://schemas.xmlsoap.org/wsdl/soap/"
+_SCHEMA_NS = "http://www.w3.org/2001/XMLSchema"
+
+_ENVELOPE = '<?xml version="1.0" encoding="utf-8"?>' \
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">' \
+            '<soap:Body><%s xmlns="%s">%s</%s></soap:Body></soap:Envelope>'
+
+# Response fields read for each operation.
+_ANALYZE_FIELDS     = ["Errors", "MinMeltTemp", "MaxMeltTemp", "MeltTemp"]
+_SELF_DIMER_FIELDS  = ["IsComplementPair", "MaxDeltaG", "ComplementarityPercent"]
+
+#===============================================================================
+# Classes
+#===============================================================================
+class AsyncIDTClient(object):
+    '''
+    Non-blocking counterpart of IDTClient for use on a Tornado IOLoop. SOAP
+    envelopes are rendered from templates built once from the WSDL (argument
+    names are taken from the WSDL and filled positionally, as suds does) and
+    only the fields needed are picked out of responses as they stream in. Up
+    to max_clients requests are in flight at once and the rest are queued.
+    Calls share the circuit breaker, retries and deadline of IDTClient.
+    '''
+    def __init__(self, io_loop=None, wsdl_url=None, max_clients=100,
+                 seq_type='DNA'):
+        self._io_loop     = io_loop or IOLoop.instance()
+        self._wsdl_url    = wsdl_url
+        self._http_client = AsyncHTTPClient(self._io_loop,
+                                            max_clients=max_clients,
+                                            force_instance=True)
+        self._operations  = None
+        self.seq_type     = seq_type
+
+    @gen.coroutine
+    def get_melting_temp(self, sequence, oligo=2, na=40, mg=2, dntp=0.2):
+        """Get the melting temperature for sequence, -1 if IDT fails.
+          \param oligo is the concentration of the oligo in uM
+        """
+        try:
+            fields = yield self._call("Analyze", sequence.upper(), self.seq_type,
+                                      oligo, na, mg, dntp)
+        except Exception, e:
+            logging.warning("IDT Analyze of %s failed: %s" % (sequence, e))
+            raise gen.Return(OligoTemp(-1, -1, -1))
+
+        if fields.get("Errors") or not fields.get("MeltTemp"):
+            raise gen.Return(OligoTemp(-1, -1, -1))
+        raise gen.Return(OligoTemp(float(fields["MinMeltTemp"]),
+                                   float(fields["MaxMeltTemp"]),
+                                   float(fields["MeltTemp"])))
+
+    @gen.coroutine
+    def get_melting_temps(self, sequences, oligo=2, na=40, mg=2, dntp=0.2):
+        """Get the melting temperatures of many sequences concurrently."""
+        results = yield [self.get_melting_temp(s, oligo, na, mg, dntp)
+                         for s in sequences]
+        raise gen.Return(results)
+
+    @gen.coroutine
+    def self_dimer_check(self, sequence):
+        """Check the oligo to see if there is a self dimer issue"""
+        fields = yield self._call("SelfDimer", sequence)
+        raise gen.Return(DimerResult(fields["IsComplementPair"].lower() == "true",
+                                     float(fields["MaxDeltaG"]),
+                                     float(fields["ComplementarityPercent"])))
+
+    def close(self):
+        self._http_client.close()
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    @gen.coroutine
+    def _call(self, operation, *args):
+        '''
+        Post operation, retrying failures with jittered exponential backoff
+        until DEADLINE, and return a dictionary of its response fields.
+        '''
+        deadline = time.time() + DEADLINE
+        i = 0
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not BREAKER.allow():
+                raise Exception("IDT is unavailable.")
+            try:
+                fields = yield self._post(operation, args,
+                                          min(TIMEOUT, max(remaining, 1)))
+                BREAKER.record_success()
+                break
+            except Exception:
+                BREAKER.record_failure()
+                i += 1
+                backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (i - 1)))
+                if i > RETRY_ATTEMPTS or backoff >= deadline - time.time():
+                    raise
+                yield gen.Task(self._io_loop.add_timeout, time.time() + backoff)
+        raise gen.Return(fields)
+
+    @gen.coroutine
+    def _post(self, operation, args, timeout):
+        operations = yield self._get_operations()
+        (location, action, namespace, arguments) = operations[operation]
+        body = "".join("<%s>%s</%s>" % (name, escape(str(value)), name)
+                       for name, value in zip(arguments, args))
+        fields = _ANALYZE_FIELDS if operation == "Analyze" else _SELF_DIMER_FIELDS
+        parser = _ResponseParser(fields)
+        request = HTTPRequest(location, method="POST",
+                              headers={"Content-Type": "text/xml; charset=utf-8",
+                                       "SOAPAction": '"%s"' % action},
+                              body=_ENVELOPE % (operation, namespace, body, operation),
+                              request_timeout=timeout,
+                              streaming_callback=parser.feed)
+        try:
+            yield self._http_client.fetch(request)
+        except HTTPError, e:
+            values = parser.values
+            raise Exception(values.get("faultstring") or str(e))
+        raise gen.Return(parser.close())
+
+    def _get_operations(self):
+        '''
+        Return a Future of the operations of the WSDL, which is loaded once
+        and again only if loading failed.
+        '''
+        if self._operations is None or \
+           (self._operations.done() and self._operations.exception()):
+            self._operations = self._load_operations()
+        return self._operations
+
+    @gen.coroutine
+    def _load_operations(self):
+        if self._wsdl_url is None and os.path.isfile(WSDL_PATH):
+            with open(WSDL_PATH) as f:
+                wsdl = f.read()
+        else:
+            response = yield self._http_client.fetch(self._wsdl_url or URL,
+                                                     request_timeout=TIMEOUT)
+            wsdl = response.body
+        raise gen.Return(parse_wsdl(wsdl))
+
+class _ResponseParser(object):
+    '''
+    Incremental parser collecting the text of the named elements (and of any
+    SOAP fault) of a response, ignoring namespaces and everything else.
+    '''
+    def __init__(self, fields):
+        self.values    = dict()
+        self._fields   = set(fields) | set(["faultstring"])
+        self._current  = None
+        self._depth    = 0
+        self._text     = list()
+        self._parser   = expat.ParserCreate(namespace_separator=" ")
+        self._parser.StartElementHandler  = self._start
+        self._parser.EndElementHandler    = self._end
+        self._parser.CharacterDataHandler = self._text.append
+
+    def feed(self, data):
+        self._parser.Parse(data, False)
+
+    def close(self):
+        self._parser.Parse("", True)
+        return self.values
+
+    def _start(self, name, _):
+        if self._current is not None:
+            self._depth += 1
+        elif name.split(" ")[-1] in self._fields:
+            self._current = name.split(" ")[-1]
+            self._depth   = 0
+            del self._text[:]
+
+    def _end(self, _):
+        if self._current is None:
+            return
+        if self._depth > 0:
+            self._depth -= 1
+        else:
+            self.values[self._current] = "".join(self._text).strip()
+            self._current = None
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def parse_wsdl(wsdl):
+    '''
+    Return a dictionary mapping each SOAP 1.1 operation of a document/literal
+    WSDL to its endpoint, SOAP action, namespace and argument names.
+    '''
+    root     = ElementTree.fromstring(wsdl)
+    location = root.find(".//{%s}port/{%s}address" % (_WSDL_NS, _SOAP_NS)).get("location")
+
+    arguments = dict()
+    for schema in root.iter("{%s}schema" % _SCHEMA_NS):
+        namespace = schema.get("targetNamespace")
+        for element in schema.findall("{%s}element" % _SCHEMA_NS):
+            names = [e.get("name") for e in element.iter("{%s}element" % _SCHEMA_NS)]
+            arguments[element.get("name")] = (namespace, names[1:])
+
+    operations = dict()
+    for binding in root.findall("{%s}binding" % _WSDL_NS):
+        for operation in binding.findall("{%s}operation" % _WSDL_NS):
+            soap_operation = operation.find("{%s}operation" % _SOAP_NS)
+            name = operation.get("name")
+            if soap_operation is not None and name in arguments:
+                (namespace, names) = arguments[name]
+                operations[name] = (location, soap_operation.get("soapAction"),
+                                    namespace, names)
+    return operations
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    @gen.coroutine
+    def main():
+        client = AsyncIDTClient()
+        print (yield client.get_melting_temps(["CCAGAAGG", "AGATTTCGCT"]))
+    IOLoop.instance().run_sync(main)
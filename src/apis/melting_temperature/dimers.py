@@ -0,0 +1,302 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 15, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import numpy as np
+
+from src.apis.melting_temperature.idtClient import DimerResult
+from src.apis.melting_temperature.nearest_neighbor import stack_free_energies
+from src.utilities.bio_utilities import N_CODE, encode_sequence, \
+    pad_sequences
+from src.utilities.kmer_utilities import MAX_K, kmer_values
+
+#===============================================================================
+# Public Global Variables
+#===============================================================================
+# Structures at least this stable (kcal/mol) are flagged.
+SELF_DIMER_THRESHOLD = -9.0
+HAIRPIN_THRESHOLD    = -2.0
+
+# Least stable cross-dimer threshold screened. Pairs forming no duplex at all
+# (deltaG 0) would otherwise be flagged, although they share no seed and are
+# never scored, and every seed is at least 3 bases long.
+MAX_CROSS_DIMER_THRESHOLD = -1.0
+
+# Minimum number of unpaired bases closed by a hairpin stem.
+MIN_HAIRPIN_LOOP = 3
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_INITIATION_DG = 1.96   # Duplex initiation (kcal/mol), SantaLucia (2004)
+_CHUNK_SIZE    = 1024   # Oligos scored per batch, to bound memory
+
+# Hairpin loop initiation dG (kcal/mol) by loop length, SantaLucia & Hicks
+# (2004). Other lengths are interpolated, and extrapolated logarithmically
+# beyond the last entry.
+_LOOP_LENGTHS = np.array([3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18, 20, 25, 30])
+_LOOP_DG      = np.array([3.5, 3.5, 3.3, 4.0, 4.2, 4.3, 4.5, 4.6, 5.0, 5.1,
+                          5.3, 5.5, 5.7, 6.1, 6.3])
+
+#===============================================================================
+# Utility Methods
+#===============================================================================
+def self_dimers(sequences, temperature=37.0):
+    '''
+    Score the most stable self-dimer of each sequence (string or array of base
+    codes) and return a list of DimerResult(self_dimer, deltaG, compPercent):
+    whether deltaG is at or below SELF_DIMER_THRESHOLD, the dG (kcal/mol) of
+    the most stable contiguous duplex between two copies of the oligo, and the
+    largest percentage of bases paired in any alignment.
+    '''
+    results = list()
+    for (dg, paired, lengths) in _score(sequences, temperature, False):
+        percent = 100.0 * paired / np.maximum(lengths, 1)
+        results.extend(DimerResult(bool(d <= SELF_DIMER_THRESHOLD), round(d, 2),
+                                   round(p, 1))
+                       for d, p in zip(dg, percent))
+    return results
+
+def hairpins(sequences, temperature=37.0):
+    '''
+    Score the most stable hairpin of each sequence and return a list of
+    DimerResult(is_hairpin, deltaG, compPercent) where deltaG includes the
+    loop penalty and compPercent is the percentage of bases in the stem.
+    '''
+    results = list()
+    for (dg, paired, lengths) in _score(sequences, temperature, True):
+        percent = 100.0 * paired / np.maximum(lengths, 1)
+        results.extend(DimerResult(bool(d <= HAIRPIN_THRESHOLD), round(d, 2),
+                                   round(p, 1))
+                       for d, p in zip(dg, percent))
+    return results
+
+def hetero_dimers(sequences1, sequences2, temperature=37.0):
+    '''
+    Score the most stable duplex between sequences1[i] and sequences2[i] and
+    return a list of DimerResult(is_dimer, deltaG, compPercent), where
+    compPercent is relative to the shorter oligo.
+    '''
+    results = list()
+    for (dg, paired, lengths) in _score(sequences1, temperature, False, sequences2):
+        percent = 100.0 * paired / np.maximum(lengths, 1)
+        results.extend(DimerResult(bool(d <= SELF_DIMER_THRESHOLD), round(d, 2),
+                                   round(p, 1))
+                       for d, p in zip(dg, percent))
+    return results
+
+def seed_length(threshold, temperature=37.0):
+    '''
+    Number of consecutive base pairs that any duplex at least as stable as
+    threshold (kcal/mol) must contain, given the most stable stack.
+    '''
+    strongest = stack_free_energies(temperature).min()
+    stacks    = np.ceil((threshold - _INITIATION_DG) / strongest)
+    return max(int(stacks) + 1, 2)
+
+def cross_dimer_candidates(sequences, k):
+    '''
+    Return the pairs (i, j), i < j, of sequences sharing a complementary k-mer,
+    i.e. where a k-mer of sequence i is the reverse complement of a k-mer of
+    sequence j. Reverse complement k-mers of all sequences form an inverted
+    index (sorted k-mer values and the sequence owning each), which every
+    forward k-mer is looked up in at once.
+    '''
+    codes = _encode(sequences)
+    if len(codes) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Sequences are joined with an N between them so no k-mer spans two.
+    separator = np.array([N_CODE], dtype=np.uint8)
+    joined    = np.concatenate([c for code in codes for c in (code, separator)])
+    owners    = np.repeat(np.arange(len(codes)), [len(c) + 1 for c in codes])
+    (forward, reverse, valid) = kmer_values(joined, k)
+    owners    = owners[:len(valid)][valid]
+    forward   = forward[valid]
+    reverse   = reverse[valid]
+
+    order     = np.argsort(reverse, kind='mergesort')
+    reverse   = reverse[order]
+    rc_owners = owners[order]
+    lo        = np.searchsorted(reverse, forward, side='left')
+    hi        = np.searchsorted(reverse, forward, side='right')
+    counts    = hi - lo
+    firsts    = np.repeat(owners, counts)
+    ranks     = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    seconds   = rc_owners[np.repeat(lo, counts) + ranks]
+
+    distinct = firsts != seconds
+    keys     = np.unique(np.minimum(firsts, seconds)[distinct] * len(codes) +
+                         np.maximum(firsts, seconds)[distinct])
+    return np.column_stack((keys // len(codes), keys % len(codes)))
+
+def screen_cross_dimers(sequences, threshold, temperature=37.0, executor=None):
+    '''
+    Return (i, j, DimerResult) for every pair of sequences forming a duplex at
+    least as stable as threshold. Only pairs sharing a complementary seed long
+    enough to reach threshold are scored, in batches spread over the workers
+    of executor (a ComputeExecutor) when one is provided. Sequences and
+    candidate pairs are shared with the workers rather than pickled with
+    every batch. Threshold must not exceed MAX_CROSS_DIMER_THRESHOLD.
+    '''
+    if threshold > MAX_CROSS_DIMER_THRESHOLD:
+        raise Exception("Cross-dimer threshold must be at most %.1f kcal/mol." %
+                        MAX_CROSS_DIMER_THRESHOLD)
+    codes = _encode(sequences)
+    k     = min(seed_length(threshold, temperature), MAX_K)
+    pairs = cross_dimer_candidates(codes, k)
+    if len(pairs) < 1:
+        return list()
+
+    (padded, lengths) = pad_sequences(codes)
+    bounds = [(first, min(first + _CHUNK_SIZE, len(pairs)))
+              for first in range(0, len(pairs), _CHUNK_SIZE)]
+    if executor is None:
+        scored = [_score_pairs(padded, lengths, pairs[first:last], temperature)
+                  for (first, last) in bounds]
+    else:
+        shared = [executor.share(array) for array in (padded, lengths, pairs)]
+        try:
+            shards = [(shared, first, last, temperature) for (first, last) in bounds]
+            (scored, _) = executor.map(_score_shared_pairs, shards)
+        finally:
+            executor.release(*shared)
+
+    dg      = np.concatenate([batch[0] for batch in scored])
+    percent = np.concatenate([batch[1] for batch in scored])
+    flagged = list()
+    for n in np.flatnonzero(dg <= threshold):
+        result = DimerResult(bool(dg[n] <= SELF_DIMER_THRESHOLD),
+                             round(dg[n], 2), round(percent[n], 1))
+        flagged.append((int(pairs[n, 0]), int(pairs[n, 1]), result))
+    return flagged
+
+def loop_free_energies(loop_lengths):
+    ''' Hairpin loop initiation dG (kcal/mol) of each loop length. '''
+    loop_lengths = np.asarray(loop_lengths, dtype=float)
+    dg = np.interp(loop_lengths, _LOOP_LENGTHS, _LOOP_DG)
+    longer = loop_lengths > _LOOP_LENGTHS[-1]
+    dg[longer] = _LOOP_DG[-1] + 2.44 * 1.9872e-3 * 310.15 * \
+                 np.log(loop_lengths[longer] / _LOOP_LENGTHS[-1])
+    return dg
+
+#===============================================================================
+# Private Helper Methods
+#===============================================================================
+def _score(sequences, temperature, hairpin, partner_sequences=None):
+    '''
+    Yield (dG, paired bases, lengths) arrays for batches of sequences. Base i
+    of the oligo can pair with base j of its partner (the same oligo read
+    3' to 5' unless partner_sequences are provided, or the oligo itself for
+    hairpins) along anti-diagonals i + j. All anti-diagonals of all oligos in
+    a batch are evaluated as one array: stacks of adjacent pairs are scored
+    with nearest-neighbor dG and segmented prefix sums give the dG of every
+    contiguous paired run.
+    '''
+    codes         = _encode(sequences)
+    partner_codes = codes if partner_sequences is None else _encode(partner_sequences)
+    stack_dg      = stack_free_energies(temperature)
+    for first in range(0, len(codes), _CHUNK_SIZE):
+        batch   = codes[first:first + _CHUNK_SIZE]
+        (padded, lengths) = pad_sequences(batch + partner_codes[first:first + _CHUNK_SIZE])
+        (padded, partner, partner_lengths) = (padded[:len(batch)], padded[len(batch):],
+                                              lengths[len(batch):])
+        lengths = lengths[:len(batch)]
+        (num_oligos, width) = padded.shape
+        if width < 2:
+            yield (np.zeros(num_oligos), np.zeros(num_oligos), lengths)
+            continue
+
+        # pairs[n, o, i]: base i pairs with base o - i.
+        diagonals = np.arange(2 * width - 1)[:, np.newaxis]
+        positions = np.arange(width)[np.newaxis, :]
+        partners  = diagonals - positions
+        in_range  = (partners >= 0) & (partners < width)
+        partners  = np.clip(partners, 0, width - 1)
+        top       = padded[:, np.newaxis, :]
+        bottom    = partner[:, partners]
+        pairs     = in_range & (top != N_CODE) & (top ^ 2 == bottom) & \
+                    (partners < partner_lengths[:, np.newaxis, np.newaxis])
+        if hairpin:
+            # The innermost pair of a hairpin stem must close a loop.
+            pairs &= partners - positions - 1 >= MIN_HAIRPIN_LOOP
+
+        # stacks[n, o, i]: pairs (i, o - i) and (i + 1, o - i - 1) stack.
+        stacks   = pairs[:, :, :-1] & pairs[:, :, 1:]
+        bases    = np.where(padded == N_CODE, 0, padded)
+        dg       = np.where(stacks, stack_dg[bases[:, :-1], bases[:, 1:]][:, np.newaxis, :], 0)
+        sums     = np.cumsum(dg, axis=2)
+        run_dg   = sums - _segment_bases(sums, stacks)
+
+        if hairpin:
+            # run_dg[n, o, i] is a stem closed by pair (i + 1, o - i - 1).
+            loops  = diagonals - 2 * positions[:, :-1] - 3
+            run_dg = np.where(stacks, run_dg + loop_free_energies(np.maximum(loops, 1)), np.inf)
+            flat   = run_dg.reshape(num_oligos, -1)
+            where  = flat.argmin(axis=1)
+            best   = flat[np.arange(num_oligos), where]
+            counts = np.cumsum(stacks, axis=2)
+            counts = (counts - _segment_bases(counts, stacks)).reshape(num_oligos, -1)
+            stem   = np.where(best < 0, counts[np.arange(num_oligos), where] + 1, 0)
+            yield (np.minimum(best, 0.0), 2 * stem, lengths)
+        else:
+            best   = run_dg.reshape(num_oligos, -1).min(axis=1)
+            best   = np.where(best < 0, best + _INITIATION_DG, 0.0)
+            paired = pairs.sum(axis=2).max(axis=1)
+            yield (np.minimum(best, 0.0), paired, np.minimum(lengths, partner_lengths))
+
+def _score_pairs(padded, lengths, pairs, temperature):
+    ''' Return the duplex dG and compPercent arrays of pairs of padded codes. '''
+    sequences1 = [padded[i, :lengths[i]] for i in pairs[:, 0]]
+    sequences2 = [padded[j, :lengths[j]] for j in pairs[:, 1]]
+    (dgs, percents) = (list(), list())
+    for (dg, paired, pair_lengths) in _score(sequences1, temperature, False, sequences2):
+        dgs.append(dg)
+        percents.append(100.0 * paired / np.maximum(pair_lengths, 1))
+    return np.concatenate(dgs), np.concatenate(percents)
+
+def _score_shared_pairs(shard):
+    ((padded, lengths, pairs), first, last, temperature) = shard
+    return _score_pairs(padded.get(), lengths.get(), pairs.get()[first:last],
+                        temperature)
+
+def _encode(sequences):
+    return [encode_sequence(s) if isinstance(s, basestring) else s
+            for s in sequences]
+
+def _segment_bases(sums, flags):
+    '''
+    For every position, the prefix sum at the last position where flags is
+    False (0 if there is none), so that sums - bases restarts at every run.
+    '''
+    shape  = sums.shape
+    idx    = np.where(flags, -1, np.arange(shape[-1]))
+    last   = np.maximum.accumulate(idx, axis=-1).reshape(-1, shape[-1])
+    flat   = sums.reshape(-1, shape[-1])
+    rows   = np.arange(len(flat))[:, np.newaxis]
+    bases  = np.where(last >= 0, flat[rows, np.maximum(last, 0)], 0.0)
+    return bases.reshape(shape)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    print self_dimers(["GAATTC", "ACGTACGTACGT", "AAAAAAAA"])
+    print hairpins(["GGGGAAAACCCC", "ACGTTTTTTTTT"])
@@ -4,11 +4,64 @@ from collections import namedtuple
 from redis import StrictRedis
 from suds.client import Client
 
+from src.CircuitBreaker import CircuitBreaker
+from src.SingleFlight import SingleFlight
+from src.utilities.io_utilities import safe_make_dirs
+from src import HOME_DIR
+
+import os
 import sys
+import time
+import random
+import urllib
+import urllib2
+import logging
+import threading
 
 __author__ = 'Scott Powers'
 URL = "http://www.idtdna.com/AnalyzerService/AnalyzerService.asmx?wsdl"
+# Local copy of the WSDL, saved under HOME_DIR (the installed package may be
+# read-only) the first time it is fetched so that clients are built from disk
+# afterwards.
+WSDL_PATH = os.path.join(HOME_DIR, "wsdl", "AnalyzerService.wsdl")
 RETRY_ATTEMPTS = 5
+TIMEOUT = 30        # seconds per attempt
+DEADLINE = 60       # seconds per call, including retries and backoff
+BACKOFF_BASE = 0.5  # seconds before the first retry, doubled for every retry
+BACKOFF_MAX = 8     # maximum seconds between retries
+
+# Shared by every IDTClient so that all threads stop calling IDT while it is
+# failing and calls fail fast instead of waiting for timeouts.
+BREAKER = CircuitBreaker("IDT", failure_rate=0.5, window=20, min_calls=5,
+                         reset_timeout=30)
+
+# Concurrent lookups of the same sequence and conditions share one IDT call,
+# whether made by an IDTClient or by the TmRouter (see tm_key).
+TM_FLIGHTS = SingleFlight("IDT Analyze")
+DIMER_FLIGHTS = SingleFlight("IDT SelfDimer")
+
+_LOCK = threading.Lock()
+
+def get_wsdl_url():
+    """Return the URL of the local WSDL, saving the remote WSDL if there is none."""
+    if not os.path.isfile(WSDL_PATH):
+        try:
+            wsdl = urllib2.urlopen(URL, timeout=TIMEOUT).read()
+            safe_make_dirs(os.path.dirname(WSDL_PATH))
+            tmp_path = "%s.%d" % (WSDL_PATH, os.getpid())
+            with open(tmp_path, 'w') as f:
+                f.write(wsdl)
+            os.rename(tmp_path, WSDL_PATH)
+        except:
+            logging.warning("Unable to save the IDT WSDL: %s" % str(sys.exc_info()[1]))
+            return URL
+    return "file:" + urllib.pathname2url(WSDL_PATH)
+
+
+def tm_key(sequence, seq_type='DNA', oligo=2, na=40, mg=2, dntp=0.2):
+    """Return the TM_FLIGHTS key of a melting temperature lookup."""
+    return (sequence.upper(), seq_type, float(oligo), float(na), float(mg), float(dntp))
+
 
 class OligoTemp(namedtuple('oligoTemp', 'min max tm')):
     pass
@@ -19,38 +72,86 @@ class DimerResult(namedtuple('dimerResult', 'self_dimer deltaG compPercent')):
 
 
 class IDTClient(object):
+    _INSTANCE = None
+
     def __init__(self, seq_type='DNA'):
-        self.client = Client(URL, timeout=30)
+        self._client = None
+        self._local = threading.local()
         self.seq_type = seq_type
 
+    @classmethod
+    def Instance(cls):
+        """Return the IDTClient shared by the process."""
+        with _LOCK:
+            if not cls._INSTANCE:
+                cls._INSTANCE = IDTClient()
+        return cls._INSTANCE
+
+    @property
+    def client(self):
+        """The SOAP client of the calling thread, built on first use rather than at import.
+
+        Each thread gets its own clone of one client (clones share the parsed
+        WSDL), so the timeout set for one call never applies to another
+        thread's call.
+        """
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            if self._client is None:
+                with _LOCK:
+                    if self._client is None:
+                        self._client = Client(get_wsdl_url(), timeout=TIMEOUT)
+            client = self._local.client = self._client.clone()
+        return client
+
     def get_melting_temp(self, sequence, oligo=2, na=40, mg=2, dntp=0.2):
         """Get the melting temperature for sequence.
           \param oligo is the concentration of the oligo in uM
         """
+        return TM_FLIGHTS.call(tm_key(sequence, self.seq_type, oligo, na, mg, dntp),
+                               self._analyze, sequence, oligo, na, mg, dntp)
+
+    def self_dimer_check(self, sequence):
+        """Check the oligo to see if there is a self dimer issue"""
+        return DIMER_FLIGHTS.call(sequence.upper(), self._self_dimer, sequence)
+
+    def hetero_dimer_check(self, sequence1, sequence2):
+        raise NotImplemented
+
+    def _analyze(self, sequence, oligo, na, mg, dntp):
+        deadline = time.time() + DEADLINE
         i = 0
         while True:
-            try: 
+            remaining = deadline - time.time()
+            if remaining <= 0 or not BREAKER.allow():
+                return OligoTemp(-1, -1, -1)
+            try:
+                self.client.set_options(timeout=min(TIMEOUT, max(remaining, 1)))
                 result = self.client.service.Analyze(sequence.upper(), self.seq_type, oligo, na, mg, dntp)
-                break;
+                BREAKER.record_success()
+                break
             except:
+                BREAKER.record_failure()
                 i += 1
-                if i > RETRY_ATTEMPTS: 
+                if i > RETRY_ATTEMPTS:
+                    return OligoTemp(-1, -1, -1)
+                # Full jitter keeps clients that failed together from
+                # retrying together.
+                backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (i - 1)))
+                if backoff >= deadline - time.time():
                     return OligoTemp(-1, -1, -1)
-      
+                time.sleep(backoff)
+
         #log this.... result
         if not result['Errors']:
             return OligoTemp(result['MinMeltTemp'], result['MaxMeltTemp'], result['MeltTemp'])
         else:
             return OligoTemp(-1, -1, -1)
 
-    def self_dimer_check(self, sequence):
-        """Check the oligo to see if there is a self dimer issue"""
-        result = self.client.service.SelfDimer(sequence)
+    def _self_dimer(self, sequence):
+        result = BREAKER.call(lambda: self.client.service.SelfDimer(sequence))
         return DimerResult(result['IsComplementPair'], result['MaxDeltaG'], result['ComplementarityPercent'])
 
-    def hetero_dimer_check(self, sequence1, sequence2):
-        raise NotImplemented
-
 
 class CachedIDTClient(IDTClient):
     def __init__(self, REDIS_HOST='localhost', REDIS_PORT=6379, REDIS_DB=0):
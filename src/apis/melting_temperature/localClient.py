@@ -0,0 +1,102 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 15, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import numpy as np
+
+from src.apis.melting_temperature.idtClient import OligoTemp
+from src.apis.melting_temperature.nearest_neighbor import \
+    sequence_melting_temperatures
+from src.apis.melting_temperature.dimers import self_dimers, hairpins, \
+    hetero_dimers
+
+#===============================================================================
+# Class
+#===============================================================================
+class LocalClient(object):
+    '''
+    Drop-in replacement for IDTClient computing melting temperatures and
+    secondary structures locally with nearest-neighbor thermodynamics. Single
+    sequence methods return the same OligoTemp/DimerResult tuples as
+    IDTClient, and batch variants score many oligos in one vectorized call.
+    '''
+    def __init__(self, seq_type='DNA'):
+        if seq_type != 'DNA':
+            raise Exception("LocalClient only supports DNA but found: %s" % seq_type)
+        self.seq_type = seq_type
+
+    def get_melting_temp(self, sequence, oligo=2, na=40, mg=2, dntp=0.2):
+        """Get the melting temperature for sequence.
+          \param oligo is the concentration of the oligo in uM
+        """
+        return self.get_melting_temps([sequence], oligo, na, mg, dntp)[0]
+
+    def get_melting_temps(self, sequences, oligo=2, na=40, mg=2, dntp=0.2):
+        """Get the melting temperatures of many sequences at once."""
+        tms = sequence_melting_temperatures([s.upper() for s in sequences],
+                                            oligo, na, mg, dntp)
+        results = list()
+        for tm in tms:
+            if np.isnan(tm):
+                results.append(OligoTemp(-1, -1, -1))
+            else:
+                tm = round(float(tm), 1)
+                results.append(OligoTemp(tm, tm, tm))
+        return results
+
+    def self_dimer_check(self, sequence):
+        """Check the oligo to see if there is a self dimer issue"""
+        return self.self_dimer_checks([sequence])[0]
+
+    def self_dimer_checks(self, sequences):
+        """Check many oligos for self dimers at once."""
+        return self_dimers([s.upper() for s in sequences])
+
+    def hairpin_check(self, sequence):
+        """Check the oligo to see if there is a hairpin issue"""
+        return self.hairpin_checks([sequence])[0]
+
+    def hairpin_checks(self, sequences):
+        """Check many oligos for hairpins at once."""
+        return hairpins([s.upper() for s in sequences])
+
+    def hetero_dimer_check(self, sequence1, sequence2):
+        """Check the two oligos to see if there is a hetero dimer issue"""
+        return self.hetero_dimer_checks([sequence1], [sequence2])[0]
+
+    def hetero_dimer_checks(self, sequences1, sequences2):
+        """Check many pairs of oligos for hetero dimers at once."""
+        return hetero_dimers([s.upper() for s in sequences1],
+                             [s.upper() for s in sequences2])
+
+    def get_info(self, sequence, oligo=2, na=40, mg=2, dntp=0.2):
+        """Same fields as CachedIDTClient.get_info, computed locally."""
+        tm    = self.get_melting_temp(sequence, oligo, na, mg, dntp)
+        dimer = self.self_dimer_check(sequence)
+        return {'tm': tm.tm, 'dimer': dimer.self_dimer, 'compPercent': dimer.compPercent}
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    client = LocalClient()
+    print client.get_melting_temp("CCAGAAGG")
+    print client.self_dimer_check("ACGTACGTACGT")
+    print client.hairpin_check("GGGGAAAACCCC")
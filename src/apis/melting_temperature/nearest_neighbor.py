@@ -0,0 +1,269 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 14, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import numpy as np
+
+from src.utilities.bio_utilities import T_CODE, C_CODE, A_CODE, G_CODE, \
+    N_CODE, encode_sequence, pad_sequences
+
+#===============================================================================
+# Public Global Variables
+#===============================================================================
+# Default conditions match those of IDTClient.get_melting_temp: oligo in uM,
+# Na+, Mg2+ and dNTPs in mM.
+DEFAULT_OLIGO = 2
+DEFAULT_NA    = 40
+DEFAULT_MG    = 2
+DEFAULT_DNTP  = 0.2
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_R      = 1.9872    # Gas constant (cal/K/mol)
+_KELVIN = 273.15
+
+# SantaLucia (1998) unified nearest-neighbor parameters, dH in kcal/mol and
+# dS in cal/K/mol, indexed by [code of 5' base, code of 3' base].
+_NN_PARAMS = {
+              "AA": (-7.9, -22.2), "TT": (-7.9, -22.2),
+              "AT": (-7.2, -20.4),
+              "TA": (-7.2, -21.3),
+              "CA": (-8.5, -22.7), "TG": (-8.5, -22.7),
+              "GT": (-8.4, -22.4), "AC": (-8.4, -22.4),
+              "CT": (-7.8, -21.0), "AG": (-7.8, -21.0),
+              "GA": (-8.2, -22.2), "TC": (-8.2, -22.2),
+              "CG": (-10.6, -27.2),
+              "GC": (-9.8, -24.4),
+              "GG": (-8.0, -19.9), "CC": (-8.0, -19.9),
+             }
+_CODES    = {"T": T_CODE, "C": C_CODE, "A": A_CODE, "G": G_CODE}
+_STACK_DH = np.zeros((4, 4))
+_STACK_DS = np.zeros((4, 4))
+for _pair, (_dh, _ds) in _NN_PARAMS.items():
+    _STACK_DH[_CODES[_pair[0]], _CODES[_pair[1]]] = _dh
+    _STACK_DS[_CODES[_pair[0]], _CODES[_pair[1]]] = _ds
+
+# Initiation, per terminal base pair.
+_TERMINAL_DH = np.zeros(4)
+_TERMINAL_DS = np.zeros(4)
+_TERMINAL_DH[[A_CODE, T_CODE]] = 2.3
+_TERMINAL_DS[[A_CODE, T_CODE]] = 4.1
+_TERMINAL_DH[[C_CODE, G_CODE]] = 0.1
+_TERMINAL_DS[[C_CODE, G_CODE]] = -2.8
+
+#===============================================================================
+# Utility Methods
+#===============================================================================
+def stack_free_energies(temperature=37.0):
+    '''
+    Return the 4x4 table of Watson-Crick stack dG (kcal/mol) at temperature
+    (Celsius), indexed by [code of 5' base, code of 3' base] of the top strand.
+    '''
+    return _STACK_DH - (temperature + _KELVIN) * _STACK_DS / 1000.0
+
+def window_thermodynamics(codes, length):
+    '''
+    Return the duplex dH (kcal/mol), dS (cal/K/mol) and GC count of every
+    window of the given length in an array of base codes, computed from prefix
+    sums of the nearest-neighbor stacks so that the cost does not depend on
+    the window length. Windows containing an N get NaN values.
+    '''
+    return _window_sums(_prefix_sums(codes), length)
+
+def sequence_thermodynamics(sequences):
+    '''
+    Return the duplex dH, dS, GC count and length of each sequence (strings or
+    arrays of base codes) as arrays. Sequences containing an N get NaN values.
+    '''
+    codes = [encode_sequence(s) if isinstance(s, basestring) else s
+             for s in sequences]
+    (padded, lengths) = pad_sequences(codes)
+    if padded.shape[1] < 2:
+        nan = np.empty(len(codes))
+        nan.fill(np.nan)
+        return nan, nan.copy(), np.zeros(len(codes), dtype=np.int64), lengths
+
+    rows    = np.arange(len(codes))
+    in_seq  = np.arange(padded.shape[1]) < lengths[:, np.newaxis]
+    is_n    = (padded == N_CODE) & in_seq
+    bases   = np.where(in_seq & ~is_n, padded, 0)
+    stacked = in_seq[:, 1:]
+    dh = np.where(stacked, _STACK_DH[bases[:, :-1], bases[:, 1:]], 0).sum(axis=1)
+    ds = np.where(stacked, _STACK_DS[bases[:, :-1], bases[:, 1:]], 0).sum(axis=1)
+
+    last = np.maximum(lengths - 1, 0)
+    dh  += _TERMINAL_DH[bases[:, 0]] + _TERMINAL_DH[bases[rows, last]]
+    ds  += _TERMINAL_DS[bases[:, 0]] + _TERMINAL_DS[bases[rows, last]]
+
+    invalid = is_n.any(axis=1) | (lengths < 2)
+    dh[invalid] = np.nan
+    ds[invalid] = np.nan
+    gc = (((bases == C_CODE) | (bases == G_CODE)) & in_seq).sum(axis=1)
+    return dh, ds, gc, lengths
+
+def salt_corrections(oligo=DEFAULT_OLIGO, na=DEFAULT_NA, mg=DEFAULT_MG,
+                     dntp=DEFAULT_DNTP):
+    '''
+    Precompute the concentration and cation corrections of a set of
+    conditions (scalars or arrays that broadcast together) as a
+    (num_conditions, 4) table. Each row holds R ln(Ct) and the coefficients
+    A, B and C of 1/Tm = 1/Tm(1 M Na+) + A + B * fGC + C / (2 * (N - 1)),
+    from Owczarzy et al. (2004) for monovalent ions or Owczarzy et al. (2008)
+    when Mg2+ dominates (free Mg2+ is Mg2+ less dNTPs, which chelate it).
+    '''
+    (oligo, na, mg, dntp) = np.broadcast_arrays(*[np.atleast_1d(np.asarray(x, dtype=float))
+                                                  for x in (oligo, na, mg, dntp)])
+    na_molar = na.ravel() / 1000.0
+    mg_molar = np.maximum(mg - dntp, 0).ravel() / 1000.0
+    if ((na_molar <= 0) & (mg_molar <= 0)).any():
+        raise Exception("At least one of Na+ and Mg2+ must be provided.")
+
+    # Both regimes are evaluated for every condition, so the logarithm of a
+    # zero concentration in the regime that is not selected is harmless.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_na = np.log(na_molar)
+        log_mg = np.log(mg_molar)
+        ratio  = np.sqrt(mg_molar) / na_molar
+        monovalent = (mg_molar <= 0) | ((na_molar > 0) & (ratio < 0.22))
+        mixed      = ~monovalent & (na_molar > 0) & (ratio < 6.0)
+
+        b = -9.11e-6
+        c = 6.26e-5
+        e = -4.82e-4
+        f = 5.25e-4
+        a = np.where(mixed, 3.92e-5 * (0.843 - 0.352 * np.sqrt(na_molar) * log_na),
+                     3.92e-5)
+        d = np.where(mixed, 1.42e-5 * (1.279 - 4.03e-3 * log_na - 8.03e-3 * log_na ** 2),
+                     1.42e-5)
+        g = np.where(mixed, 8.31e-5 * (0.486 - 0.258 * log_na + 5.25e-3 * log_na ** 3),
+                     8.31e-5)
+        corrections = np.column_stack((
+            _R * np.log(oligo.ravel() * 1e-6),
+            np.where(monovalent, -3.95e-5 * log_na + 9.40e-6 * log_na ** 2,
+                     a + b * log_mg),
+            np.where(monovalent, 4.29e-5 * log_na, c + d * log_mg),
+            np.where(monovalent, 0.0, e + f * log_mg + g * log_mg ** 2)))
+    return corrections
+
+def condition_grid(oligos, nas, mgs, dntps):
+    ''' Every combination of the provided condition lists, as four arrays. '''
+    return [a.ravel() for a in np.meshgrid(oligos, nas, mgs, dntps, indexing='ij')]
+
+def melting_temperature_grid(dh, ds, gc_count, length, corrections):
+    '''
+    Convert duplex thermodynamics into melting temperatures (Celsius) under
+    every condition of a salt_corrections table, in one broadcast pass. The
+    result has the shape of the (broadcast) inputs plus a trailing axis of
+    conditions. The two-state Tm is that of a non self-complementary duplex
+    with the oligo in excess over its target, which is the convention of the
+    IDT OligoAnalyzer.
+    '''
+    dh       = np.asarray(dh, dtype=float)[..., np.newaxis]
+    ds       = np.asarray(ds, dtype=float)[..., np.newaxis]
+    length   = np.asarray(length, dtype=float)[..., np.newaxis]
+    fraction = np.asarray(gc_count, dtype=float)[..., np.newaxis] / length
+
+    (log_ct, a, b, c) = corrections.T
+    tm_inverse = (ds + log_ct) / (dh * 1000.0) + a + b * fraction + \
+                 c / (2.0 * (length - 1))
+    return 1.0 / tm_inverse - _KELVIN
+
+def melting_temperature(dh, ds, gc_count, length, oligo=DEFAULT_OLIGO,
+                        na=DEFAULT_NA, mg=DEFAULT_MG, dntp=DEFAULT_DNTP):
+    '''
+    Convert duplex thermodynamics into melting temperatures (Celsius) under a
+    single condition. Arguments may be scalars or arrays that broadcast
+    together. See salt_corrections for the cation corrections.
+    '''
+    corrections = salt_corrections(oligo, na, mg, dntp)
+    if len(corrections) != 1:
+        raise Exception("melting_temperature takes a single condition, use " \
+                        "melting_temperature_grid for several.")
+    return melting_temperature_grid(dh, ds, gc_count, length, corrections)[..., 0]
+
+def sequence_melting_temperatures(sequences, oligo=DEFAULT_OLIGO, na=DEFAULT_NA,
+                                  mg=DEFAULT_MG, dntp=DEFAULT_DNTP):
+    ''' Melting temperature (Celsius) of each sequence, NaN if it has an N. '''
+    (dh, ds, gc, lengths) = sequence_thermodynamics(sequences)
+    return melting_temperature(dh, ds, gc, lengths, oligo, na, mg, dntp)
+
+def melting_temperature_profile(codes, lengths, oligo=DEFAULT_OLIGO,
+                                na=DEFAULT_NA, mg=DEFAULT_MG, dntp=DEFAULT_DNTP):
+    '''
+    Return a (len(lengths), len(codes)) array whose [i, p] entry is the
+    melting temperature of the window of length lengths[i] starting at
+    position p of codes. Entries for windows running past the end of codes or
+    containing an N are NaN. Prefix sums are computed once and differenced
+    for every length, so the cost is linear in len(codes) per length.
+    '''
+    sums    = _prefix_sums(codes)
+    profile = np.empty((len(lengths), len(codes)))
+    profile.fill(np.nan)
+    for i, length in enumerate(lengths):
+        (dh, ds, gc_count) = _window_sums(sums, length)
+        if len(dh) > 0:
+            profile[i, :len(dh)] = melting_temperature(dh, ds, gc_count, length,
+                                                       oligo, na, mg, dntp)
+    return profile
+
+#===============================================================================
+# Private Helper Methods
+#===============================================================================
+def _prefix_sums(codes):
+    '''
+    Base codes with N replaced by T, and prefix sums of stack dH, stack dS, GC
+    count and N count of an array of base codes.
+    '''
+    is_n    = codes == N_CODE
+    bases   = np.where(is_n, 0, codes)
+    first   = bases[:-1]
+    second  = bases[1:]
+    dh_sums = np.concatenate(([0.0], np.cumsum(_STACK_DH[first, second])))
+    ds_sums = np.concatenate(([0.0], np.cumsum(_STACK_DS[first, second])))
+    gc_sums = np.concatenate(([0], np.cumsum((bases == C_CODE) | (bases == G_CODE))))
+    n_sums  = np.concatenate(([0], np.cumsum(is_n)))
+    return bases, dh_sums, ds_sums, gc_sums, n_sums
+
+def _window_sums(sums, length):
+    ''' Difference prefix sums into the dH, dS and GC count of every window. '''
+    (bases, dh_sums, ds_sums, gc_sums, n_sums) = sums
+    num_windows = len(bases) - length + 1
+    if num_windows < 1 or length < 2:
+        empty = np.zeros(0)
+        return empty, empty.copy(), np.zeros(0, dtype=np.int64)
+
+    starts = np.arange(num_windows)
+    ends   = starts + length
+    dh = dh_sums[ends - 1] - dh_sums[starts] + \
+         _TERMINAL_DH[bases[starts]] + _TERMINAL_DH[bases[ends - 1]]
+    ds = ds_sums[ends - 1] - ds_sums[starts] + \
+         _TERMINAL_DS[bases[starts]] + _TERMINAL_DS[bases[ends - 1]]
+
+    has_n = n_sums[ends] != n_sums[starts]
+    dh[has_n] = np.nan
+    ds[has_n] = np.nan
+    return dh, ds, gc_sums[ends] - gc_sums[starts]
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    print sequence_melting_temperatures(["CCAGAAGG", "AGATTTCGCT"])
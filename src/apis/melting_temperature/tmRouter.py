@@ -0,0 +1,225 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 24, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import sys
+import time
+import logging
+import threading
+
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from tornado import gen
+
+from src.DbConnector import DbConnector, UpdateOne
+from src.AsyncRunner import AsyncRunner
+from src.apis.ApiConstants import ID, SEQUENCE, TM_SOURCES
+from src.apis.melting_temperature.asyncIdtClient import AsyncIDTClient
+from src.apis.melting_temperature.idtClient import OligoTemp, TM_FLIGHTS, \
+    tm_key
+from src.apis.melting_temperature.localClient import LocalClient
+from src import TM_CACHE_COLLECTION, TM_LATENCY_BUDGET, IDT_MAX_CLIENTS, \
+    IDT_MAX_PENDING
+
+#===============================================================================
+# Classes
+#===============================================================================
+class TmResult(namedtuple('tmResult', 'tm source')):
+    pass
+
+class TmRouter(object):
+    '''
+    This class is intended to be a singleton. It answers melting temperature
+    requests within a latency budget. Sequences are first looked up in
+    TM_CACHE_COLLECTION, the rest are sent to IDT concurrently by an
+    AsyncIDTClient running on the AsyncRunner IOLoop and every sequence IDT
+    has not answered by the deadline is computed with the local nearest-neighbor
+    engine. IDT answers arriving after the deadline are still cached for
+    later requests, written in batches by a background thread so that the
+    IOLoop never waits on the database. Concurrent requests for the same sequence and conditions
+    share a single IDT call (see TM_FLIGHTS). Each result is tagged with its
+    source (see TM_SOURCES).
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._db_connector = DbConnector.Instance()
+        self._local_client = LocalClient()
+        self._idt_client   = None
+        self._pid          = None
+        self._num_pending  = 0
+        self._cache_pool   = None
+        self._to_cache     = list()
+        self._lock         = threading.Lock()
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = TmRouter()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def start(self):
+        ''' Ensure the melting temperature cache is indexed. '''
+        self._db_connector.ensure_index(TM_CACHE_COLLECTION, SEQUENCE)
+
+    def get_melting_temps(self, sequences, oligo=2, na=40, mg=2, dntp=0.2,
+                          budget=TM_LATENCY_BUDGET, progress=None):
+        '''
+        Return a TmResult for each sequence, waiting at most budget seconds
+        for IDT. If provided, progress is called with the number of IDT
+        requests completed and the number of IDT requests.
+        '''
+        deadline   = time.time() + budget
+        sequences  = [s.upper() for s in sequences]
+        unique     = sorted(set(sequences))
+        conditions = {"oligo": float(oligo), "na": float(na), "mg": float(mg),
+                      "dntp": float(dntp)}
+        results    = self._get_cached(unique, conditions)
+
+        pending = list()
+        for sequence in unique:
+            if sequence not in results:
+                flight = self._submit(sequence, conditions)
+                if flight is not None:
+                    pending.append((sequence, flight))
+        for i, (sequence, flight) in enumerate(pending):
+            if flight.wait(max(deadline - time.time(), 0)):
+                tm = flight.result().tm
+                if tm >= 0:
+                    results[sequence] = TmResult(tm, TM_SOURCES.idt)  # @UndefinedVariable
+            if progress:
+                progress(i + 1, len(pending))
+
+        missing = [s for s in unique if s not in results]
+        if missing:
+            logging.info("Computing %d of %d melting temperatures locally." %
+                         (len(missing), len(unique)))
+            melting_temps = self._local_client.get_melting_temps(missing, **conditions)
+            for sequence, melting_temp in zip(missing, melting_temps):
+                results[sequence] = TmResult(melting_temp.tm, TM_SOURCES.local)  # @UndefinedVariable
+        return [results[s] for s in sequences]
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _get_cached(self, sequences, conditions):
+        ''' Return a dictionary mapping cached sequences to their TmResult. '''
+        criteria = dict(conditions)
+        criteria[SEQUENCE] = {"$in": sequences}
+        try:
+            records = self._db_connector.find(TM_CACHE_COLLECTION, criteria,
+                                              {ID: 0, SEQUENCE: 1, "tm": 1})
+        except:
+            logging.warning("Unable to read melting temperature cache: %s" %
+                            str(sys.exc_info()[1]))
+            records = list()
+        return dict((r[SEQUENCE], TmResult(r["tm"], TM_SOURCES.cache))  # @UndefinedVariable
+                    for r in records)
+
+    def _submit(self, sequence, conditions):
+        '''
+        Return the Flight of the IDT request for sequence, queueing one unless
+        an identical request is already in flight, or None when too many
+        requests are already waiting on IDT.
+        '''
+        io_loop = AsyncRunner.Instance().io_loop
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked process (e.g. a job worker) has its own IOLoop.
+                self._idt_client  = AsyncIDTClient(io_loop,
+                                                   max_clients=IDT_MAX_CLIENTS)
+                self._cache_pool  = ThreadPool(1)
+                self._to_cache    = list()
+                self._pid         = os.getpid()
+                self._num_pending = 0
+            key = tm_key(sequence, self._idt_client.seq_type, **conditions)
+            (flight, leader) = TM_FLIGHTS.join(key)
+            if leader:
+                if self._num_pending >= IDT_MAX_PENDING:
+                    TM_FLIGHTS.finish(key, OligoTemp(-1, -1, -1))
+                    return None
+                self._num_pending += 1
+        if leader:
+            io_loop.add_callback(self._get_idt_melting_temp, sequence,
+                                 conditions, key)
+        return flight
+
+    @gen.coroutine
+    def _get_idt_melting_temp(self, sequence, conditions, key):
+        '''
+        Provide the IDT melting temperature of sequence to every caller
+        waiting on its flight, then queue it to be cached. Other processes
+        share the result through the cache.
+        '''
+        melting_temp = OligoTemp(-1, -1, -1)
+        try:
+            melting_temp = yield self._idt_client.get_melting_temp(sequence, **conditions)
+        except:
+            logging.warning("IDT melting temperature of %s failed: %s" %
+                            (sequence, str(sys.exc_info()[1])))
+        finally:
+            with self._lock:
+                self._num_pending -= 1
+
+        TM_FLIGHTS.finish(key, melting_temp)
+        if melting_temp.tm >= 0:
+            record = dict(conditions)
+            record[SEQUENCE] = sequence
+            with self._lock:
+                self._to_cache.append(UpdateOne(record, 
+                                                {"$set": {"tm": melting_temp.tm}},
+                                                upsert=True))
+                # A flush is already queued unless this is the first record.
+                if len(self._to_cache) == 1:
+                    self._cache_pool.apply_async(self._flush_cache)
+
+    def _flush_cache(self):
+        '''
+        Write every melting temperature queued since the last flush to the
+        cache in a single bulk write. Runs on the cache thread.
+        '''
+        with self._lock:
+            (requests, self._to_cache) = (self._to_cache, list())
+        try:
+            result = self._db_connector.bulk_write(TM_CACHE_COLLECTION, requests,
+                                                   ordered=False)
+            if not result.ok:
+                logging.warning("Unable to cache %d melting temperature(s): %s" %
+                                (len(result.write_errors), result))
+        except:
+            logging.warning("Unable to cache %d melting temperature(s): %s" %
+                            (len(requests), str(sys.exc_info()[1])))
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    router = TmRouter.Instance()
+    print router.get_melting_temps(["CCAGAAGG", "AGATTTCGCT"], budget=1.0)
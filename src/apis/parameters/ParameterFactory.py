@@ -94,6 +94,12 @@ class ParameterFactory(object):
                                         param_type=param_type, required=required,
                                         allow_multiple=allow_multiple)
 
+    @classmethod
+    def string(cls, name, description, required=False, default=None):
+        """ Create a parameter instance for specifying a case sensitive string. """
+        return CaseSensitiveStringParameter(name, description, required=required,
+                                            allow_multiple=False, default=default)
+
     @classmethod
     def boolean(cls, name, description, default_value=True):
         """ Create a parameter instance for setting a flag to True or False."""
@@ -108,6 +114,33 @@ class ParameterFactory(object):
                                 minimum=minimum, maximum=maximum,
                                 equality=EQUALITY.less_than_or_equal_to)  # @UndefinedVariable
 
+    @classmethod
+    def integers(cls, name, description, required=False, default=None,
+                 minimum=None, maximum=None):
+        """ Create a parameter instance for specifying comma separated integers. """
+        return IntegerParameter(name, description, required=required,
+                                allow_multiple=True, default=default,
+                                minimum=minimum, maximum=maximum,
+                                equality=EQUALITY.less_than_or_equal_to)  # @UndefinedVariable
+
+    @classmethod
+    def float(cls, name, description, required=False, default=None,
+              minimum=None, maximum=None):
+        """ Create a parameter instance for specifying a float. """
+        return FloatParameter(name, description, required=required,
+                              allow_multiple=False, default=default,
+                              minimum=minimum, maximum=maximum,
+                              equality=EQUALITY.less_than_or_equal_to)  # @UndefinedVariable
+
+    @classmethod
+    def floats(cls, name, description, required=False, default=None,
+               minimum=None, maximum=None):
+        """ Create a parameter instance for specifying comma separated floats. """
+        return FloatParameter(name, description, required=required,
+                              allow_multiple=True, default=default,
+                              minimum=minimum, maximum=maximum,
+                              equality=EQUALITY.less_than_or_equal_to)  # @UndefinedVariable
+
     @classmethod
     def file(cls, description):
         """ Create a parameter instance for uploading a file."""
@@ -0,0 +1,188 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 14, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+import numpy as np
+
+from numpy.lib.stride_tricks import as_strided
+
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import ID, UUID, FILEPATH, TOMBSTONE
+from src.apis.melting_temperature.nearest_neighbor import \
+    window_thermodynamics, melting_temperature
+from src.utilities.bio_utilities import TwoBitFile, get_twobit_path, \
+    decode_sequences
+from src import TARGETS_COLLECTION
+
+#=============================================================================
+# Private Global Variables
+#=============================================================================
+_MAX_LENGTH = 100   # Longest candidate, bounding the window lengths tiled
+
+#=============================================================================
+# Class
+#=============================================================================
+class CandidatesFunction(AbstractGetFunction):
+
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================
+    @staticmethod
+    def name():
+        return "Candidates"
+
+    @staticmethod
+    def summary():
+        return "Tile a targets file into probe candidates."
+
+    @staticmethod
+    def notes():
+        return "Every window of every record of the targets file, for each " \
+               "length between min_length and max_length (at most %d) and " \
+               "every step bases, is kept if its GC content (percent) and " \
+               "nearest-neighbor melting temperature fall within the " \
+               "provided ranges. Candidates are streamed ordered by record, " \
+               "start and length." % _MAX_LENGTH
+
+    @staticmethod
+    def supports_streaming():
+        return True
+
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.uuid(allow_multiple=False),
+                      ParameterFactory.integer("min_length", "Minimum probe length.",
+                                               default=20, minimum=2,
+                                               maximum=_MAX_LENGTH),
+                      ParameterFactory.integer("max_length", "Maximum probe length.",
+                                               default=30, minimum=2,
+                                               maximum=_MAX_LENGTH),
+                      ParameterFactory.integer("step", "Distance between candidate starts.",
+                                               default=1, minimum=1),
+                      ParameterFactory.float("min_gc", "Minimum GC content (percent).",
+                                             default=40.0),
+                      ParameterFactory.float("max_gc", "Maximum GC content (percent).",
+                                             default=60.0),
+                      ParameterFactory.float("min_tm", "Minimum melting temperature.",
+                                             default=55.0),
+                      ParameterFactory.float("max_tm", "Maximum melting temperature.",
+                                             default=65.0),
+                     ]
+        return parameters
+
+    @classmethod
+    def process_request(cls, params_dict):
+        parameters = cls.parameters()
+        values     = dict()
+        for parameter in parameters[1:]:
+            # Values outside a parameter's range are dropped when parsed.
+            if parameter not in params_dict:
+                raise Exception("Missing or out of range parameter: %s." %
+                                parameter.name)
+            values[parameter.name] = params_dict[parameter][0]
+        if values["min_length"] > values["max_length"]:
+            raise Exception("min_length (%d) must not exceed max_length (%d)." %
+                            (values["min_length"], values["max_length"]))
+
+        criteria = {UUID: values[UUID], TOMBSTONE: {"$exists": False}}
+        targets  = cls._DB_CONNECTOR.find(TARGETS_COLLECTION, criteria,
+                                          {ID: 0, FILEPATH: 1})
+        columns  = ["Target", "Start", "Length", "Sequence", "GC", "Tm"]
+        if len(targets) < 1:
+            return ([], columns, None)
+
+        twobit_file = TwoBitFile(get_twobit_path(targets[0][FILEPATH]))
+        return (cls._generate_candidates(twobit_file, values), columns, None)
+
+    #===========================================================================
+    # Helper Methods
+    #===========================================================================
+    @classmethod
+    def _generate_candidates(cls, twobit_file, values):
+        ''' Yield the candidates of each record of twobit_file. '''
+        for record_name in twobit_file.names:
+            codes = twobit_file.get_codes(record_name)
+            (starts, lengths, gcs, tms) = cls.tile(codes, values)
+            if len(starts) < 1:
+                continue
+
+            # View every window of the longest length and decode survivors
+            # all at once.
+            max_length = values["max_length"]
+            padded     = np.concatenate((codes, np.zeros(max_length, dtype=codes.dtype)))
+            windows    = as_strided(padded, shape=(len(codes), max_length),
+                                    strides=(padded.strides[0], padded.strides[0]))
+            sequences  = decode_sequences(windows[starts])
+            for i in range(len(starts)):
+                yield {"Target": record_name,
+                       "Start": int(starts[i]),
+                       "Length": int(lengths[i]),
+                       "Sequence": sequences[i][:lengths[i]],
+                       "GC": round(float(gcs[i]), 1),
+                       "Tm": round(float(tms[i]), 1)}
+
+    @staticmethod
+    def tile(codes, values):
+        '''
+        Return the start, length, GC percent and Tm of every window of codes
+        passing the filters in values. Thermodynamics of all windows of a
+        length are computed at once from prefix sums.
+        '''
+        starts  = list()
+        lengths = list()
+        gcs     = list()
+        tms     = list()
+        for length in range(values["min_length"], values["max_length"] + 1):
+            (dh, ds, gc_count) = window_thermodynamics(codes, length)
+            dh       = dh[::values["step"]]
+            ds       = ds[::values["step"]]
+            gc       = 100.0 * gc_count[::values["step"]] / length
+            selected = np.flatnonzero((gc >= values["min_gc"]) &
+                                      (gc <= values["max_gc"]) &
+                                      ~np.isnan(dh))
+            tm       = melting_temperature(dh[selected], ds[selected],
+                                           gc_count[::values["step"]][selected],
+                                           length)
+            passed   = (tm >= values["min_tm"]) & (tm <= values["max_tm"])
+            starts.append(selected[passed] * values["step"])
+            lengths.append(np.repeat(length, passed.sum()))
+            gcs.append(gc[selected[passed]])
+            tms.append(tm[passed])
+
+        if not starts:
+            empty = np.zeros(0)
+            return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+
+        starts  = np.concatenate(starts)
+        lengths = np.concatenate(lengths)
+        order   = np.lexsort((lengths, starts))
+        return (starts[order], lengths[order], np.concatenate(gcs)[order],
+                np.concatenate(tms)[order])
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = CandidatesFunction()
+    print function
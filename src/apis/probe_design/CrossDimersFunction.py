@@ -0,0 +1,100 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 14, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.melting_temperature.dimers import SELF_DIMER_THRESHOLD, \
+    MAX_CROSS_DIMER_THRESHOLD, screen_cross_dimers
+from src.ComputeExecutor import ComputeExecutor
+
+#=============================================================================
+# Class
+#=============================================================================
+class CrossDimersFunction(AbstractGetFunction):
+
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================
+    @staticmethod
+    def name():
+        return "CrossDimers"
+
+    @staticmethod
+    def summary():
+        return "Screen a probe panel for hetero-dimers."
+
+    @staticmethod
+    def notes():
+        return "Every pair of probes is checked for a duplex at least as " \
+               "stable as threshold (kcal/mol at 37C). Only pairs sharing a " \
+               "complementary seed long enough to reach threshold are " \
+               "scored, so no flagged pair is missed. Flagged pairs are " \
+               "returned ordered by deltaG. Threshold must be at most " \
+               "%.1f." % MAX_CROSS_DIMER_THRESHOLD
+
+    @staticmethod
+    def supports_jobs():
+        return True
+
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.probes(required=True),
+                      ParameterFactory.float("threshold", "Flag pairs with a deltaG at or below this value.",
+                                             default=SELF_DIMER_THRESHOLD,
+                                             maximum=MAX_CROSS_DIMER_THRESHOLD),
+                     ]
+        return parameters
+
+    @classmethod
+    def process_request(cls, params_dict):
+        probes          = params_dict[ParameterFactory.probes(required=True)]
+        threshold_param = ParameterFactory.float("threshold", "Flag pairs with a deltaG at or below this value.",
+                                                 default=SELF_DIMER_THRESHOLD,
+                                                 maximum=MAX_CROSS_DIMER_THRESHOLD)
+        # Values above the maximum are dropped when parsed.
+        if threshold_param not in params_dict:
+            raise Exception("Missing or out of range parameter: %s." %
+                            threshold_param.name)
+        threshold       = params_dict[threshold_param][0]
+
+        flagged = screen_cross_dimers([probe.upper() for probe in probes],
+                                      threshold, 
+                                      executor=ComputeExecutor.Instance())
+        flagged.sort(key=lambda flag: flag[2].deltaG)
+
+        data = list()
+        for (i, j, result) in flagged:
+            data.append({"Probe1": probes[i],
+                         "Probe2": probes[j],
+                         "deltaG": result.deltaG,
+                         "compPercent": result.compPercent})
+        columns = ["Probe1", "Probe2", "deltaG", "compPercent"]
+        return (data, columns, None)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = CrossDimersFunction()
+    print function
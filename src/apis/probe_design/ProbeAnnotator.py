@@ -0,0 +1,186 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import sys
+import Queue
+import logging
+import threading
+
+from itertools import islice
+from Bio import SeqIO
+
+from src.DbConnector import DbConnector
+from src.apis.ApiConstants import ID, UUID, FILEPATH, SEQUENCE, TOMBSTONE, \
+    ANNOTATIONS, JOB_STATUS
+from src.apis.melting_temperature.tmRouter import TmRouter
+from src.apis.melting_temperature.localClient import LocalClient
+from src.apis.melting_temperature.nearest_neighbor import DEFAULT_OLIGO, \
+    DEFAULT_NA, DEFAULT_MG, DEFAULT_DNTP
+from src import PROBES_COLLECTION, PROBE_ANNOTATIONS_COLLECTION
+
+#===============================================================================
+# Public Global Variables
+#===============================================================================
+# Conditions under which melting temperatures are annotated.
+CONDITIONS = {"oligo": float(DEFAULT_OLIGO), "na": float(DEFAULT_NA),
+              "mg": float(DEFAULT_MG), "dntp": float(DEFAULT_DNTP)}
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_BATCH_SIZE = 1000   # Probes annotated and inserted per batch
+
+#===============================================================================
+# Class
+#===============================================================================
+class ProbeAnnotator(object):
+    '''
+    This class is intended to be a singleton. Uploaded probes files are
+    annotated in a background thread with the melting temperature (under
+    CONDITIONS) and, optionally, the self-dimer check of every record, so that
+    later requests read annotations rather than recomputing them. Annotations
+    are stored in PROBE_ANNOTATIONS_COLLECTION, one document per record keyed
+    by the uuid of the probes file and the index of the record, and the
+    annotation status of each probes file is recorded on its probes record.
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._db_connector = DbConnector.Instance()
+        self._local_client = LocalClient()
+        self._queue        = Queue.Queue()
+        self._thread       = None
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = ProbeAnnotator()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def start(self):
+        '''
+        Ensure the annotations index exists, start the annotator thread and
+        queue again probes files left unannotated by a previous server
+        instance.
+        '''
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._db_connector.ensure_index(PROBE_ANNOTATIONS_COLLECTION,
+                                        [(UUID, 1), ("index", 1)])
+
+        self._thread = threading.Thread(target=self._run, name="ProbeAnnotator")
+        self._thread.daemon = True
+        self._thread.start()
+
+        criteria = {ANNOTATIONS: {"$in": [JOB_STATUS.queued, JOB_STATUS.running]},  # @UndefinedVariable
+                    TOMBSTONE: {"$exists": False}}
+        for record in self._db_connector.find(PROBES_COLLECTION, criteria,
+                                              {ID: 0, UUID: 1, FILEPATH: 1,
+                                               "dimers": 1}):
+            self.submit(record, record.get("dimers", False))
+
+    def submit(self, record, dimers=False):
+        '''
+        Queue annotation of a probes record (a dictionary holding at least
+        its uuid and filepath), including self-dimer checks if dimers.
+        '''
+        self._queue.put((record, dimers))
+
+    def annotate(self, record, dimers=False):
+        '''
+        Replace the annotations of a probes record with those of every
+        record of its file. Return the number of records annotated.
+        '''
+        criteria = {UUID: record[UUID]}
+        self._db_connector.delete_many(PROBE_ANNOTATIONS_COLLECTION, criteria)
+
+        num_annotated = 0
+        seq_records   = SeqIO.parse(record[FILEPATH], "fasta")
+        while True:
+            batch = list(islice(seq_records, _BATCH_SIZE))
+            if not batch:
+                break
+            sequences = [str(seq_record.seq).upper() for seq_record in batch]
+            tms       = TmRouter.Instance().get_melting_temps(sequences,
+                                                             **CONDITIONS)
+            rows = list()
+            for i, seq_record in enumerate(batch):
+                row = dict(CONDITIONS)
+                row.update({UUID: record[UUID],
+                            "index": num_annotated + i,
+                            "name": seq_record.id,
+                            SEQUENCE: sequences[i],
+                            "tm": tms[i].tm,
+                            "source": tms[i].source})
+                rows.append(row)
+            if dimers:
+                checks = self._local_client.self_dimer_checks(sequences)
+                for row, check in zip(rows, checks):
+                    row.update({"self_dimer": bool(check.self_dimer),
+                                "deltaG": float(check.deltaG),
+                                "compPercent": float(check.compPercent)})
+            result = self._db_connector.insert_many(PROBE_ANNOTATIONS_COLLECTION,
+                                                    rows, ordered=False)
+            if not result.ok:
+                raise Exception("Unable to store annotations: %s" % result)
+            num_annotated += len(batch)
+        return num_annotated
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _run(self):
+        while True:
+            (record, dimers) = self._queue.get()
+            criteria = {UUID: record[UUID]}
+            try:
+                self._db_connector.update(PROBES_COLLECTION, criteria,
+                                          {"$set": {ANNOTATIONS: JOB_STATUS.running}})  # @UndefinedVariable
+                num_annotated = self.annotate(record, dimers)
+                self._db_connector.update(PROBES_COLLECTION, criteria,
+                                          {"$set": {ANNOTATIONS: JOB_STATUS.succeeded,  # @UndefinedVariable
+                                                    "num_annotated": num_annotated}})
+            except:
+                logging.exception("Annotation of probes file %s failed." %
+                                  record[UUID])
+                try:
+                    self._db_connector.update(PROBES_COLLECTION, criteria,
+                                              {"$set": {ANNOTATIONS: JOB_STATUS.failed,  # @UndefinedVariable
+                                                        "annotations_error": str(sys.exc_info()[1])}})
+                except:
+                    logging.exception("Unable to record failed annotation.")
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    print ProbeAnnotator.Instance().annotate({UUID: "example",
+                                              FILEPATH: sys.argv[1]})
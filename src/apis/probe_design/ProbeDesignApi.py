@@ -22,6 +22,9 @@ limitations under the License.
 #=============================================================================
 from src.apis.AbstractApi import AbstractApiV1
 from src.apis.probe_design.ValidationFunction import ValidationFunction
+from src.apis.probe_design.CandidatesFunction import CandidatesFunction
+from src.apis.probe_design.CrossDimersFunction import CrossDimersFunction
+from src.apis.probe_design.TmProfileFunction import TmProfileFunction
 from src.apis.probe_design.TargetsPostFunction import TargetsPostFunction
 from src.apis.probe_design.TargetsGetFunction import TargetsGetFunction
 from src.apis.probe_design.TargetsDeleteFunction import TargetsDeleteFunction
@@ -36,6 +39,9 @@ class ProbeDesignApiV1(AbstractApiV1):
 
     _FUNCTIONS = [
                   ValidationFunction(),
+                  CandidatesFunction(),
+                  CrossDimersFunction(),
+                  TmProfileFunction(),
                   TargetsPostFunction(),
                   TargetsGetFunction(),
                   TargetsDeleteFunction(),
@@ -20,14 +20,15 @@ limitations under the License.
 #=============================================================================
 # Imports
 #=============================================================================
-import os
 import sys
 
 from flask import make_response, jsonify
+from datetime import datetime
 
 from src.apis.AbstractDeleteFunction import AbstractDeleteFunction
-from src.apis.ApiConstants import ID, UUID, FILEPATH, ERROR
+from src.apis.ApiConstants import ID, UUID, ERROR, TOMBSTONE, TIME_FORMAT
 from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.FileReaper import FileReaper
 from src import PROBES_COLLECTION
 
 #=============================================================================
@@ -62,7 +63,8 @@ class ProbesDeleteFunction(AbstractDeleteFunction):
         response         = {}
         http_status_code = 200
         targets_uuids    = params_dict[ParameterFactory.uuid()]
-        criteria         = {UUID: {"$in": targets_uuids}}
+        criteria         = {UUID: {"$in": targets_uuids}, 
+                            TOMBSTONE: {"$exists": False}}
         
         try:
             records = cls._DB_CONNECTOR.find(PROBES_COLLECTION, criteria, {ID:0})
@@ -72,13 +74,14 @@ class ProbesDeleteFunction(AbstractDeleteFunction):
                 for record in records:
                     response["deleted"][record[UUID]] = record
                 
-                # Delete records from database
-                result = cls._DB_CONNECTOR.remove(PROBES_COLLECTION, criteria)
+                # Tombstone records in a single update. Their files are 
+                # reclaimed in the background by the FileReaper.
+                tombstone = datetime.today().strftime(TIME_FORMAT)
+                result    = cls._DB_CONNECTOR.update(PROBES_COLLECTION, criteria, 
+                                                     {"$set": {TOMBSTONE: tombstone}})
                 
-                # Delete files from disk only if removal from DB was successful
                 if result and result['n'] == len(response["deleted"]):
-                    for _,record in response["deleted"].iteritems():
-                        os.remove(record[FILEPATH])
+                    FileReaper.Instance().wake()
                 else:
                     del response["deleted"]
                     raise Exception("Error deleting records from the database: %s" % result)
@@ -23,7 +23,8 @@ limitations under the License.
 from src.apis.AbstractGetFunction import AbstractGetFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
 from src import PROBES_COLLECTION
-from src.apis.ApiConstants import ID
+from src.apis.ApiConstants import ID, TOMBSTONE, ANNOTATIONS, DATESTAMP, \
+    ERROR, FILENAME, FILEPATH, FORMAT, TYPE, URL, UUID
 
 #=============================================================================
 # Class
@@ -44,6 +45,10 @@ class ProbesGetFunction(AbstractGetFunction):
     @staticmethod
     def notes():
         return ""
+
+    @staticmethod
+    def supports_streaming():
+        return True
     
     @classmethod
     def parameters(cls):
@@ -54,7 +59,10 @@ class ProbesGetFunction(AbstractGetFunction):
     
     @classmethod
     def process_request(cls, params_dict):
-        return (cls._DB_CONNECTOR.find(PROBES_COLLECTION, {}, {ID: 0}), None, None)
+        criteria = {TOMBSTONE: {"$exists": False}}
+        columns  = [ANNOTATIONS, "annotations_error", DATESTAMP, "dimers", ERROR, 
+                    FILENAME, FILEPATH, FORMAT, "num_annotated", TYPE, URL, UUID]
+        return (cls._DB_CONNECTOR.find_iter(PROBES_COLLECTION, criteria, {ID: 0}), columns, None)
          
 #===============================================================================
 # Run Main
@@ -28,9 +28,10 @@ from flask import make_response, jsonify
 from datetime import datetime
 
 from src.apis.ApiConstants import TIME_FORMAT, FORMAT, FILENAME, FILEPATH, ID, \
-    URL, DATESTAMP, TYPE, ERROR, UUID
+    URL, DATESTAMP, TYPE, ERROR, UUID, TOMBSTONE, ANNOTATIONS, JOB_STATUS
 from src.apis.AbstractPostFunction import AbstractPostFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.probe_design.ProbeAnnotator import ProbeAnnotator
 from src import HOSTNAME, PROBES_UPLOAD_FOLDER, PROBES_COLLECTION
 from src.utilities.bio_utilities import validate_fasta
 
@@ -52,18 +53,27 @@ class ProbesPostFunction(AbstractPostFunction):
     
     @staticmethod
     def notes():
-        return "In depth description goes here."
+        return "Once uploaded, the melting temperature of every probe is " \
+               "computed in the background (along with its self-dimer " \
+               "check if dimers is true) and can be retrieved with the " \
+               "probes_uuid parameter of MeltingTemperatures/IDT. The " \
+               "annotations field of the probes record reports progress " \
+               "(queued, running, succeeded or failed)."
     
     @classmethod
     def parameters(cls):
         parameters = [
-                      ParameterFactory.file("Probes file.")
+                      ParameterFactory.file("Probes file."),
+                      ParameterFactory.boolean("dimers", "Annotate probes with self-dimer checks.",
+                                               default_value=False),
                      ]
         return parameters
     
     @classmethod
     def process_request(cls, params_dict):
         probes_file = params_dict[ParameterFactory.file("Probes file.")][0]
+        dimers      = params_dict.get(ParameterFactory.boolean("dimers", "Annotate probes with self-dimer checks.",
+                                                               default_value=False), [False])[0]
         json_response = {
                           FILENAME: probes_file.filename,
                           ERROR: "",
@@ -72,7 +82,8 @@ class ProbesPostFunction(AbstractPostFunction):
         file_uuid        = str(uuid4())
 
         path = os.path.join(PROBES_UPLOAD_FOLDER, file_uuid)
-        existing_filenames = cls._DB_CONNECTOR.distinct(PROBES_COLLECTION, FILENAME)
+        existing_filenames = cls._DB_CONNECTOR.distinct(PROBES_COLLECTION, FILENAME, 
+                                                        {TOMBSTONE: {"$exists": False}})
         if os.path.exists(path) or probes_file.filename in existing_filenames:
             http_status_code     = 403
         elif validate_fasta(probes_file) == False:
@@ -90,9 +101,13 @@ class ProbesPostFunction(AbstractPostFunction):
                     json_response[FORMAT] = probes_file.filename.split(".")[-1]
                 else:
                     json_response[FORMAT] = "Unknown"
+                json_response[ANNOTATIONS] = JOB_STATUS.queued  # @UndefinedVariable
+                json_response["dimers"]    = dimers
                 
                 cls._DB_CONNECTOR.insert(PROBES_COLLECTION, [json_response])
                 del json_response[ID]
+                ProbeAnnotator.Instance().submit({UUID: file_uuid, 
+                                                  FILEPATH: path}, dimers)
 
             except:
                 json_response[ERROR] = str(sys.exc_info()[1])
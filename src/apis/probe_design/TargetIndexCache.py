@@ -0,0 +1,138 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 9, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import logging
+import threading
+
+from collections import OrderedDict
+
+from src.SingleFlight import SingleFlight
+from src.apis.ApiConstants import UUID, FILEPATH
+from src.utilities.bio_utilities import TwoBitFile, fasta_to_twobit, \
+    get_twobit_path
+from src.utilities.kmer_utilities import KmerIndex, get_index_prefix, \
+    get_index_paths
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_MAX_INDEXES = 32   # Indexes each process keeps loaded
+
+#===============================================================================
+# Class
+#===============================================================================
+class TargetIndexCache(object):
+    '''
+    This class is intended to be a singleton. It holds the k-mer index of each
+    targets file so that an index is loaded once per (targets uuid, k) and
+    shared by every request in the process. Indexes are persisted next to the
+    targets file and memory-mapped when loaded, so an index is only ever built
+    once and every process serving requests shares the same pages. Indexes 
+    are built or loaded outside the cache lock, concurrent requests for the 
+    same index sharing one build, and at most _MAX_INDEXES recently used
+    indexes are kept.
+    '''
+    _INSTANCE = None
+
+    #===========================================================================
+    # Constructor
+    #===========================================================================
+    def __init__(self):
+        # Enforce that it's a singleton
+        if self._INSTANCE:
+            raise Exception("%s is a singleton and should be accessed through the Instance method." % self.__class__.__name__)
+        self._indexes = OrderedDict()
+        self._flights = SingleFlight("Target index")
+        self._lock    = threading.Lock()
+
+    @classmethod
+    def Instance(cls):
+        if not cls._INSTANCE:
+            cls._INSTANCE = TargetIndexCache()
+        return cls._INSTANCE
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def get(self, target, k):
+        '''
+        Return the KmerIndex of a targets record (a dictionary holding at
+        least its uuid and filepath), building it if necessary.
+        '''
+        key = (target[UUID], k)
+        with self._lock:
+            if key in self._indexes:
+                index = self._indexes.pop(key)
+                self._indexes[key] = index
+                return index
+
+        index = self._flights.call(key, self._build, target, k)
+        with self._lock:
+            self._indexes.pop(key, None)
+            self._indexes[key] = index
+            while len(self._indexes) > _MAX_INDEXES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def evict(self, uuid):
+        ''' Drop every cached index of the targets file with this uuid. '''
+        with self._lock:
+            for key in [key for key in self._indexes if key[0] == uuid]:
+                del self._indexes[key]
+
+    def delete(self, target):
+        '''
+        Evict the indexes of a targets record and remove their artifacts from
+        disk. Return True if every artifact is gone.
+        '''
+        self.evict(target[UUID])
+        success = True
+        for path in get_index_paths(target[FILEPATH]):
+            try:
+                os.remove(path)
+            except OSError, e:
+                if os.path.exists(path):
+                    logging.warning("Unable to remove %s: %s" % (path, e))
+                    success = False
+        return success
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    @staticmethod
+    def _build(target, k):
+        prefix = get_index_prefix(target[FILEPATH], k)
+        if KmerIndex.exists(prefix):
+            return KmerIndex.load(prefix, k)
+
+        twobit_path = get_twobit_path(target[FILEPATH])
+        # Targets uploaded before 2-bit packing was introduced are packed on
+        # first use.
+        if not os.path.exists(twobit_path):
+            fasta_to_twobit(target[FILEPATH], twobit_path)
+
+        index = KmerIndex.from_twobit(TwoBitFile(twobit_path), k)
+        index.save(prefix)
+        logging.info("Built %d-mer index of targets %s (%d k-mers)." %
+                     (k, target[UUID], len(index.kmers)))
+        return KmerIndex.load(prefix, k)
@@ -23,7 +23,8 @@ limitations under the License.
 from src.apis.AbstractGetFunction import AbstractGetFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
 from src import TARGETS_COLLECTION
-from src.apis.ApiConstants import ID
+from src.apis.ApiConstants import ID, TOMBSTONE, DATESTAMP, ERROR, FILENAME, \
+    FILEPATH, FORMAT, TYPE, URL, UUID
 
 #=============================================================================
 # Class
@@ -44,6 +45,10 @@ class TargetsGetFunction(AbstractGetFunction):
     @staticmethod
     def notes():
         return ""
+
+    @staticmethod
+    def supports_streaming():
+        return True
     
     @classmethod
     def parameters(cls):
@@ -54,7 +59,9 @@ class TargetsGetFunction(AbstractGetFunction):
     
     @classmethod
     def process_request(cls, params_dict):
-        return (cls._DB_CONNECTOR.find(TARGETS_COLLECTION, {}, {ID: 0}), None, None)
+        criteria = {TOMBSTONE: {"$exists": False}}
+        columns  = [DATESTAMP, ERROR, FILENAME, FILEPATH, FORMAT, TYPE, URL, UUID]
+        return (cls._DB_CONNECTOR.find_iter(TARGETS_COLLECTION, criteria, {ID: 0}), columns, None)
          
 #===============================================================================
 # Run Main
@@ -22,17 +22,20 @@ limitations under the License.
 #=============================================================================
 import os
 import sys
+import glob
 
 from uuid import uuid4
 from flask import make_response, jsonify
 from datetime import datetime
 
 from src.apis.ApiConstants import TIME_FORMAT, FORMAT, FILENAME, FILEPATH, ID, \
-    URL, DATESTAMP, TYPE, ERROR, UUID
+    URL, DATESTAMP, TYPE, ERROR, UUID, TOMBSTONE
 from src.apis.AbstractPostFunction import AbstractPostFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
-from src import HOSTNAME, TARGETS_UPLOAD_FOLDER, TARGETS_COLLECTION
-from src.utilities.bio_utilities import validate_fasta
+from src.apis.probe_design.TargetIndexCache import TargetIndexCache
+from src import HOSTNAME, TARGETS_UPLOAD_FOLDER, TARGETS_COLLECTION, KMER_SIZES
+from src.utilities.bio_utilities import validate_fasta, fasta_to_twobit, \
+    get_twobit_path, get_long_record_names, MAX_TWOBIT_NAME_LENGTH
 
 #=============================================================================
 # Class
@@ -72,18 +75,31 @@ class TargetsPostFunction(AbstractPostFunction):
         file_uuid        = str(uuid4())
         
         path = os.path.join(TARGETS_UPLOAD_FOLDER, file_uuid)
-        existing_filenames = cls._DB_CONNECTOR.distinct(TARGETS_COLLECTION, FILENAME)
+        existing_filenames = cls._DB_CONNECTOR.distinct(TARGETS_COLLECTION, FILENAME, 
+                                                        {TOMBSTONE: {"$exists": False}})
         if os.path.exists(path) or targets_file.filename in existing_filenames:
             http_status_code     = 403
         elif validate_fasta(targets_file) == False:
             http_status_code     = 415
+        elif get_long_record_names(targets_file):
+            json_response[ERROR] = "Record names must be at most %d characters long." % \
+                MAX_TWOBIT_NAME_LENGTH
+            http_status_code     = 415
         else:
             try:
                 targets_file.save(path)
                 targets_file.close()
+                
+                # Downstream consumers read the packed copy rather than 
+                # reparsing the FASTA.
+                fasta_to_twobit(path, get_twobit_path(path))
                 json_response[URL]  = "http://%s/targets/%s" % (HOSTNAME, file_uuid)
                 json_response[FILEPATH] = path
                 json_response[UUID] = file_uuid
+                
+                # Index artifacts are built now so that the first validation
+                # against these targets only has to memory-map them.
+                TargetIndexCache.Instance().get(json_response, max(KMER_SIZES))
                 json_response[DATESTAMP] = datetime.today().strftime(TIME_FORMAT)
                 json_response[TYPE]      = "targets"
                 if "." in targets_file.filename:
@@ -96,6 +112,15 @@ class TargetsPostFunction(AbstractPostFunction):
             except:
                 json_response[ERROR] = str(sys.exc_info()[1])
                 http_status_code     = 500
+                
+                # Remove the upload and anything derived from it so that a 
+                # failed upload leaves no orphaned files behind.
+                TargetIndexCache.Instance().evict(file_uuid)
+                for artifact in [path] + glob.glob(path + ".*"):
+                    try:
+                        os.remove(artifact)
+                    except OSError:
+                        pass
         
         return make_response(jsonify(json_response), http_status_code)
 
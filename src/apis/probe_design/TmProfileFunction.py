@@ -0,0 +1,115 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 23, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+import numpy as np
+
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import ID, UUID, FILEPATH, TOMBSTONE
+from src.apis.melting_temperature.nearest_neighbor import \
+    melting_temperature_profile
+from src.utilities.bio_utilities import TwoBitFile, get_twobit_path
+from src import TARGETS_COLLECTION
+
+#=============================================================================
+# Class
+#=============================================================================
+class TmProfileFunction(AbstractGetFunction):
+
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================
+    @staticmethod
+    def name():
+        return "TmProfile"
+
+    @staticmethod
+    def summary():
+        return "Melting temperature of every window along a target region."
+
+    @staticmethod
+    def notes():
+        return "For each provided length, return the nearest-neighbor " \
+               "melting temperature of the window of that length starting " \
+               "at every position of record[start:end] of a targets file. " \
+               "Tm[i] belongs to the window starting at Start + i and is " \
+               "null when the window contains an N or runs past the end of " \
+               "the record. The first record and the whole record are used " \
+               "when record, start or end are not provided."
+
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                      ParameterFactory.uuid(allow_multiple=False),
+                      ParameterFactory.string("record", "Name of the target record."),
+                      ParameterFactory.integer("start", "Start of the region (0-based)."),
+                      ParameterFactory.integer("end", "End of the region (exclusive)."),
+                      ParameterFactory.integers("length", "Comma separated window length(s).",
+                                                default=20, minimum=2),
+                     ]
+        return parameters
+
+    @classmethod
+    def process_request(cls, params_dict):
+        parameters = cls.parameters()
+        values     = dict()
+        for parameter in parameters[1:]:
+            if parameter in params_dict and params_dict[parameter]:
+                values[parameter.name] = params_dict[parameter]
+
+        criteria = {UUID: values[UUID][0], TOMBSTONE: {"$exists": False}}
+        targets  = cls._DB_CONNECTOR.find(TARGETS_COLLECTION, criteria,
+                                          {ID: 0, FILEPATH: 1})
+        columns  = ["Target", "Start", "Length", "Tm"]
+        if len(targets) < 1:
+            return ([], columns, None)
+
+        twobit_file = TwoBitFile(get_twobit_path(targets[0][FILEPATH]))
+        record = values["record"][0] if "record" in values else twobit_file.names[0]
+        if record not in twobit_file:
+            raise Exception("Record %s not found in targets file." % record)
+        record_length = twobit_file.length(record)
+        lengths = sorted(set(values.get("length", [])))
+        start   = max(values.get("start", [0])[0], 0)
+        end     = min(values.get("end", [record_length])[0], record_length)
+        if end <= start or not lengths:
+            return ([], columns, None)
+
+        # Windows starting near the end of the region extend past it.
+        codes   = twobit_file.get_codes(record, start,
+                                        min(end + lengths[-1] - 1, record_length))
+        profile = np.round(melting_temperature_profile(codes, lengths), 1)
+        data    = list()
+        for i, length in enumerate(lengths):
+            data.append({"Target": record,
+                         "Start": start,
+                         "Length": length,
+                         "Tm": profile[i, :end - start].tolist()})
+        return (data, columns, None)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = TmProfileFunction()
+    print function
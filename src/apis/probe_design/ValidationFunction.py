@@ -20,17 +20,41 @@ limitations under the License.
 #=============================================================================
 # Imports
 #=============================================================================
+import numpy as np
+
+from collections import namedtuple
+
 from src.apis.AbstractGetFunction import AbstractGetFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
-from src.apis.melting_temperature.idtClient import IDTClient
+from src.apis.probe_design.TargetIndexCache import TargetIndexCache
+from src.apis.ApiConstants import ID, UUID, FILENAME, FILEPATH, TOMBSTONE
+from src.utilities.bio_utilities import encode_sequence, pad_sequences, \
+    reverse_complement_codes, get_twobit_path, TwoBitFile
+from src.utilities.kmer_utilities import ApproximateHits, find_approximate
+from src.utilities.aho_corasick import AhoCorasick
+from src.utilities.scan_utilities import build_probe_automaton, \
+    count_record_hits
+from src.ComputeExecutor import ComputeExecutor
+from src import TARGETS_COLLECTION, KMER_SIZES
+
+#=============================================================================
+# Private Global Variables
+#=============================================================================
+# Outcome of validating probes against one targets file: record names, exact 
+# occurrences of each probe, distinct (probe, record) exact hits, approximate
+# hits with at least one mismatch and the number of probes hitting each 
+# record.
+_TargetResult = namedtuple('_TargetResult', 'record_names occurrences ' \
+                           'hit_probes hit_records off_target_hits record_hits')
+
+# (path of the shared probes, automaton of those probes), set in each worker.
+_AUTOMATON = None
 
 #=============================================================================
 # Class
 #=============================================================================
 class ValidationFunction(AbstractGetFunction):
     
-    _IDT_CLIENT = IDTClient()
-    
     #===========================================================================
     # Overridden Methods
     #===========================================================================    
@@ -44,7 +68,18 @@ class ValidationFunction(AbstractGetFunction):
     
     @staticmethod
     def notes():
-        return "In depth description goes here."
+        return "Probes are checked against every uploaded targets file on " \
+               "both strands. Occurrences counts exact hits. When mismatches " \
+               "is provided, hits with 1 to mismatches substitutions are " \
+               "reported as Off_target_hits (file:record:start:strand:" \
+               "mismatches). Targets hit by fewer than num probes are " \
+               "returned as rows of Type target. Probes must be at least " \
+               "%d bases long, times mismatches + 1 when mismatches is " \
+               "provided." % min(KMER_SIZES)
+    
+    @staticmethod
+    def supports_jobs():
+        return True
     
     @classmethod
     def parameters(cls):
@@ -54,29 +89,162 @@ class ValidationFunction(AbstractGetFunction):
                       ParameterFactory.boolean("absorb", "Check for absorbed probes."),
                       ParameterFactory.integer("num", "Minimum number of probes for a target.",
                                                default=3, minimum=1),
+                      ParameterFactory.integer("mismatches", "Report off-target hits with up to this many mismatches.",
+                                               minimum=1, maximum=3),
                      ]
         return parameters
     
     @classmethod
     def process_request(cls, params_dict):
-#         sequences      = params_dict[ParameterFactory.sequences(required=True)]
-#         sequence_names = params_dict[ParameterFactory.sequence_names(required=True)]
-#         
-#         # Every sequence must have an accompanying name
-#         if len(sequences) != len(sequence_names):
-#             return (None, None, None)
-#         
-#         data = list()
-#         for i, sequence in enumerate(sequences):
-#             melting_temp = cls._IDT_CLIENT.get_melting_temp(sequence)
-#             data.append({"Name": sequence_names[i], 
-#                          "Sequence": sequence,
-#                          "Tm": melting_temp.tm})
-#         columns = ["Name", "Sequence", "Tm"]
-#         return (data, columns, None)
-        return (None, None, None)
-
+        probes = params_dict[ParameterFactory.probes(required=True)]
+        absorb = params_dict[ParameterFactory.boolean("absorb", "Check for absorbed probes.")][0]
+        num    = params_dict[ParameterFactory.integer("num", "Minimum number of probes for a target.",
+                                                      default=3, minimum=1)][0]
+        # Off-target search is disabled unless mismatches is provided.
+        mismatches_param = ParameterFactory.integer("mismatches", "Report off-target hits with up to this many mismatches.",
+                                                    minimum=1, maximum=3)
+        mismatches = 0
+        if mismatches_param in params_dict:
+            mismatches = params_dict[mismatches_param][0]
+        codes  = [encode_sequence(probe) for probe in probes]
+        
+        # Off-target hits are seeded with mismatches + 1 disjoint k-mers of 
+        # each probe, so k is the largest indexed size allowing that many 
+        # seeds in the shortest probe. Shorter seeds would hit too many 
+        # target positions to verify.
+        shortest   = min(len(probe) for probe in probes)
+        min_length = (mismatches + 1) * min(KMER_SIZES)
+        if shortest < min_length:
+            raise Exception("Probes must be at least %d bases long to allow " \
+                            "%d mismatches, the shortest probe is %d bases " \
+                            "long." % (min_length, mismatches, shortest))
+        k = max(size for size in KMER_SIZES if size * (mismatches + 1) <= shortest)
+        
+        criteria = {TOMBSTONE: {"$exists": False}}
+        targets  = cls._DB_CONNECTOR.find(TARGETS_COLLECTION, criteria, 
+                                          {ID: 0, UUID: 1, FILENAME: 1, FILEPATH: 1})
+        
+        # Targets files are validated in parallel, one shard per file. Probes 
+        # are shared with the workers through a memory-mapped file rather 
+        # than pickled with every shard.
+        executor = ComputeExecutor.Instance()
+        (padded, lengths) = pad_sequences(codes)
+        shared   = (executor.share(padded), executor.share(lengths))
+        try:
+            shards = [(target, k, shared, mismatches) for target in targets]
+            (results, _) = executor.map(_validate_target, shards, 
+                                        cls._report_progress)
+        finally:
+            executor.release(*shared)
+        
+        occurrences = np.zeros(len(probes), dtype=np.int64)
+        hit_targets = [list() for _ in probes]
+        off_targets = [list() for _ in probes]
+        for target, result in zip(targets, results):
+            occurrences += result.occurrences
+            for probe_idx, record_idx in zip(result.hit_probes, result.hit_records):
+                hit_targets[probe_idx].append("%s:%s" % (target[FILENAME], 
+                                                         result.record_names[record_idx]))
+            
+            hits = result.off_target_hits
+            for i in range(len(hits.probes)):
+                off_targets[hits.probes[i]].append("%s:%s:%d:%s:%d" % 
+                    (target[FILENAME], result.record_names[hits.records[i]],
+                     hits.starts[i], "-" if hits.strands[i] else "+", 
+                     hits.mismatches[i]))
+        
+        data = list()
+        for i, probe in enumerate(probes):
+            data.append({"Type": "probe",
+                         "Probe": probe,
+                         "Occurrences": int(occurrences[i]),
+                         "Unique": bool(occurrences[i] == 1),
+                         "Targets": hit_targets[i]})
+        columns = ["Type", "Probe", "Occurrences", "Unique", "Targets"]
+        
+        if mismatches > 0:
+            for i, row in enumerate(data):
+                row["Off_targets"]     = len(off_targets[i])
+                row["Off_target_hits"] = off_targets[i]
+            columns.extend(["Off_targets", "Off_target_hits"])
+        
+        if absorb:
+            absorbed_by = cls._find_absorbed(codes)
+            for i, row in enumerate(data):
+                row["Absorbed_by"] = [probes[j] for j in absorbed_by[i]]
+            columns.append("Absorbed_by")
+        
+        for target, result in zip(targets, results):
+            for record_idx in np.flatnonzero(result.record_hits < num):
+                data.append({"Type": "target",
+                             "Target": "%s:%s" % (target[FILENAME], 
+                                                  result.record_names[record_idx]),
+                             "Probes": int(result.record_hits[record_idx])})
+        columns.extend(["Target", "Probes"])
+        return (data, columns, None)
+    
+    #===========================================================================
+    # Helper Methods
+    #===========================================================================
+    @staticmethod
+    def _find_absorbed(codes):
+        '''
+        Return, for each probe, the sorted indices of the other probes that 
+        contain it or its reverse complement. Every probe and its reverse 
+        complement is streamed once through an Aho-Corasick automaton built 
+        over the probe set.
+        '''
+        texts    = codes + [reverse_complement_codes(c) for c in codes]
+        (text_idxs, probe_idxs, _) = AhoCorasick(codes).search(texts)
+        absorber = text_idxs % len(codes)
+        keep     = absorber != probe_idxs
+        
+        absorbed_by = [set() for _ in codes]
+        for i, j in zip(probe_idxs[keep], absorber[keep]):
+            absorbed_by[i].add(j)
+        return [sorted(s) for s in absorbed_by]
          
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def _validate_target(shard):
+    '''
+    Validate the shared probes against one targets file in a compute worker.
+    Probes are looked up in the k-mer index of the file, searched for 
+    approximate hits when mismatches is positive, and streamed once through 
+    an automaton of all probes (both strands) to count the probes hitting 
+    each record.
+    '''
+    global _AUTOMATON
+    (target, k, (padded, lengths), mismatches) = shard
+    codes = [code[:length] for code, length in zip(padded.get(), lengths.get())]
+    
+    # An index is built the first time a targets file is validated against
+    # and is memory-mapped from disk afterwards.
+    index       = TargetIndexCache.Instance().get(target, k)
+    hits        = index.find(codes)
+    num_records = max(len(index.record_names), 1)
+    pairs       = np.unique(hits.probes * num_records + hits.records)
+    
+    twobit_path = get_twobit_path(target[FILEPATH])
+    off_target_hits = ApproximateHits(*[np.zeros(0, dtype=np.int64)] * 5)
+    if mismatches > 0:
+        approximate = find_approximate(index, TwoBitFile(twobit_path), codes, 
+                                       mismatches)
+        mask = approximate.mismatches > 0
+        off_target_hits = ApproximateHits(*[field[mask] for field in approximate])
+    
+    # Every shard of a request shares the same probes, so a worker builds the
+    # automaton once per request.
+    if _AUTOMATON is None or _AUTOMATON[0] != padded.path:
+        _AUTOMATON = (padded.path, build_probe_automaton(codes))
+    record_hits = count_record_hits(_AUTOMATON[1], len(codes), twobit_path)
+    
+    return _TargetResult(index.record_names, 
+                         np.bincount(hits.probes, minlength=len(codes)),
+                         pairs // num_records, pairs % num_records,
+                         off_target_hits, record_hits)
+
 #===============================================================================
 # Run Main
 #===============================================================================
@@ -20,14 +20,21 @@ limitations under the License.
 # =============================================================================
 # Imports
 #=============================================================================
+import os
+
+from src.AsyncRunner import AsyncRunner
 from src.apis.AbstractGetFunction import AbstractGetFunction
 from src.apis.parameters.ParameterFactory import ParameterFactory
-from src.apis.snp_search.ncbi_utilities import snps_in_interval_multiple
+from src.apis.snp_search.asyncEntrezClient import AsyncEntrezClient
 
 #=============================================================================
 # Class
 #=============================================================================
 class SnpFunction(AbstractGetFunction):
+
+    # Entrez client of each process, bound to its AsyncRunner IOLoop.
+    _ENTREZ_CLIENTS = dict()
+
     #===========================================================================
     # Overridden Methods
     #===========================================================================    
@@ -42,7 +49,8 @@ class SnpFunction(AbstractGetFunction):
     @staticmethod
     def notes():
         return "Retrieve SNP data from the NCBI SNP Database.  Inputs are the " \
-               "start and stop position and chromosome"
+               "start and stop position and chromosome. Intervals are " \
+               "searched concurrently."
 
     @classmethod
     def parameters(cls):
@@ -63,13 +71,25 @@ class SnpFunction(AbstractGetFunction):
         stop_pos = params_dict[ParameterFactory.chromosome_stop(required=True)]
 
         data = list()
-        ncbi_snps = snps_in_interval_multiple(snp_search_name, chromosome_num, start_pos, stop_pos)
+        ncbi_snps = AsyncRunner.Instance().run(cls._get_entrez_client().snps_in_intervals,
+                                               snp_search_name, chromosome_num,
+                                               start_pos, stop_pos)
         for snp in ncbi_snps:
             data.append(snp)
 
         columns = ['search_name', 'rs', 'chromosome', 'loc', 'ref', 'alt', 'validated']
         return data, columns, None
 
+    #===========================================================================
+    # Helper Methods
+    #===========================================================================
+    @classmethod
+    def _get_entrez_client(cls):
+        pid = os.getpid()
+        if pid not in cls._ENTREZ_CLIENTS:
+            cls._ENTREZ_CLIENTS[pid] = AsyncEntrezClient(AsyncRunner.Instance().io_loop)
+        return cls._ENTREZ_CLIENTS[pid]
+
 #
 #===============================================================================
 # Run Main
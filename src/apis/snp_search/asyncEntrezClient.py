@@ -0,0 +1,242 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 30, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import re
+import time
+import random
+import urllib
+
+from xml.parsers import expat
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.httpclient import AsyncHTTPClient, HTTPError
+
+from src.apis.snp_search.ncbi_utilities import Entrez, snp_summary, \
+    unique_snps
+
+#===============================================================================
+# Global Variables
+#===============================================================================
+EUTILS_URL     = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+TOOL           = "gnubio_bioinformatics_rest_api"
+MAX_RATE       = 3      # requests per second, the NCBI limit for E-utilities
+TIMEOUT        = 30     # seconds per attempt
+RETRY_ATTEMPTS = 3
+BACKOFF_BASE   = 1.0    # seconds before the first retry, doubled for every retry
+
+# Responses worth retrying: throttled, server errors and connection failures.
+_RETRY_CODES = set([429, 500, 502, 503, 504, 599])
+
+#===============================================================================
+# Classes
+#===============================================================================
+class AsyncEntrezClient(object):
+    '''
+    Non-blocking NCBI E-utilities client for use on a Tornado IOLoop. Up to
+    max_clients requests are in flight at once and requests are started no
+    faster than max_rate per second, as NCBI requires. Responses are parsed
+    as they stream in, keeping only the fields needed.
+    '''
+    def __init__(self, io_loop=None, max_clients=10, max_rate=MAX_RATE,
+                 base_url=EUTILS_URL):
+        self._io_loop     = io_loop or IOLoop.instance()
+        self._http_client = AsyncHTTPClient(self._io_loop,
+                                            max_clients=max_clients,
+                                            force_instance=True)
+        self._interval    = 1.0 / max_rate
+        self._next_start  = 0
+        self._base_url    = base_url
+
+    @gen.coroutine
+    def esearch(self, db, term):
+        ''' Return the list of ids matching term. '''
+        parser = _EsearchParser()
+        yield self._fetch("esearch.fcgi", parser, db=db, term=term)
+        raise gen.Return(parser.ids)
+
+    @gen.coroutine
+    def esummary(self, db, ids):
+        ''' Return a dictionary of the fields of each document summary. '''
+        parser = _EsummaryParser()
+        yield self._fetch("esummary.fcgi", parser, db=db, id=",".join(ids))
+        raise gen.Return(parser.summaries)
+
+    @gen.coroutine
+    def snps_in_interval(self, search_name, chromosome, start, stop):
+        ''' Asynchronous counterpart of ncbi_utilities.snps_in_interval. '''
+        query = "%s:%s[Base Position] AND %s[CHR] AND Homo sapiens[ORGN] AND by cluster [VALI]" % (start, stop, chromosome)
+        ids = yield self.esearch("snp", query)
+        summaries = list()
+        if ids:
+            summaries = yield self.esummary("snp", ids)
+        raise gen.Return([snp_summary(search_name, snp) for snp in summaries])
+
+    @gen.coroutine
+    def snps_in_intervals(self, search_names, chromosomes, starts, stops):
+        '''
+        Asynchronous counterpart of ncbi_utilities.snps_in_interval_multiple,
+        searching every interval concurrently.
+        '''
+        results = yield [self.snps_in_interval(*interval)
+                         for interval in zip(search_names, chromosomes,
+                                             starts, stops)]
+        raise gen.Return(unique_snps([snp for snps in results for snp in snps]))
+
+    @gen.coroutine
+    def chromosome_for_ref_assembly(self, name):
+        '''
+        Asynchronous counterpart of ncbi_utilities.chromosome_for_ref_assembly
+        reading the title from the document summary of the record rather
+        than fetching the whole record.
+        '''
+        match = re.search('gi\|(\d*)\|', name)
+        try:
+            summaries = yield self.esummary("nucleotide", [match.group(1)])
+            title = summaries[0].get("Title", "")
+        except Exception:
+            title = ''
+        match = re.search('chromosome ([^\s|^,]+)', title)
+        raise gen.Return(match.group(1) if match else '-')
+
+    def close(self):
+        self._http_client.close()
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    @gen.coroutine
+    def _fetch(self, utility, parser, **params):
+        ''' Stream the response of an E-utility into parser. '''
+        params.update({"tool": TOOL, "email": Entrez.email})
+        url = "%s%s?%s" % (self._base_url, utility, urllib.urlencode(params))
+        i = 0
+        while True:
+            yield self._wait_to_start()
+            try:
+                yield self._http_client.fetch(url, request_timeout=TIMEOUT,
+                                              streaming_callback=parser.feed)
+                break
+            except HTTPError, e:
+                i += 1
+                if e.code not in _RETRY_CODES or i > RETRY_ATTEMPTS:
+                    raise
+                parser.reset()
+                backoff = random.uniform(0, BACKOFF_BASE * 2 ** (i - 1))
+                yield gen.Task(self._io_loop.add_timeout, time.time() + backoff)
+        parser.close()
+
+    @gen.coroutine
+    def _wait_to_start(self):
+        ''' Wait for the next request start allowed by the rate limit. '''
+        now   = time.time()
+        start = max(now, self._next_start)
+        self._next_start = start + self._interval
+        if start > now:
+            yield gen.Task(self._io_loop.add_timeout, start)
+
+class _EutilsParser(object):
+    '''
+    Incremental parser of E-utilities XML calling _element with the name,
+    attributes, text and parent name of every element as it ends (text is
+    only meaningful for leaf elements). ERROR elements are raised as an
+    exception once parsing is done.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._stack  = list()
+        self._text   = list()
+        self._errors = list()
+        self._parser = expat.ParserCreate()
+        self._parser.StartElementHandler  = self._start
+        self._parser.EndElementHandler    = self._end
+        self._parser.CharacterDataHandler = self._text.append
+
+    def feed(self, data):
+        self._parser.Parse(data, False)
+
+    def close(self):
+        self._parser.Parse("", True)
+        if self._errors:
+            raise Exception("NCBI E-utilities error: %s" % "; ".join(self._errors))
+
+    def _start(self, name, attrs):
+        self._stack.append((name, attrs))
+        del self._text[:]
+
+    def _end(self, _):
+        (name, attrs) = self._stack.pop()
+        text   = "".join(self._text).strip()
+        parent = self._stack[-1][0] if self._stack else None
+        if name == "ERROR":
+            self._errors.append(text)
+        else:
+            self._element(name, attrs, text, parent)
+        del self._text[:]
+
+    def _element(self, name, attrs, text, parent):
+        raise NotImplementedError
+
+class _EsearchParser(_EutilsParser):
+    ''' Collects the ids of an esearch response. '''
+    def reset(self):
+        super(_EsearchParser, self).reset()
+        self.ids = list()
+
+    def _element(self, name, attrs, text, parent):
+        if name == "Id" and parent == "IdList":
+            self.ids.append(text)
+
+class _EsummaryParser(_EutilsParser):
+    '''
+    Collects the fields of each document of an esummary response, from Item
+    elements of version 1 responses or leaf elements of version 2 responses.
+    '''
+    _DOCUMENTS = set(["DocSum", "DocumentSummary"])
+
+    def reset(self):
+        super(_EsummaryParser, self).reset()
+        self.summaries = list()
+        self._summary  = None
+
+    def _start(self, name, attrs):
+        super(_EsummaryParser, self)._start(name, attrs)
+        if name in self._DOCUMENTS:
+            self._summary = dict()
+
+    def _element(self, name, attrs, text, parent):
+        if name in self._DOCUMENTS:
+            self.summaries.append(self._summary)
+            self._summary = None
+        elif self._summary is not None:
+            self._summary.setdefault(attrs.get("Name", name), text)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    @gen.coroutine
+    def main():
+        client = AsyncEntrezClient()
+        print (yield client.snps_in_intervals(["BRAF"], [7], [140453130], [140453140]))
+    IOLoop.instance().run_sync(main)
@@ -42,21 +42,28 @@ def snps_in_interval(search_name, chromosome, start, stop):
         results = Entrez.read(handle)  # list of dicts
     else:
         results = list()
-    SNPs = list()
-    for snp in results:
-        match = re.search('(.+):(\d*)', snp['CHRPOS'])
-        chromosome = match.group(1)
-        location = match.group(2)
-        match = re.search('\[([^/]*)/([^\]]*)\]', snp['DOCSUM'])
-        validated = snp['VALIDATED']
-        SNPs.append(SNPSummary(search_name, 'rs'+snp['SNP_ID'].__str__(), chromosome, location, match.group(1), match.group(2), validated))
-    return SNPs
+    return [snp_summary(search_name, snp) for snp in results]
+
+
+def snp_summary(search_name, snp):
+    """Build an SNPSummary from an esummary document of the snp database."""
+    match = re.search('(.+):(\d*)', snp['CHRPOS'])
+    chromosome = match.group(1)
+    location = match.group(2)
+    match = re.search('\[([^/]*)/([^\]]*)\]', snp['DOCSUM'])
+    validated = snp['VALIDATED']
+    return SNPSummary(search_name, 'rs'+snp['SNP_ID'].__str__(), chromosome, location, match.group(1), match.group(2), validated)
 
 
 def snps_in_interval_multiple(snp_search_names, chromosome_num, start_pos, stop_pos):
     SNPs = list()
     for search_name, chr_num, chr_start, chr_stop in zip(snp_search_names, chromosome_num, start_pos, stop_pos):
         SNPs.extend(snps_in_interval(search_name, chr_num, chr_start, chr_stop))
+    return unique_snps(SNPs)
+
+
+def unique_snps(SNPs):
+    """Remove duplicate SNPs and sort them by search name, chromosome and location."""
     # remove duplicates
     uniq_snps = [dict(item) for item in set(tuple(snp.to_dict().items()) for snp in SNPs)]
     uniq_snps.sort(key=lambda snp: int(snp['loc']))
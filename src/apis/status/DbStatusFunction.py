@@ -0,0 +1,70 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#=============================================================================
+# Imports
+#=============================================================================
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+
+#=============================================================================
+# Class
+#=============================================================================
+class DbStatusFunction(AbstractGetFunction):
+    
+    #===========================================================================
+    # Overridden Methods
+    #===========================================================================    
+    @staticmethod
+    def name():
+        return "DbStatus"
+   
+    @staticmethod
+    def summary():
+        return "Retrieve the settings and metrics of the MongoDB connection pool."
+    
+    @staticmethod
+    def notes():
+        return "Connected is false until the process first uses the " \
+               "database. Checkouts is the number of times a connection " \
+               "was taken from the pool, connections_opened the number of " \
+               "connections opened and wait_queue_timeouts the number of " \
+               "requests that gave up waiting for a connection after " \
+               "wait_queue_timeout_ms. Mean_wait_ms and max_wait_ms are " \
+               "the times taken to check out a connection (waiting for one " \
+               "to be returned to a full pool, or opening one). Note that " \
+               "each server process has its own pool and counts."
+    
+    @classmethod
+    def parameters(cls):
+        parameters = [
+                      ParameterFactory.format(),
+                     ]
+        return parameters
+    
+    @classmethod
+    def process_request(cls, params_dict):
+        return ([cls._DB_CONNECTOR.pool_status()], None, None)
+         
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    function = DbStatusFunction()
+    print function
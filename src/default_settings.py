@@ -48,5 +48,72 @@ TORNADO_LOG_FILE_PREFIX = os.path.join(HOME_DIR, "logs/tornado_%s.log" %
                                        str(PORT))
 DATABASE_URL            = "bioweb"
 DATABASE_PORT           = 27017
+
+# Each process opens its own MongoDB connection pool on first use (so pools 
+# are never shared across a fork) and DATABASE_WARM_CONNECTIONS connections 
+# are opened when the server starts. Requests wait at most 
+# DATABASE_WAIT_QUEUE_TIMEOUT_MS for one of the DATABASE_MAX_POOL_SIZE 
+# connections. Timeouts are in milliseconds, None meaning no timeout.
+DATABASE_MAX_POOL_SIZE          = 100
+DATABASE_WARM_CONNECTIONS       = 4
+DATABASE_CONNECT_TIMEOUT_MS     = 20000
+DATABASE_SOCKET_TIMEOUT_MS      = None
+DATABASE_WAIT_QUEUE_TIMEOUT_MS  = 30000
+DATABASE_READ_PREFERENCE        = "primary"
+DATABASE_WRITE_CONCERN          = {"w": 1}
+
+# Records fetched from MongoDB per round trip when iterating over a query.
+FIND_BATCH_SIZE         = 1000
+
+# Bulk writes are sent in batches of at most BULK_MAX_DOCUMENTS requests and
+# about BULK_MAX_BYTES of BSON (MongoDB 2.6 accepts at most 1000 writes and 
+# 16MB per command).
+BULK_MAX_DOCUMENTS      = 1000
+BULK_MAX_BYTES          = 8 * 1024 * 1024
+
 TARGETS_COLLECTION      = "targets"
 PROBES_COLLECTION       = "probes"
+
+# Deleted records are tombstoned and their files are reclaimed in the 
+# background by the FileReaper. Intervals are in seconds.
+REAPER_INTERVAL         = 60
+REAPER_THREADS          = 8
+ORPHAN_SWEEP_INTERVAL   = 3600
+ORPHAN_GRACE_PERIOD     = 3600
+
+# Lengths of the k-mers indexed for probe validation (at most 32), largest
+# first. The largest is indexed when targets are uploaded, the others the 
+# first time they are needed. Probe validation uses the largest k allowing 
+# mismatches + 1 seeds in the shortest probe, so probes must be at least 
+# (mismatches + 1) * min(KMER_SIZES) bases long. Each size is an index 
+# artifact per targets file.
+KMER_SIZES              = [16, 12, 8]
+
+# Number of worker processes running CPU-bound work (e.g. validating probes
+# against each targets file), typically the number of cores.
+COMPUTE_PROCESSES       = 4
+
+# Long-running requests can be submitted as jobs, which are executed by a 
+# pool of JOB_PROCESSES worker processes. Results are stored in 
+# JOB_RESULTS_COLLECTION.
+JOBS_COLLECTION         = "jobs"
+JOB_RESULTS_COLLECTION  = "job_results"
+JOB_PROCESSES           = 2
+
+# Melting temperatures are answered from TM_CACHE_COLLECTION, then by IDT 
+# and finally by the local nearest-neighbor engine for sequences IDT has not 
+# answered within the latency budget (seconds). At most IDT_MAX_CLIENTS 
+# requests are in flight to IDT and at most IDT_MAX_PENDING may be waiting.
+TM_CACHE_COLLECTION     = "tm_cache"
+TM_LATENCY_BUDGET       = 10.0
+IDT_MAX_CLIENTS         = 100
+IDT_MAX_PENDING         = 256
+
+# Uploaded probes files are annotated in the background with melting 
+# temperatures (and optionally self-dimer checks) stored in 
+# PROBE_ANNOTATIONS_COLLECTION.
+PROBE_ANNOTATIONS_COLLECTION = "probe_annotations"
+
+# Functions supporting streaming are served directly by Tornado, producing 
+# their output on a pool of STREAM_THREADS threads.
+STREAM_THREADS          = 4
@@ -37,11 +37,19 @@ from argparse import ArgumentParser
 from argparse import RawDescriptionHelpFormatter
 from datetime import datetime
 from tornado.wsgi import WSGIContainer
+from tornado.httpclient import AsyncHTTPClient
 from tornado.ioloop import IOLoop
 from tornado.web import FallbackHandler, Application, RequestHandler
 
 from . import app, PORT, HOME_DIR, TORNADO_LOG_FILE_PREFIX, \
     TARGETS_UPLOAD_FOLDER, PROBES_UPLOAD_FOLDER
+from .DbConnector import DbConnector
+from .FileReaper import FileReaper
+from .ComputeExecutor import ComputeExecutor
+from .JobManager import JobManager
+from .apis.melting_temperature.tmRouter import TmRouter
+from .apis.probe_design.ProbeAnnotator import ProbeAnnotator
+from .StreamingHandler import get_streaming_routes
 from utilities import io_utilities
 
 #===============================================================================
@@ -219,9 +227,31 @@ def start(current_info):
                  (current_info[MACHINE], current_info[PORT_HEADER], 
                   time.strftime("%I:%M:%S")))
     
+    # libcurl keeps connections to IDT and NCBI alive between requests, the 
+    # simple client opens a connection per request. pycurl is installed by 
+    # the Makefile, the simple client is only a fallback for environments 
+    # without it. Configured before forking so that workers inherit it.
+    try:
+        import pycurl  # @UnusedImport
+        AsyncHTTPClient.configure("tornado.curl_httpclient.CurlAsyncHTTPClient")
+    except ImportError:
+        logging.warning("pycurl is not installed, using the simple HTTP client.")
+    
+    # Fork worker processes before any background thread starts. Job workers
+    # are forked first, from a process without threads. The compute workers
+    # are then forked alongside the handler threads of the job pool, which is
+    # safe since those threads only wait on the job pool's own queues, which
+    # compute workers never use, and take no lock (e.g. of logging) that the
+    # compute workers need.
+    JobManager.Instance().start_workers()
+    ComputeExecutor.Instance().start()
+    
     tr = WSGIContainer(app)
-    application = Application([ (r"/tornado", MainHandler),
-                                (r".*", FallbackHandler, dict(fallback=tr)),
+    # Functions supporting streaming are served by Tornado, everything else 
+    # by Flask.
+    application = Application([ (r"/tornado", MainHandler)] +
+                              get_streaming_routes(tr) +
+                              [ (r".*", FallbackHandler, dict(fallback=tr)),
                               ])
     application.listen(PORT)
     
@@ -230,6 +260,21 @@ def start(current_info):
     signal.signal(signal.SIGINT, sig_handler)
     signal.signal(signal.SIGQUIT, sig_handler)
     
+    # Open database connections before accepting requests.
+    DbConnector.Instance().warm_up()
+    
+    # Reclaim files of deleted (tombstoned) records in the background.
+    FileReaper.Instance().start()
+    
+    # Fail jobs orphaned by a previous instance before accepting new ones.
+    JobManager.Instance().start()
+    
+    # Index the melting temperature cache.
+    TmRouter.Instance().start()
+    
+    # Annotate uploaded probes files in the background.
+    ProbeAnnotator.Instance().start()
+    
     # Add the current info to the running info file.
     write_running_info([current_info])
     
@@ -0,0 +1,172 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import unittest
+
+from bson import BSON
+from pymongo.errors import BulkWriteError
+
+from src import DbConnector as db_connector
+from src.DbConnector import DbConnector, BulkWriteResult, InsertOne, \
+    DeleteMany
+
+#===============================================================================
+# Classes
+#===============================================================================
+class _FakeBulk(object):
+    ''' 
+    Bulk operation inserting into a list. Documents with "fail" set are
+    rejected, ordered bulks stop at the first of them.
+    '''
+    def __init__(self, collection, ordered):
+        self.collection = collection
+        self.ordered    = ordered
+        self.documents  = list()
+
+    def insert(self, document):
+        self.documents.append(document)
+
+    def execute(self, write_concern=None):
+        self.collection.batches.append(len(self.documents))
+        details = {"nInserted": 0, "writeErrors": []}
+        for (index, document) in enumerate(self.documents):
+            if document.get("fail"):
+                details["writeErrors"].append({"index": index, "code": 11000,
+                                               "errmsg": "duplicate key"})
+                if self.ordered:
+                    break
+            else:
+                self.collection.documents.append(document)
+                details["nInserted"] += 1
+        if write_concern == {"w": 0}:
+            return None
+        if details["writeErrors"]:
+            raise BulkWriteError(details)
+        return details
+
+class _FakeCollection(object):
+    def __init__(self):
+        self.documents = list()
+        self.batches   = list()
+
+    def initialize_ordered_bulk_op(self):
+        return _FakeBulk(self, True)
+
+    def initialize_unordered_bulk_op(self):
+        return _FakeBulk(self, False)
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = (db_connector.BULK_MAX_DOCUMENTS,
+                      db_connector.BULK_MAX_BYTES, DbConnector._INSTANCE)
+        db_connector.BULK_MAX_DOCUMENTS = 4
+        db_connector.BULK_MAX_BYTES     = 100
+        DbConnector._INSTANCE = None
+        self.collection = _FakeCollection()
+        self.connector  = DbConnector.Instance()
+        self.connector._db  = {"test": self.collection}
+        self.connector._pid = os.getpid()
+
+    def tearDown(self):
+        (db_connector.BULK_MAX_DOCUMENTS, db_connector.BULK_MAX_BYTES,
+         DbConnector._INSTANCE) = self.saved
+
+    @staticmethod
+    def _naive_batches(requests, max_documents, max_bytes):
+        ''' Start a new batch whenever the next request does not fit. '''
+        batches = list()
+        for request in requests:
+            size = len(BSON.encode(request.document))
+            if not batches or len(batches[-1]) == max_documents or \
+               sum(len(BSON.encode(r.document)) for r in batches[-1]) + size > max_bytes:
+                batches.append(list())
+            batches[-1].append(request)
+        return batches
+
+    def test_batches(self):
+        for sizes in [[], [1], [1] * 9, [1, 60, 1, 30, 1, 1], [200, 1, 200],
+                      [40, 40, 40, 1, 1, 1, 1, 1]]:
+            requests = [InsertOne({"x": "a" * size}) for size in sizes]
+            batches  = list(db_connector._batches(iter(requests)))
+            expected = self._naive_batches(requests, 4, 100)
+            self.assertEqual([batch for (_, batch) in batches], expected)
+            offsets  = [sum(len(batch) for batch in expected[:i])
+                        for i in range(len(expected))]
+            self.assertEqual([offset for (offset, _) in batches], offsets)
+
+    def test_batches_of_deletes(self):
+        requests = [DeleteMany({"i": i}) for i in range(6)]
+        self.assertEqual([(offset, len(batch)) for (offset, batch) in 
+                          db_connector._batches(requests)], [(0, 4), (4, 2)])
+
+    def test_result_add(self):
+        result = BulkWriteResult()
+        result.add({"nInserted": 3, "nMatched": 2, "nModified": None,
+                    "writeErrors": [{"index": 1, "code": 1, "errmsg": "a"}]}, 0)
+        result.add({"nInserted": 1, "nRemoved": 4, "nModified": 2,
+                    "writeErrors": [{"index": 0, "code": 2, "errmsg": "b"},
+                                    {"index": 3, "code": 3, "errmsg": "c"}],
+                    "writeConcernErrors": [{"code": 64}]}, 10)
+        self.assertEqual((result.num_inserted, result.num_matched,
+                          result.num_modified, result.num_removed),
+                         (4, 2, 2, 4))
+        self.assertEqual([(e["index"], e["code"], e["errmsg"]) 
+                          for e in result.write_errors],
+                         [(1, 1, "a"), (10, 2, "b"), (13, 3, "c")])
+        self.assertEqual(result.write_concern_errors, [{"code": 64}])
+        self.assertTrue(result.acknowledged)
+        self.assertFalse(result.ok)
+        result.add(None, 20)
+        self.assertFalse(result.acknowledged)
+
+    def test_ordered_insert_stops_at_first_error(self):
+        rows = [{"i": i, "fail": i in (5, 9)} for i in range(12)]
+        result = self.connector.insert_many("test", rows)
+        self.assertEqual(self.collection.batches, [4, 4])
+        self.assertEqual([row["i"] for row in self.collection.documents],
+                         [0, 1, 2, 3, 4])
+        self.assertEqual(result.num_inserted, 5)
+        self.assertEqual([error["index"] for error in result.write_errors], [5])
+
+    def test_unordered_insert_reports_every_error(self):
+        rows = [{"i": i, "fail": i in (5, 9)} for i in range(12)]
+        result = self.connector.insert_many("test", rows, ordered=False)
+        self.assertEqual(self.collection.batches, [4, 4, 4])
+        self.assertEqual(result.num_inserted, 10)
+        self.assertEqual([error["index"] for error in result.write_errors], 
+                         [5, 9])
+        self.assertTrue(result.ok is False and result.acknowledged)
+
+    def test_unacknowledged_insert(self):
+        result = self.connector.insert_many("test", [{"i": 1}], 
+                                            write_concern={"w": 0})
+        self.assertFalse(result.acknowledged)
+        self.assertEqual(len(self.collection.documents), 1)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
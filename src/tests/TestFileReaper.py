@@ -0,0 +1,212 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import copy
+import time
+import shutil
+import tempfile
+import unittest
+
+from src import FileReaper as file_reaper
+from src.FileReaper import FileReaper
+from src.apis.ApiConstants import UUID, FILEPATH, TOMBSTONE
+from src.apis.probe_design import TargetsDeleteFunction as delete_function
+from src.apis.probe_design.TargetsDeleteFunction import TargetsDeleteFunction
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_TARGETS     = "targets"
+_PROBES      = "probes"
+_ANNOTATIONS = "annotations"
+
+#===============================================================================
+# Classes
+#===============================================================================
+class _FakeDbConnector(object):
+    ''' In-memory stand-in for the DbConnector methods used by the reaper. '''
+    def __init__(self):
+        self.collections = {_TARGETS: [], _PROBES: [], _ANNOTATIONS: []}
+
+    @staticmethod
+    def _matches(record, criteria):
+        for (key, value) in criteria.items():
+            if isinstance(value, dict) and "$in" in value:
+                if record.get(key) not in value["$in"]:
+                    return False
+            elif isinstance(value, dict) and "$exists" in value:
+                if (key in record) != value["$exists"]:
+                    return False
+            elif record.get(key) != value:
+                return False
+        return True
+
+    def find(self, collection, criteria, projection):
+        return [copy.deepcopy(record) for record in self.collections[collection]
+                if self._matches(record, criteria)]
+
+    def distinct(self, collection, column_name):
+        return list(set(record[column_name] 
+                        for record in self.collections[collection]))
+
+    def update(self, collection, criteria, document):
+        records = self.find(collection, criteria, None)
+        for record in self.collections[collection]:
+            if self._matches(record, criteria):
+                record.update(document["$set"])
+        return {"n": len(records)}
+
+    def remove(self, collection, criteria):
+        self.collections[collection] = [record for record in 
+                                        self.collections[collection]
+                                        if not self._matches(record, criteria)]
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir      = tempfile.mkdtemp()
+        self.folders      = {_TARGETS: os.path.join(self.tmp_dir, _TARGETS),
+                             _PROBES: os.path.join(self.tmp_dir, _PROBES)}
+        for folder in self.folders.values():
+            os.mkdir(folder)
+        self.db_connector = _FakeDbConnector()
+        self.saved = (file_reaper.DbConnector, file_reaper.ORPHAN_GRACE_PERIOD,
+                      FileReaper._INSTANCE, FileReaper._MANAGED, 
+                      FileReaper._DERIVED)
+        file_reaper.DbConnector = type("FakeDbConnector", (object,), 
+            {"Instance": staticmethod(lambda: self.db_connector)})
+        file_reaper.ORPHAN_GRACE_PERIOD = 60
+        FileReaper._INSTANCE = None
+        FileReaper._MANAGED  = [(_TARGETS, self.folders[_TARGETS]),
+                                (_PROBES, self.folders[_PROBES])]
+        FileReaper._DERIVED  = {_PROBES: [_ANNOTATIONS]}
+        self.reaper = FileReaper.Instance()
+
+    def tearDown(self):
+        (file_reaper.DbConnector, file_reaper.ORPHAN_GRACE_PERIOD,
+         FileReaper._INSTANCE, FileReaper._MANAGED, 
+         FileReaper._DERIVED) = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def _add_record(self, collection, uuid, tombstone=None, suffixes=("",)):
+        ''' Add a record along with a file for each suffix of its filepath. '''
+        record = {UUID: uuid, 
+                  FILEPATH: os.path.join(self.folders[collection], uuid)}
+        if tombstone:
+            record[TOMBSTONE] = tombstone
+        self.db_connector.collections[collection].append(record)
+        for suffix in suffixes:
+            with open(record[FILEPATH] + suffix, 'w') as f:
+                f.write(uuid)
+        return record
+
+    def _files(self, collection):
+        return sorted(os.listdir(self.folders[collection]))
+
+    def test_delete_tombstones_records(self):
+        self._add_record(_TARGETS, "a")
+        self._add_record(_TARGETS, "b")
+        saved = (delete_function.make_response, delete_function.jsonify,
+                 TargetsDeleteFunction.__dict__.get("_DB_CONNECTOR"))
+        delete_function.make_response = lambda response, code: (response, code)
+        delete_function.jsonify       = lambda response: response
+        TargetsDeleteFunction._DB_CONNECTOR = self.db_connector
+        try:
+            (response, code) = TargetsDeleteFunction.process_request(
+                {TargetsDeleteFunction.parameters()[0]: ["a", "missing"]})
+        finally:
+            (delete_function.make_response, delete_function.jsonify) = saved[:2]
+            if saved[2] is None:
+                del TargetsDeleteFunction._DB_CONNECTOR
+            else:
+                TargetsDeleteFunction._DB_CONNECTOR = saved[2]
+        self.assertEqual(code, 200)
+        self.assertEqual(response["deleted"].keys(), ["a"])
+        records = dict((r[UUID], r) for r in 
+                       self.db_connector.collections[_TARGETS])
+        self.assertTrue(TOMBSTONE in records["a"])
+        self.assertFalse(TOMBSTONE in records["b"])
+        # Files are left for the reaper.
+        self.assertEqual(self._files(_TARGETS), ["a", "b"])
+
+    def test_reap(self):
+        self._add_record(_TARGETS, "live")
+        self._add_record(_TARGETS, "dead", tombstone="now", 
+                         suffixes=("", ".2bit", ".k8.kmers"))
+        self._add_record(_PROBES, "dead_probes", tombstone="now")
+        self._add_record(_PROBES, "live_probes")
+        self.db_connector.collections[_ANNOTATIONS] = [{UUID: "dead_probes"},
+                                                       {UUID: "live_probes"}]
+        # A tombstone whose file is already gone is purged all the same.
+        self._add_record(_PROBES, "gone", tombstone="now", suffixes=())
+
+        reaped = self.reaper.reap()
+        self.assertEqual(reaped[_TARGETS], ["dead"])
+        self.assertEqual(sorted(reaped[_PROBES]), ["dead_probes", "gone"])
+        self.assertEqual(self._files(_TARGETS), ["live"])
+        self.assertEqual(self._files(_PROBES), ["live_probes"])
+        self.assertEqual([r[UUID] for r in 
+                          self.db_connector.collections[_TARGETS]], ["live"])
+        self.assertEqual([r[UUID] for r in 
+                          self.db_connector.collections[_PROBES]], ["live_probes"])
+        self.assertEqual(self.db_connector.collections[_ANNOTATIONS],
+                         [{UUID: "live_probes"}])
+        self.assertEqual(self.reaper.reap(), {})
+
+    def test_failed_unlink_keeps_tombstone(self):
+        record = self._add_record(_TARGETS, "dead", tombstone="now", suffixes=())
+        # A directory cannot be removed with os.remove.
+        os.mkdir(record[FILEPATH])
+        self.assertEqual(self.reaper.reap(), {_TARGETS: []})
+        self.assertEqual(len(self.db_connector.collections[_TARGETS]), 1)
+
+    def test_sweep_orphans(self):
+        self._add_record(_TARGETS, "live", suffixes=("", ".2bit"))
+        self._add_record(_TARGETS, "missing", suffixes=())
+        old_orphan = os.path.join(self.folders[_TARGETS], "old.fasta")
+        new_orphan = os.path.join(self.folders[_TARGETS], "new.fasta")
+        for path in [old_orphan, new_orphan]:
+            open(path, 'w').close()
+        old_time = time.time() - 120
+        os.utime(old_orphan, (old_time, old_time))
+
+        report = self.reaper.sweep_orphans()
+        self.assertEqual(report[_TARGETS], {"orphaned_files": [old_orphan],
+                                            "missing_files": ["missing"]})
+        self.assertEqual(report[_PROBES], {"orphaned_files": [],
+                                           "missing_files": []})
+        # Orphans within the grace period may still be in the middle of an
+        # upload and are left alone.
+        self.assertEqual(self._files(_TARGETS), ["live", "live.2bit", 
+                                                 "new.fasta"])
+        records = dict((r[UUID], r) for r in 
+                       self.db_connector.collections[_TARGETS])
+        self.assertTrue(TOMBSTONE in records["missing"])
+        self.assertFalse(TOMBSTONE in records["live"])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,182 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import copy
+import unittest
+
+from src import JobManager as job_manager
+from src.JobManager import JobManager
+from src.DbConnector import BulkWriteResult
+from src.apis.AbstractGetFunction import AbstractGetFunction
+from src.apis.parameters.ParameterFactory import ParameterFactory
+from src.apis.ApiConstants import ID, UUID, STATUS, PROGRESS, ERROR, \
+    JOB_STATUS
+from src import JOBS_COLLECTION, JOB_RESULTS_COLLECTION
+
+#===============================================================================
+# Classes
+#===============================================================================
+class _FakeDbConnector(object):
+    ''' In-memory stand-in for the DbConnector methods used by jobs. '''
+    def __init__(self):
+        self.collections = {JOBS_COLLECTION: [], JOB_RESULTS_COLLECTION: []}
+
+    @staticmethod
+    def _matches(record, criteria):
+        return all(record.get(key) == value for key, value in criteria.items())
+
+    def insert(self, collection, rows):
+        for row in rows:
+            row[ID] = len(self.collections[collection])
+            self.collections[collection].append(copy.deepcopy(row))
+
+    def insert_many(self, collection, rows, ordered=True, write_concern=None):
+        result = BulkWriteResult()
+        for row in rows:
+            self.collections[collection].append(copy.deepcopy(row))
+            result.num_inserted += 1
+        return result
+
+    def find(self, collection, criteria, projection, sort=None, skip=0, limit=0):
+        records = [dict((key, value) for key, value in record.items()
+                        if key != ID)
+                   for record in self.collections[collection] 
+                   if self._matches(record, criteria)]
+        for (key, direction) in reversed(sort or []):
+            records.sort(key=lambda record: record[key], reverse=direction < 0)
+        return records[skip:skip + limit if limit else None]
+
+    def update(self, collection, criteria, document, multi=True, upsert=False):
+        for record in self.collections[collection]:
+            if self._matches(record, criteria):
+                record.update(document["$set"])
+
+    def remove(self, collection, criteria):
+        self.collections[collection] = [record for record in 
+                                        self.collections[collection]
+                                        if not self._matches(record, criteria)]
+
+class _InlinePool(object):
+    ''' Runs jobs in the calling process as they are submitted. '''
+    def apply_async(self, function, args):
+        function(*args)
+
+class _CountFunction(AbstractGetFunction):
+    ''' Generates n rows, failing halfway through when n is 13. '''
+    @staticmethod
+    def name():
+        return "Count"
+
+    @staticmethod
+    def summary():
+        return "Count to n."
+
+    @staticmethod
+    def notes():
+        return ""
+
+    @staticmethod
+    def supports_jobs():
+        return True
+
+    @classmethod
+    def parameters(cls):
+        return [ParameterFactory.format(),
+                ParameterFactory.integer("n", "Number of rows.", required=True)]
+
+    @classmethod
+    def process_request(cls, params_dict):
+        n = params_dict[cls.parameters()[1]][0]
+        def rows():
+            for i in range(n):
+                if n == 13 and i == 6:
+                    raise Exception("Unlucky.")
+                yield {"i": i}
+        return (rows(), ["i"], None)
+
+class _InlineFunction(_CountFunction):
+    @staticmethod
+    def supports_jobs():
+        return False
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.db_connector = _FakeDbConnector()
+        self.functions    = {"Count": _CountFunction(), "Inline": _InlineFunction()}
+        self.saved = (job_manager.DbConnector, job_manager._get_function,
+                      JobManager._INSTANCE)
+        job_manager.DbConnector = type("FakeDbConnector", (object,), 
+            {"Instance": staticmethod(lambda: self.db_connector)})
+        job_manager._get_function = lambda api_name, path: \
+            (self.functions.get(path), [""])
+        JobManager._INSTANCE = None
+        self.manager = JobManager.Instance()
+        self.manager._pool = _InlinePool()
+
+    def tearDown(self):
+        (job_manager.DbConnector, job_manager._get_function,
+         JobManager._INSTANCE) = self.saved
+
+    def test_job_results_are_paged_in_order(self):
+        job = self.manager.submit("Test", "Count", {"n": ["2500"]})
+        record = self.manager.get(job[UUID])
+        self.assertEqual(record[STATUS], JOB_STATUS.succeeded)  # @UndefinedVariable
+        self.assertEqual(record[PROGRESS], 1.0)
+        self.assertEqual(record["num_results"], 2500)
+        self.assertEqual(record["columns"], ["i"])
+        self.assertEqual(self.manager.get_results(job[UUID], 1000, 3),
+                         [{"i": 1000}, {"i": 1001}, {"i": 1002}])
+        self.assertEqual(self.manager.get_results(job[UUID], 2498),
+                         [{"i": 2498}, {"i": 2499}])
+
+    def test_failed_job_stores_no_results(self):
+        job = self.manager.submit("Test", "Count", {"n": ["13"]})
+        record = self.manager.get(job[UUID])
+        self.assertEqual(record[STATUS], JOB_STATUS.failed)  # @UndefinedVariable
+        self.assertEqual(record[ERROR], "Unlucky.")
+        self.assertEqual(self.manager.get_results(job[UUID]), [])
+
+    def test_invalid_submissions(self):
+        self.assertRaises(Exception, self.manager.submit, "Test", "Missing", {})
+        self.assertRaises(Exception, self.manager.submit, "Test", "Inline",
+                          {"n": ["1"]})
+        self.assertEqual(self.db_connector.collections[JOBS_COLLECTION], [])
+        self.assertEqual(self.manager.get("missing"), None)
+
+    def test_start_fails_interrupted_jobs(self):
+        self.db_connector.ensure_index = lambda *args: None
+        self.db_connector.insert(JOBS_COLLECTION, [{UUID: "a", STATUS: JOB_STATUS.running}])  # @UndefinedVariable
+        def update(collection, criteria, document, **kwargs):
+            for record in self.db_connector.collections[collection]:
+                if record[STATUS] in criteria[STATUS]["$in"]:
+                    record.update(document["$set"])
+        self.db_connector.update = update
+        self.manager.start()
+        self.assertEqual(self.manager.get("a")[STATUS], JOB_STATUS.failed)  # @UndefinedVariable
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
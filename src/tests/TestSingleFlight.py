@@ -0,0 +1,103 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import signal
+import threading
+import unittest
+
+from src.SingleFlight import SingleFlight
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.flights = SingleFlight("Test")
+        self.release = threading.Event()
+        self.calls   = []
+
+    def _blocked_call(self, key):
+        def function():
+            self.calls.append(key)
+            self.release.wait(10)
+            return key * 2
+        return function
+
+    def _start_leader(self, key):
+        thread = threading.Thread(target=self.flights.call,
+                                  args=(key, self._blocked_call(key)))
+        thread.start()
+        while self.flights.status()["in_flight"] == 0:
+            thread.join(0.01)
+        return thread
+
+    def test_concurrent_calls_are_shared(self):
+        results = []
+        def call():
+            results.append(self.flights.call(3, self._blocked_call(3)))
+        leader  = self._start_leader(3)
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while self.flights.status()["shared"] < 5:
+            leader.join(0.01)
+        self.release.set()
+        for thread in threads + [leader]:
+            thread.join()
+        self.assertEqual(results, [6] * 5)
+        self.assertEqual(self.calls, [3])
+        self.assertEqual(self.flights.status()["in_flight"], 0)
+
+    def test_errors_are_raised_and_forgotten(self):
+        def fail():
+            raise ValueError("Failed.")
+        self.assertRaises(ValueError, self.flights.call, 1, fail)
+        self.assertEqual(self.flights.call(1, lambda: 2), 2)
+
+    def test_forked_child_does_not_wait_on_parent_flights(self):
+        leader = self._start_leader(3)
+        (read_fd, write_fd) = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                # Kill the child rather than hang if it waits on the parent.
+                signal.alarm(10)
+                os.close(read_fd)
+                status = self.flights.status()
+                result = self.flights.call(3, lambda: 7)
+                os.write(write_fd, "%d %d" % (status["in_flight"], result))
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as reader:
+            output = reader.read()
+        os.waitpid(pid, 0)
+        self.release.set()
+        leader.join()
+        self.assertEqual(output, "0 7")
+        self.assertEqual(self.flights.status()["calls"], 1)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
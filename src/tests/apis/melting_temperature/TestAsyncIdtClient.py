@@ -0,0 +1,84 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:  Jul 29, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import unittest
+import time
+
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from src.CircuitBreaker import CircuitBreaker
+from src.apis.melting_temperature import asyncIdtClient
+from src.apis.melting_temperature.asyncIdtClient import AsyncIDTClient
+from src.apis.melting_temperature.localClient import LocalClient
+from src.tests.apis.melting_temperature.fake_idt_server import make_app
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+# Seconds the fake server takes to answer each request.
+_DELAY = 0.2
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return make_app(delay=_DELAY)
+
+    def setUp(self):
+        super(Test, self).setUp()
+        # The breaker is shared with IDTClient, which other tests may have
+        # tripped without access to IDT.
+        self.breaker = asyncIdtClient.BREAKER
+        asyncIdtClient.BREAKER = CircuitBreaker("Test IDT")
+        self.client = AsyncIDTClient(self.io_loop, max_clients=100,
+                                     wsdl_url=self.get_url("/AnalyzerService.asmx?wsdl"))
+        self.local_client = LocalClient()
+
+    def tearDown(self):
+        self.client.close()
+        asyncIdtClient.BREAKER = self.breaker
+        super(Test, self).tearDown()
+
+    @gen_test(timeout=30)
+    def test_melting_temps(self):
+        sequences = ["ACGTACGGTACCATGCAGTA"[i % 5:] + "ACGT"[i % 4] * (i % 6)
+                     for i in range(100)]
+        start    = time.time()
+        observed = yield self.client.get_melting_temps(sequences, 2, 50, 3, 0.2)
+        # Requests are in flight together rather than one after the other.
+        self.assertLess(time.time() - start, 10 * _DELAY)
+        self.assertEqual(observed,
+                         self.local_client.get_melting_temps(sequences, 2, 50, 3, 0.2))
+
+    @gen_test(timeout=30)
+    def test_self_dimer(self):
+        observed = yield self.client.self_dimer_check("ACGTACGTACGT")
+        expected = self.local_client.self_dimer_check("ACGTACGTACGT")
+        self.assertEqual(observed.self_dimer, bool(expected.self_dimer))
+        self.assertAlmostEqual(observed.deltaG, expected.deltaG)
+        self.assertAlmostEqual(observed.compPercent, expected.compPercent)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
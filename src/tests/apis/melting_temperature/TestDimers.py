@@ -0,0 +1,72 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:  Jul 14, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import unittest
+import random
+
+from src.apis.melting_temperature.dimers import hetero_dimers, \
+    screen_cross_dimers, MAX_CROSS_DIMER_THRESHOLD
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_NUM_PROBES = 150
+_THRESHOLD  = -7.0
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(4)
+        self.probes = [''.join(rng.choice('ACGT') for _ in range(rng.randint(18, 30)))
+                       for _ in range(_NUM_PROBES)]
+
+    def check_screen_matches_all_pairs(self, probes, threshold):
+        pairs = [(i, j) for i in range(len(probes))
+                 for j in range(i + 1, len(probes))]
+        results  = hetero_dimers([probes[i] for i, _ in pairs],
+                                 [probes[j] for _, j in pairs])
+        expected = set(pair for pair, result in zip(pairs, results)
+                       if result.deltaG <= threshold)
+        observed = set((i, j) for (i, j, _) in screen_cross_dimers(probes, threshold))
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual(observed, expected)
+
+    def test_screen_matches_all_pairs(self):
+        self.check_screen_matches_all_pairs(self.probes, _THRESHOLD)
+
+    def test_screen_at_max_threshold(self):
+        self.check_screen_matches_all_pairs(self.probes[:40], 
+                                            MAX_CROSS_DIMER_THRESHOLD)
+        self.assertRaises(Exception, screen_cross_dimers, self.probes, 
+                          MAX_CROSS_DIMER_THRESHOLD + 1)
+
+    def test_complementary_pair(self):
+        result = hetero_dimers(["ACGTTGCAGGCTAGCTAAGC"], ["GCTTAGCTAGCCTGCAACGT"])[0]
+        self.assertTrue(result.self_dimer)
+        self.assertEqual(result.compPercent, 100.0)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -24,8 +24,11 @@ import unittest
 import os
 import time
 import filecmp
+import threading
 
-from src.apis.melting_temperature.idtClient import IDTClient
+from src.CircuitBreaker import CircuitBreaker
+from src.apis.melting_temperature import idtClient
+from src.apis.melting_temperature.idtClient import IDTClient, TM_FLIGHTS
 
 #===============================================================================
 # Global Private Variables
@@ -40,6 +43,10 @@ _OBSERVED_RESULT_FILENAME = "observed_melting_temps.txt"
 class Test(unittest.TestCase):
     
     def setUp(self):
+        # The breaker is shared with every IDT client and may have been 
+        # tripped by other tests without access to IDT.
+        self.breaker = idtClient.BREAKER
+        idtClient.BREAKER = CircuitBreaker("Test IDT")
         self.idt_client = IDTClient()
         
         # Input Name,Sequence file
@@ -61,6 +68,9 @@ class Test(unittest.TestCase):
         self.assertTrue(os.path.isfile(expected_path))
         self.expected_result_path = expected_path
 
+    def tearDown(self):
+        idtClient.BREAKER = self.breaker
+
     def test_idt_client(self):
         observed_result_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 
                                             _OBSERVED_RESULT_FILENAME)
@@ -77,7 +87,38 @@ class Test(unittest.TestCase):
         msg = "Observed result (%s) doesn't match expected result (%s)" % (observed_result_path, self.expected_result_path)
         self.assertTrue(filecmp.cmp(self.expected_result_path, 
                                     observed_result_path), msg)
-            
+
+    def test_concurrent_lookups_share_call(self):
+        class SlowService(object):
+            num_calls = 0
+            def Analyze(self, *args):
+                SlowService.num_calls += 1
+                time.sleep(0.2)
+                return {'Errors': None, 'MinMeltTemp': 60.0,
+                        'MaxMeltTemp': 62.0, 'MeltTemp': 61.0}
+        class FakeClient(object):
+            service = SlowService()
+            def set_options(self, **kwargs):
+                pass
+            def clone(self):
+                return self
+        self.idt_client._client = FakeClient()
+
+        shared  = TM_FLIGHTS.status()["shared"]
+        results = list()
+        threads = [threading.Thread(target=lambda: results.append(
+                       self.idt_client.get_melting_temp("ACGTTGCAAGGCTTAA")))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(SlowService.num_calls, 1)
+        self.assertEqual([r.tm for r in results], [61.0] * 8)
+        self.assertEqual(TM_FLIGHTS.status()["shared"] - shared, 7)
+        self.assertEqual(TM_FLIGHTS.status()["in_flight"], 0)
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:  Jul 14, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import unittest
+import os
+import numpy as np
+
+from src.apis.melting_temperature.nearest_neighbor import \
+    sequence_melting_temperatures, window_thermodynamics, melting_temperature, \
+    melting_temperature_profile, sequence_thermodynamics, condition_grid, \
+    salt_corrections, melting_temperature_grid
+from src.utilities.bio_utilities import encode_sequence
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_EXPECTED_RESULT_FILENAME = "expected_melting_temps.txt"
+
+# Maximum difference (Celsius) from IDT allowed for any single sequence and on
+# average.
+_MAX_ERROR  = 2.5
+_MEAN_ERROR = 1.0
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        # Expected Name,Sequence/Tm file produced by IDT
+        expected_path = os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                                     _EXPECTED_RESULT_FILENAME)
+        self.assertTrue(os.path.isfile(expected_path))
+        self.sequences = list()
+        self.expected  = list()
+        with open(expected_path) as f:
+            f.readline()
+            for line in f:
+                fields = line.strip().split(",")
+                if len(fields) == 3 and float(fields[2]) > 0:
+                    self.sequences.append(fields[1])
+                    self.expected.append(float(fields[2]))
+        self.expected = np.array(self.expected)
+
+    def test_matches_idt(self):
+        observed = sequence_melting_temperatures(self.sequences)
+        errors   = np.abs(observed - self.expected)
+        self.assertLess(errors.max(), _MAX_ERROR)
+        self.assertLess(errors.mean(), _MEAN_ERROR)
+
+    def test_windows_match_sequences(self):
+        codes  = encode_sequence("ACGTTGCANNACGGATCCATGCATTAGCGGCTA")
+        length = 12
+        (dh, ds, gc_count) = window_thermodynamics(codes, length)
+        observed = melting_temperature(dh, ds, gc_count, length)
+        windows  = [codes[i:i+length] for i in range(len(codes) - length + 1)]
+        expected = sequence_melting_temperatures(windows)
+        self.assertTrue(np.array_equal(np.isnan(observed), np.isnan(expected)))
+        valid = ~np.isnan(expected)
+        self.assertTrue(np.allclose(observed[valid], expected[valid]))
+
+    def test_profile_matches_windows(self):
+        codes   = encode_sequence("ACGTTGCANNACGGATCCATGCATTAGCGGCTA")
+        lengths = [8, 12]
+        profile = melting_temperature_profile(codes, lengths)
+        self.assertEqual(profile.shape, (len(lengths), len(codes)))
+        for i, length in enumerate(lengths):
+            (dh, ds, gc_count) = window_thermodynamics(codes, length)
+            expected = melting_temperature(dh, ds, gc_count, length)
+            observed = profile[i, :len(expected)]
+            self.assertTrue(np.array_equal(np.isnan(observed), np.isnan(expected)))
+            valid = ~np.isnan(expected)
+            self.assertTrue(np.allclose(observed[valid], expected[valid]))
+            self.assertTrue(np.isnan(profile[i, len(expected):]).all())
+
+    def test_grid_matches_conditions(self):
+        (dh, ds, gc, lengths) = sequence_thermodynamics(self.sequences)
+        conditions = condition_grid([0.5, 2], [0, 20, 1000], [0, 1.5, 10], [0.2])
+        # Na+ and free Mg2+ may not both be absent.
+        valid = (conditions[1] > 0) | (conditions[2] > conditions[3])
+        conditions = [c[valid] for c in conditions]
+        grid = melting_temperature_grid(dh, ds, gc, lengths,
+                                        salt_corrections(*conditions))
+        self.assertEqual(grid.shape, (len(self.sequences), len(conditions[0])))
+        for j, condition in enumerate(zip(*conditions)):
+            expected = melting_temperature(dh, ds, gc, lengths, *condition)
+            self.assertTrue(np.allclose(grid[:, j], expected))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
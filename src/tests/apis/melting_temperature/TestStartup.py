@@ -0,0 +1,70 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:  Jul 28, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import unittest
+import os
+import sys
+import subprocess
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+# Imports the APIs in a fresh interpreter, failing if a SOAP client is created,
+# and prints the number of seconds spent importing.
+_IMPORT_SCRIPT = """
+import time
+import suds.client
+
+def fail(*args, **kwargs):
+    raise Exception("SOAP client created at import.")
+suds.client.Client = fail
+
+start = time.time()
+import src.apis.ApiManager
+print time.time() - start
+"""
+
+# Maximum number of seconds allowed to import the APIs.
+_MAX_IMPORT_SECONDS = 3.0
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def test_import_time(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                            os.pardir, os.pardir, os.pardir,
+                                            os.pardir))
+        process = subprocess.Popen([sys.executable, "-c", _IMPORT_SCRIPT],
+                                   cwd=root, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        (out, err) = process.communicate()
+        self.assertEqual(process.returncode, 0, err)
+
+        seconds = float(out.strip().splitlines()[-1])
+        print "Imported APIs in %.3f s." % seconds
+        self.assertLess(seconds, _MAX_IMPORT_SECONDS)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
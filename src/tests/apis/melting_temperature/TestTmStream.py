@@ -0,0 +1,93 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from tornado.web import Application
+from tornado.testing import AsyncHTTPTestCase
+
+from src.StreamingHandler import StreamingHandler
+from src.apis.melting_temperature.localClient import LocalClient
+from src.apis.melting_temperature.TmStreamFunction import TmStreamFunction
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_NUM_RECORDS = 1234
+
+#===============================================================================
+# Classes
+#===============================================================================
+class _FileTmStreamFunction(TmStreamFunction):
+    ''' Streams the melting temperatures of a FASTA file given by path. '''
+    path = None
+
+    @classmethod
+    def process_request(cls, params_dict):
+        items = cls._stream_melting_temps(cls.path, [2, 40, 2, 0.2], False, 0)
+        return (items, ["name", "sequence", "tm"], None)
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(AsyncHTTPTestCase):
+
+    def setUp(self):
+        self.tmp_dir   = tempfile.mkdtemp()
+        self.sequences = ["ACGTACGGTACCATGCAGTA"[i % 5:] + "ACGT"[i % 4] * (i % 9)
+                          for i in range(_NUM_RECORDS)]
+        _FileTmStreamFunction.path = os.path.join(self.tmp_dir, "probes.fasta")
+        with open(_FileTmStreamFunction.path, 'w') as f:
+            for i, sequence in enumerate(self.sequences):
+                print >>f, ">probe_%d\n%s" % (i, sequence)
+        super(Test, self).setUp()
+
+    def tearDown(self):
+        super(Test, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def get_app(self):
+        return Application([("/TmStream(?:/(.*))?", StreamingHandler,
+                             {"function": _FileTmStreamFunction()})])
+
+    def test_ndjson_rows(self):
+        response = self.fetch("/TmStream?format=ndjson&uuid=probes")
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in response.body.splitlines()]
+        tms  = LocalClient().get_melting_temps(self.sequences)
+        self.assertEqual([row["name"] for row in rows],
+                         ["probe_%d" % i for i in range(_NUM_RECORDS)])
+        self.assertEqual([row["sequence"] for row in rows], self.sequences)
+        self.assertEqual([row["tm"] for row in rows], [tm.tm for tm in tms])
+
+    def test_invalid_format(self):
+        response = self.fetch("/TmStream?format=xml&uuid=probes")
+        self.assertEqual(response.code, 500)
+
+if __name__ == "__main__":
+    unittest.main()
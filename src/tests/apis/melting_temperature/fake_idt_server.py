@@ -0,0 +1,202 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 29, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import sys
+import time
+
+from xml.etree import cElementTree as ElementTree
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.web import Application, RequestHandler, asynchronous
+
+from src.apis.melting_temperature.localClient import LocalClient
+from src.apis.melting_temperature.asyncIdtClient import AsyncIDTClient
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_NAMESPACE = "http://tempuri.org/"
+
+# Minimal document/literal WSDL in the shape of the IDT AnalyzerService, with
+# the endpoint filled in from the request.
+_WSDL = """<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+                  xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+                  xmlns:s="http://www.w3.org/2001/XMLSchema"
+                  xmlns:tns="%(ns)s" targetNamespace="%(ns)s">
+  <wsdl:types>
+    <s:schema elementFormDefault="qualified" targetNamespace="%(ns)s">
+      <s:element name="Analyze"><s:complexType><s:sequence>
+        <s:element name="Sequence" type="s:string"/>
+        <s:element name="NucleotideType" type="s:string"/>
+        <s:element name="OligoConc" type="s:double"/>
+        <s:element name="NaConc" type="s:double"/>
+        <s:element name="MgConc" type="s:double"/>
+        <s:element name="dNTPsConc" type="s:double"/>
+      </s:sequence></s:complexType></s:element>
+      <s:element name="AnalyzeResponse"><s:complexType><s:sequence>
+        <s:element name="AnalyzeResult" type="tns:OligoAnalysis"/>
+      </s:sequence></s:complexType></s:element>
+      <s:complexType name="OligoAnalysis"><s:sequence>
+        <s:element name="Errors" type="s:string"/>
+        <s:element name="MinMeltTemp" type="s:double"/>
+        <s:element name="MaxMeltTemp" type="s:double"/>
+        <s:element name="MeltTemp" type="s:double"/>
+      </s:sequence></s:complexType>
+      <s:element name="SelfDimer"><s:complexType><s:sequence>
+        <s:element name="Sequence" type="s:string"/>
+      </s:sequence></s:complexType></s:element>
+      <s:element name="SelfDimerResponse"><s:complexType><s:sequence>
+        <s:element name="SelfDimerResult" type="tns:DimerAnalysis"/>
+      </s:sequence></s:complexType></s:element>
+      <s:complexType name="DimerAnalysis"><s:sequence>
+        <s:element name="IsComplementPair" type="s:boolean"/>
+        <s:element name="MaxDeltaG" type="s:double"/>
+        <s:element name="ComplementarityPercent" type="s:double"/>
+      </s:sequence></s:complexType>
+    </s:schema>
+  </wsdl:types>
+  <wsdl:message name="AnalyzeSoapIn"><wsdl:part name="parameters" element="tns:Analyze"/></wsdl:message>
+  <wsdl:message name="AnalyzeSoapOut"><wsdl:part name="parameters" element="tns:AnalyzeResponse"/></wsdl:message>
+  <wsdl:message name="SelfDimerSoapIn"><wsdl:part name="parameters" element="tns:SelfDimer"/></wsdl:message>
+  <wsdl:message name="SelfDimerSoapOut"><wsdl:part name="parameters" element="tns:SelfDimerResponse"/></wsdl:message>
+  <wsdl:portType name="AnalyzerServiceSoap">
+    <wsdl:operation name="Analyze">
+      <wsdl:input message="tns:AnalyzeSoapIn"/><wsdl:output message="tns:AnalyzeSoapOut"/>
+    </wsdl:operation>
+    <wsdl:operation name="SelfDimer">
+      <wsdl:input message="tns:SelfDimerSoapIn"/><wsdl:output message="tns:SelfDimerSoapOut"/>
+    </wsdl:operation>
+  </wsdl:portType>
+  <wsdl:binding name="AnalyzerServiceSoap" type="tns:AnalyzerServiceSoap">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>
+    <wsdl:operation name="Analyze">
+      <soap:operation soapAction="%(ns)sAnalyze" style="document"/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input><wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>
+    <wsdl:operation name="SelfDimer">
+      <soap:operation soapAction="%(ns)sSelfDimer" style="document"/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input><wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>
+  </wsdl:binding>
+  <wsdl:service name="AnalyzerService">
+    <wsdl:port name="AnalyzerServiceSoap" binding="tns:AnalyzerServiceSoap">
+      <soap:address location="%(location)s"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>"""
+
+_RESPONSE = '<?xml version="1.0" encoding="utf-8"?>' \
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">' \
+            '<soap:Body>%s</soap:Body></soap:Envelope>'
+
+_FAULT = '<soap:Fault><faultcode>soap:Server</faultcode>' \
+         '<faultstring>%s</faultstring></soap:Fault>'
+
+#===============================================================================
+# Classes
+#===============================================================================
+class FakeAnalyzerHandler(RequestHandler):
+    '''
+    Answers Analyze and SelfDimer requests like the IDT AnalyzerService, with
+    values computed by the LocalClient, after an optional delay (seconds).
+    '''
+    _LOCAL_CLIENT = LocalClient()
+
+    def initialize(self, delay=0.0):
+        self._delay = delay
+
+    def get(self):
+        location = "%s://%s%s" % (self.request.protocol, self.request.host,
+                                  self.request.path)
+        self.set_header("Content-Type", "text/xml; charset=utf-8")
+        self.write(_WSDL % {"ns": _NAMESPACE, "location": location})
+
+    @asynchronous
+    @gen.coroutine
+    def post(self):
+        if self._delay > 0:
+            yield gen.Task(IOLoop.current().add_timeout, time.time() + self._delay)
+
+        self.set_header("Content-Type", "text/xml; charset=utf-8")
+        operation = self.request.headers.get("SOAPAction", "").strip('"')[len(_NAMESPACE):]
+        body      = ElementTree.fromstring(self.request.body)
+        arguments = dict((e.tag.split("}")[-1], e.text)
+                         for e in body.iter() if len(e) == 0)
+        if operation == "Analyze":
+            tm = self._LOCAL_CLIENT.get_melting_temp(arguments["Sequence"],
+                                                     float(arguments["OligoConc"]),
+                                                     float(arguments["NaConc"]),
+                                                     float(arguments["MgConc"]),
+                                                     float(arguments["dNTPsConc"]))
+            result = '<AnalyzeResponse xmlns="%s"><AnalyzeResult><Errors />' \
+                     '<MinMeltTemp>%s</MinMeltTemp><MaxMeltTemp>%s</MaxMeltTemp>' \
+                     '<MeltTemp>%s</MeltTemp></AnalyzeResult></AnalyzeResponse>' % \
+                     (_NAMESPACE, tm.min, tm.max, tm.tm)
+        elif operation == "SelfDimer":
+            dimer  = self._LOCAL_CLIENT.self_dimer_check(arguments["Sequence"])
+            result = '<SelfDimerResponse xmlns="%s"><SelfDimerResult>' \
+                     '<IsComplementPair>%s</IsComplementPair>' \
+                     '<MaxDeltaG>%s</MaxDeltaG>' \
+                     '<ComplementarityPercent>%s</ComplementarityPercent>' \
+                     '</SelfDimerResult></SelfDimerResponse>' % \
+                     (_NAMESPACE, str(bool(dimer.self_dimer)).lower(),
+                      dimer.deltaG, dimer.compPercent)
+        else:
+            self.set_status(500)
+            result = _FAULT % ("Unknown operation %s." % operation)
+        self.finish(_RESPONSE % result)
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def make_app(delay=0.0):
+    return Application([(r"/AnalyzerService.asmx", FakeAnalyzerHandler,
+                         {"delay": delay})])
+
+def benchmark(num_sequences=1000, delay=0.05, max_clients=100, port=8765):
+    '''
+    Time melting temperatures of num_sequences sequences requested at once
+    from a fake server answering each request after delay seconds.
+    '''
+    io_loop = IOLoop.instance()
+    make_app(delay).listen(port)
+    client = AsyncIDTClient(io_loop, max_clients=max_clients,
+                            wsdl_url="http://localhost:%d/AnalyzerService.asmx?wsdl" % port)
+    sequences = ["ACGTACGGTACCATGCAGTA"[i % 7:] + "ACGT"[i % 4] * (i % 5)
+                 for i in range(num_sequences)]
+
+    @gen.coroutine
+    def run():
+        start = time.time()
+        yield client.get_melting_temps(sequences)
+        raise gen.Return(time.time() - start)
+    seconds = io_loop.run_sync(run)
+    print "%d requests with %d in flight: %.2f s (%.0f requests/s)" % \
+        (num_sequences, max_clients, seconds, num_sequences / seconds)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:2]))
@@ -0,0 +1,117 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import time
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.apis.ApiConstants import UUID, FILEPATH
+from src.apis.probe_design import TargetIndexCache as cache_module
+from src.apis.probe_design.TargetIndexCache import TargetIndexCache
+from src.utilities.kmer_utilities import get_index_paths
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        TargetIndexCache._INSTANCE = None
+        self.cache   = TargetIndexCache.Instance()
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = random.Random(35)
+        self.target = {UUID: "targets", 
+                       FILEPATH: os.path.join(self.tmp_dir, "targets.fasta")}
+        with open(self.target[FILEPATH], 'w') as f:
+            for i in range(3):
+                f.write(">record_%d\n%s\n" % (i, ''.join(rng.choice("ACGT") 
+                                                         for _ in range(500))))
+
+    def tearDown(self):
+        TargetIndexCache._INSTANCE = None
+        shutil.rmtree(self.tmp_dir)
+
+    def slow_build(self, builds, seconds):
+        ''' A _build recording its calls and taking seconds per call. '''
+        def build(target, k):
+            builds.append((target[UUID], k))
+            time.sleep(seconds)
+            return (target[UUID], k)
+        return build
+
+    def test_build_persist_and_delete(self):
+        index = self.cache.get(self.target, 8)
+        self.assertEqual(index.k, 8)
+        self.assertEqual(index.record_names, ["record_0", "record_1", "record_2"])
+        self.assertTrue(self.cache.get(self.target, 8) is index)
+        self.assertTrue(len(get_index_paths(self.target[FILEPATH])) > 0)
+
+        # A new process (here, an evicted cache) loads the saved artifacts.
+        self.cache.evict(self.target[UUID])
+        self.assertEqual(list(self.cache.get(self.target, 8).kmers),
+                         list(index.kmers))
+
+        self.assertTrue(self.cache.delete(self.target))
+        self.assertEqual(get_index_paths(self.target[FILEPATH]), [])
+
+    def test_concurrent_gets_share_one_build(self):
+        builds = list()
+        self.cache._build = self.slow_build(builds, 0.2)
+        threads = [threading.Thread(target=self.cache.get, args=(self.target, 8))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(builds, [("targets", 8)])
+
+    def test_build_does_not_block_other_lookups(self):
+        builds = list()
+        self.cache._build = self.slow_build(builds, 0.05)
+        other = {UUID: "other", FILEPATH: self.target[FILEPATH]}
+        self.cache.get(other, 8)
+
+        self.cache._build = self.slow_build(builds, 1.0)
+        thread = threading.Thread(target=self.cache.get, args=(self.target, 8))
+        thread.start()
+        time.sleep(0.1)
+        start = time.time()
+        self.assertEqual(self.cache.get(other, 8), ("other", 8))
+        self.assertTrue(time.time() - start < 0.5)
+        thread.join()
+
+    def test_cache_is_bounded(self):
+        builds = list()
+        self.cache._build = self.slow_build(builds, 0)
+        for i in range(cache_module._MAX_INDEXES + 5):
+            self.cache.get({UUID: str(i), FILEPATH: ""}, 8)
+        self.cache.get({UUID: "0", FILEPATH: ""}, 8)
+        self.assertEqual(len(self.cache._indexes), cache_module._MAX_INDEXES)
+        self.assertEqual(builds.count(("0", 8)), 2)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,101 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import json
+import unittest
+
+from tornado.web import Application
+from tornado.wsgi import WSGIContainer
+from tornado.testing import AsyncHTTPTestCase
+
+from src.StreamingHandler import StreamingHandler
+from src.apis.ApiConstants import ID, UUID, FILENAME, TOMBSTONE
+from src.apis.probe_design.TargetsGetFunction import TargetsGetFunction
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_NUM_RECORDS = 2500
+
+#===============================================================================
+# Classes
+#===============================================================================
+class _FakeDbConnector(object):
+    ''' Generates targets records as the cursor of find_iter would. '''
+    def __init__(self):
+        self.criteria = None
+
+    def find_iter(self, collection, criteria, projection):
+        self.criteria = criteria
+        return ({UUID: "uuid_%d" % i, FILENAME: "targets_%d.fasta" % i}
+                for i in range(_NUM_RECORDS))
+
+class _FakeTargetsGetFunction(TargetsGetFunction):
+    _DB_CONNECTOR = _FakeDbConnector()
+
+def _fallback_app(environ, start_response):
+    ''' Stands in for Flask, answering with the request method. '''
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return ["Flask %s" % environ["REQUEST_METHOD"]]
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return Application([("/Targets(?:/(.*))?", StreamingHandler,
+                             {"function": _FakeTargetsGetFunction(),
+                              "fallback": WSGIContainer(_fallback_app)})])
+
+    def test_supports_streaming(self):
+        self.assertTrue(TargetsGetFunction.supports_streaming())
+
+    def test_json(self):
+        response = self.fetch("/Targets?format=json")
+        self.assertEqual(response.code, 200)
+        records = json.loads(response.body)[TargetsGetFunction.name()]
+        self.assertEqual([r[UUID] for r in records], 
+                         ["uuid_%d" % i for i in range(_NUM_RECORDS)])
+        self.assertEqual(_FakeTargetsGetFunction._DB_CONNECTOR.criteria,
+                         {TOMBSTONE: {"$exists": False}})
+        self.assertFalse(any(ID in r for r in records))
+
+    def test_csv(self):
+        response = self.fetch("/Targets?format=csv")
+        self.assertEqual(response.code, 200)
+        lines  = response.body.split("\n")
+        header = lines[0].split(",")
+        self.assertEqual(len(lines), _NUM_RECORDS + 1)
+        self.assertTrue(UUID in header and FILENAME in header)
+        rows = [dict(zip(header, line.split(","))) for line in lines[1:]]
+        self.assertEqual([row[FILENAME] for row in rows], 
+                         ["targets_%d.fasta" % i for i in range(_NUM_RECORDS)])
+
+    def test_other_methods_fall_back(self):
+        response = self.fetch("/Targets", method="POST", body="")
+        self.assertEqual(response.body, "Flask POST")
+        response = self.fetch("/Targets?uuid=uuid_1", method="DELETE")
+        self.assertEqual(response.body, "Flask DELETE")
+
+if __name__ == "__main__":
+    unittest.main()
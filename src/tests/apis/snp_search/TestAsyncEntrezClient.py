@@ -0,0 +1,114 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:  Jul 30, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import unittest
+
+from StringIO import StringIO
+from tornado.web import Application, RequestHandler
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from src.apis.snp_search.asyncEntrezClient import AsyncEntrezClient
+from src.apis.snp_search.ncbi_utilities import Entrez, snp_summary, \
+    unique_snps
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_ESEARCH = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE eSearchResult PUBLIC "-//NLM//DTD esearch 20060628//EN" "http://eutils.ncbi.nlm.nih.gov/eutils/dtd/20060628/esearch.dtd">
+<eSearchResult><Count>%d</Count><RetMax>%d</RetMax><RetStart>0</RetStart>
+<IdList>%s</IdList>
+<TranslationSet/><QueryTranslation>query</QueryTranslation>
+</eSearchResult>"""
+
+_DOCSUM = """<DocSum>
+  <Id>%(id)s</Id>
+  <Item Name="SNP_ID" Type="Integer">%(id)s</Item>
+  <Item Name="CHRPOS" Type="String">%(chr)s:%(pos)s</Item>
+  <Item Name="DOCSUM" Type="String">HGVS=NC_000007.13:g.%(pos)sA&gt;T|SEQ=[A/T]|GENE=BRAF:673</Item>
+  <Item Name="VALIDATED" Type="String">by-cluster,by-frequency</Item>
+</DocSum>"""
+
+_ESUMMARY = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE eSummaryResult PUBLIC "-//NLM//DTD eSummaryResult, 29 October 2004//EN" "http://eutils.ncbi.nlm.nih.gov/eutils/dtd/20041029/esummary-v1.dtd">
+<eSummaryResult>%s</eSummaryResult>"""
+
+# SNP ids (positions on chromosome 7) found in each interval, which overlap.
+_INTERVALS = [(140453130, 140453140), (140453135, 140453150)]
+
+#===============================================================================
+# Fake E-utilities
+#===============================================================================
+def _snp_ids(term):
+    (start, stop) = [int(x) for x in term.split("[")[0].split(":")]
+    return [str(pos) for pos in range(start, stop + 1, 3)]
+
+class _EsearchHandler(RequestHandler):
+    def get(self):
+        ids = _snp_ids(self.get_argument("term"))
+        self.write(_ESEARCH % (len(ids), len(ids),
+                               "".join("<Id>%s</Id>" % i for i in ids)))
+
+class _EsummaryHandler(RequestHandler):
+    def get(self):
+        ids = self.get_argument("id").split(",")
+        self.write(_ESUMMARY % "".join(_DOCSUM % {"id": i, "chr": 7, "pos": i}
+                                       for i in ids))
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(AsyncHTTPTestCase):
+
+    def get_app(self):
+        return Application([(r"/esearch.fcgi", _EsearchHandler),
+                            (r"/esummary.fcgi", _EsummaryHandler)])
+
+    def setUp(self):
+        super(Test, self).setUp()
+        self.client = AsyncEntrezClient(self.io_loop, max_rate=100,
+                                        base_url=self.get_url("/"))
+
+    def tearDown(self):
+        self.client.close()
+        super(Test, self).tearDown()
+
+    @gen_test(timeout=30)
+    def test_snps_in_intervals(self):
+        names = ["BRAF"] * len(_INTERVALS)
+        observed = yield self.client.snps_in_intervals(names, [7] * len(_INTERVALS),
+                                                       *zip(*_INTERVALS))
+
+        # Same SNPs as parsing the responses with Biopython.
+        snps = list()
+        for (start, stop) in _INTERVALS:
+            ids = _snp_ids("%d:%d[Base Position]" % (start, stop))
+            xml = _ESUMMARY % "".join(_DOCSUM % {"id": i, "chr": 7, "pos": i} for i in ids)
+            snps.extend(snp_summary("BRAF", snp) for snp in Entrez.read(StringIO(xml)))
+        expected = unique_snps(snps)
+        self.assertEqual(observed, expected)
+        self.assertEqual(len(observed), len(set(_snp_ids("140453130:140453140")) |
+                                            set(_snp_ids("140453135:140453150"))))
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,98 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import random
+import unittest
+
+from src.utilities.aho_corasick import AhoCorasick
+from src.utilities.bio_utilities import encode_sequence
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def naive_search(texts, patterns):
+    '''
+    Every (text index, pattern index, end) occurrence. Patterns containing
+    an N are never reported and N in a text matches nothing.
+    '''
+    found = set()
+    for (i, text) in enumerate(texts):
+        for (j, pattern) in enumerate(patterns):
+            if "N" in pattern:
+                continue
+            start = text.find(pattern)
+            while start >= 0:
+                found.add((i, j, start + len(pattern)))
+                start = text.find(pattern, start + 1)
+    return found
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(29)
+        self.texts = [''.join(rng.choice("ACGT") for _ in range(length))
+                      for length in (900, 50, 1, 400)]
+        self.texts[3] = self.texts[3][:200] + "NN" + self.texts[3][202:]
+
+        # Random substrings, patterns that are suffixes or prefixes of 
+        # others, duplicates, patterns spanning an N and absent patterns.
+        self.patterns = list()
+        for _ in range(80):
+            text   = self.texts[rng.choice([0, 1, 3])]
+            length = rng.randint(1, 12)
+            start  = rng.randrange(len(text) - length)
+            self.patterns.append(text[start:start + length])
+        self.patterns += [self.patterns[0][1:] or "A", self.patterns[1][:-1] or "C",
+                          self.patterns[2], self.texts[3][195:205], "ACGTN",
+                          "GATTACAGATTACA"]
+
+    def test_search_matches_naive_search(self):
+        automaton = AhoCorasick([encode_sequence(p) for p in self.patterns])
+        (texts, patterns, ends) = automaton.search([encode_sequence(t) 
+                                                    for t in self.texts])
+        observed = zip(texts.tolist(), patterns.tolist(), ends.tolist())
+        self.assertEqual(len(observed), len(set(observed)))
+        self.assertEqual(set(observed), naive_search(self.texts, self.patterns))
+
+    def test_scan_across_chunks(self):
+        automaton = AhoCorasick([encode_sequence(p) for p in self.patterns])
+        text      = "".join(self.texts)
+        expected  = set((j, end) for (_, j, end) in 
+                        naive_search([text], self.patterns))
+        for chunk_size in (7, 64, 4096):
+            (patterns, ends) = automaton.scan(encode_sequence(text), chunk_size)
+            observed = zip(patterns.tolist(), ends.tolist())
+            self.assertEqual(len(observed), len(set(observed)))
+            self.assertEqual(set(observed), expected)
+
+    def test_pattern_with_n_is_never_reported(self):
+        automaton = AhoCorasick([encode_sequence("ACNT"), encode_sequence("CG")])
+        self.assertEqual(list(automaton.pattern_lengths), [0, 2])
+        (_, patterns, ends) = automaton.search([encode_sequence("ACNTCG")])
+        self.assertEqual(zip(patterns.tolist(), ends.tolist()), [(1, 6)])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,107 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.utilities.bio_utilities import TwoBitFile, fasta_to_twobit, \
+    get_long_record_names, encode_sequence, MAX_TWOBIT_NAME_LENGTH
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def random_sequence(rng, length):
+    ''' A sequence made of runs of upper case, lower case and N bases. '''
+    sequence = ""
+    while len(sequence) < length:
+        bases     = rng.choice(["ACGT", "acgt", "N", "n", "ACGTR"])
+        sequence += ''.join(rng.choice(bases) for _ in range(rng.randint(1, 40)))
+    return sequence[:length]
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir     = tempfile.mkdtemp()
+        self.fasta_path  = os.path.join(self.tmp_dir, "targets.fasta")
+        self.twobit_path = self.fasta_path + ".2bit"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_fasta(self, records):
+        with open(self.fasta_path, 'w') as f:
+            for (name, sequence) in records:
+                f.write(">%s description\n" % name)
+                for i in range(0, len(sequence), 60):
+                    f.write(sequence[i:i+60] + "\n")
+
+    def test_round_trip(self):
+        rng     = random.Random(27)
+        records = [("record_%d" % i, random_sequence(rng, length))
+                   for (i, length) in enumerate([1, 3, 4, 5, 17, 250, 1001])]
+        records.append(("x" * MAX_TWOBIT_NAME_LENGTH, "ACGTn"))
+        self.write_fasta(records)
+        fasta_to_twobit(self.fasta_path, self.twobit_path)
+
+        twobit = TwoBitFile(self.twobit_path)
+        self.assertEqual(twobit.names, [name for (name, _) in records])
+        self.assertEqual(len(twobit), len(records))
+        for (i, (name, sequence)) in enumerate(records):
+            # Bases other than ACGT are stored as N.
+            expected = sequence.replace("R", "N")
+            self.assertTrue(name in twobit)
+            self.assertEqual(twobit.length(name), len(sequence))
+            self.assertEqual(twobit.get_sequence(name), expected)
+            self.assertEqual(twobit.get_sequence(i, soft_mask=False), 
+                             expected.upper())
+            self.assertEqual(list(twobit.get_codes(name)),
+                             list(encode_sequence(expected.upper())))
+            for _ in range(20):
+                start = rng.randint(0, len(sequence))
+                end   = rng.randint(start, len(sequence))
+                self.assertEqual(twobit.get_sequence(name, start, end), 
+                                 expected[start:end])
+                self.assertEqual(list(twobit.get_mask(name, start, end)),
+                                 [base.islower() for base in expected[start:end]])
+        self.assertFalse("missing" in twobit)
+        self.assertRaises(KeyError, twobit.length, "missing")
+
+    def test_long_record_names(self):
+        long_name = "x" * (MAX_TWOBIT_NAME_LENGTH + 1)
+        self.write_fasta([("short", "ACGT"), (long_name, "ACGT")])
+        self.assertEqual(get_long_record_names(self.fasta_path), [long_name])
+        with open(self.fasta_path) as f:
+            self.assertEqual(get_long_record_names(f), [long_name])
+            self.assertEqual(f.tell(), 0)
+        self.assertRaises(Exception, fasta_to_twobit, self.fasta_path,
+                          self.twobit_path)
+        self.assertEqual(os.listdir(self.tmp_dir), ["targets.fasta"])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,133 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import random
+import string
+import shutil
+import tempfile
+import unittest
+
+from src.utilities.bio_utilities import TwoBitFile, fasta_to_twobit, \
+    encode_sequence
+from src.utilities.kmer_utilities import KmerIndex, find_approximate
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_K          = 5
+_COMPLEMENT = string.maketrans("ACGTN", "TGCAN")
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def naive_find_approximate(records, probes, max_mismatches):
+    '''
+    Every (probe, record, strand, start, mismatches) hit within 
+    max_mismatches, N on either side counting as a mismatch.
+    '''
+    hits = set()
+    for (i, probe) in enumerate(probes):
+        for (strand, sequence) in enumerate([probe, probe[::-1].translate(_COMPLEMENT)]):
+            for (record, target) in enumerate(records):
+                for start in range(len(target) - len(sequence) + 1):
+                    window     = target[start:start + len(sequence)]
+                    mismatches = sum(a != b or a == "N" or b == "N"
+                                     for (a, b) in zip(sequence, window))
+                    if mismatches <= max_mismatches:
+                        hits.add((i, record, strand, start, mismatches))
+    return hits
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(31)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.records = [''.join(rng.choice("ACGT") for _ in range(length))
+                        for length in (700, 300)]
+        self.records[1] = self.records[1][:150] + "N" + self.records[1][151:]
+
+        # Probes taken from either strand with up to 3 substitutions, some 
+        # with an N, and probes overlapping the N of the targets.
+        self.probes = list()
+        for i in range(30):
+            record = self.records[rng.randrange(2)]
+            start  = rng.randrange(len(record) - 24)
+            probe  = list(record[start:start + rng.randint(20, 24)])
+            for _ in range(rng.randint(0, 3)):
+                probe[rng.randrange(len(probe))] = rng.choice("ACGTN" if i % 5 == 0 
+                                                              else "ACGT")
+            probe = "".join(probe)
+            self.probes.append(probe[::-1].translate(_COMPLEMENT) if i % 2 else probe)
+        self.probes.append(self.records[1][140:160].replace("N", "A"))
+        self.probes.append(self.records[1][141:161][::-1].translate(_COMPLEMENT).replace("N", "G"))
+
+        fasta_path = os.path.join(self.tmp_dir, "targets.fasta")
+        with open(fasta_path, 'w') as f:
+            for (i, record) in enumerate(self.records):
+                f.write(">record_%d\n%s\n" % (i, record))
+        fasta_to_twobit(fasta_path, fasta_path + ".2bit")
+        self.twobit_file = TwoBitFile(fasta_path + ".2bit")
+        self.index       = KmerIndex.from_twobit(self.twobit_file, _K)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def find(self, probes, max_mismatches):
+        hits = find_approximate(self.index, self.twobit_file, 
+                                [encode_sequence(probe) for probe in probes],
+                                max_mismatches)
+        return set((int(p), int(r), int(s), int(start), int(m)) 
+                   for (p, r, s, start, m) in zip(*hits))
+
+    def test_matches_naive_search(self):
+        for max_mismatches in range(4):
+            self.assertEqual(self.find(self.probes, max_mismatches),
+                             naive_find_approximate(self.records, self.probes,
+                                                    max_mismatches))
+
+    def test_n_in_target_counts_once(self):
+        target = "ACGTACGTACGTNCGTACGT"
+        probe  = "ACGTACGTACGTACGTACGT"
+        self.records[1] = self.records[1][:200] + target + self.records[1][220:]
+        fasta_path = os.path.join(self.tmp_dir, "n.fasta")
+        with open(fasta_path, 'w') as f:
+            for (i, record) in enumerate(self.records):
+                f.write(">record_%d\n%s\n" % (i, record))
+        fasta_to_twobit(fasta_path, fasta_path + ".2bit")
+        self.twobit_file = TwoBitFile(fasta_path + ".2bit")
+        self.index       = KmerIndex.from_twobit(self.twobit_file, _K)
+
+        hits = self.find([probe], 1)
+        self.assertTrue((0, 1, 0, 200, 1) in hits)
+        self.assertEqual(hits, naive_find_approximate(self.records, [probe], 1))
+
+    def test_probe_too_short_for_seeds(self):
+        self.assertRaises(Exception, find_approximate, self.index, 
+                          self.twobit_file, [encode_sequence("ACGTACGTAC")], 2)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
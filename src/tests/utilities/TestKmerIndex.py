@@ -0,0 +1,159 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import random
+import string
+import shutil
+import tempfile
+import unittest
+
+from src.utilities.bio_utilities import TwoBitFile, fasta_to_twobit, \
+    encode_sequence
+from src.utilities.kmer_utilities import KmerIndex, canonical_kmers
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_K          = 8
+_NUM_PROBES = 60
+_COMPLEMENT = string.maketrans("ACGTN", "TGCAN")
+
+#===============================================================================
+# Helper Functions
+#===============================================================================
+def reverse_complement(sequence):
+    return sequence[::-1].translate(_COMPLEMENT)
+
+def naive_find(records, probe):
+    '''
+    Every (record, strand, start) at which probe occurs exactly. N matches
+    nothing, not even N.
+    '''
+    hits = set()
+    if "N" in probe:
+        return hits
+    for (strand, sequence) in enumerate([probe, reverse_complement(probe)]):
+        for (record, target) in enumerate(records):
+            start = target.find(sequence)
+            while start >= 0:
+                hits.add((record, strand, start))
+                start = target.find(sequence, start + 1)
+    return hits
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(28)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.records = [''.join(rng.choice("ACGT") for _ in range(length))
+                        for length in (3000, 1500, 40)]
+        # Runs of N in the targets.
+        self.records[0] = self.records[0][:500] + "N" * 30 + self.records[0][530:]
+        self.records[1] = self.records[1][:700] + "N" + self.records[1][701:]
+
+        # Probes taken from either strand of the records, a few spanning N 
+        # and a few random (most likely absent).
+        self.probes = list()
+        for i in range(_NUM_PROBES):
+            record = self.records[rng.randrange(2)]
+            length = rng.randint(_K, 3 * _K)
+            start  = rng.randrange(len(record) - length)
+            probe  = record[start:start + length]
+            if i % 2:
+                probe = reverse_complement(probe)
+            self.probes.append(probe)
+        self.probes.append(self.records[0][490:510])
+        self.probes.append(self.records[1][690:710])
+        self.probes.append(''.join(rng.choice("ACGT") for _ in range(25)))
+        # A probe repeated within a record.
+        self.records[2] = self.records[2][:10] + self.probes[0][:_K + 2] + \
+                          self.records[2][10:]
+        self.probes.append(self.probes[0][:_K + 2])
+
+        fasta_path = os.path.join(self.tmp_dir, "targets.fasta")
+        with open(fasta_path, 'w') as f:
+            for (i, record) in enumerate(self.records):
+                f.write(">record_%d\n%s\n" % (i, record))
+        fasta_to_twobit(fasta_path, fasta_path + ".2bit")
+        self.prefix      = fasta_path + ".index"
+        self.twobit_file = TwoBitFile(fasta_path + ".2bit")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def find(self, index):
+        hits = index.find([encode_sequence(probe) for probe in self.probes])
+        observed = [set() for _ in self.probes]
+        for (probe, record, strand, start) in zip(*hits):
+            observed[probe].add((int(record), int(strand), int(start)))
+        return observed
+
+    def test_find_matches_naive_search(self):
+        index    = KmerIndex.from_twobit(self.twobit_file, _K)
+        observed = self.find(index)
+        for (i, probe) in enumerate(self.probes):
+            self.assertEqual(observed[i], naive_find(self.records, probe), probe)
+        self.assertTrue(any(strand == 1 for hits in observed
+                            for (_, strand, _) in hits))
+        # Probes spanning an N.
+        self.assertEqual(observed[-4], set())
+        self.assertEqual(observed[-3], set())
+        self.assertEqual(len(observed[-1]), 2)
+
+    def test_lookup_counts_kmers(self):
+        index = KmerIndex.from_twobit(self.twobit_file, _K)
+        kmers = [self.records[1][i:i + _K] for i in range(0, 1000, 97)] + \
+                [self.probes[-1][:_K], "ACGTACGT"]
+        (canonical, _, _, _) = canonical_kmers(encode_sequence("".join(kmers)), _K)
+        (lo, hi) = index.lookup(canonical[::_K])
+        for (kmer, count) in zip(kmers, hi - lo):
+            expected = sum(record[i:i + _K] in (kmer, reverse_complement(kmer))
+                           for record in self.records
+                           for i in range(len(record) - _K + 1))
+            self.assertEqual(count, expected, kmer)
+
+    def test_save_and_load(self):
+        index = KmerIndex.from_twobit(self.twobit_file, _K)
+        self.assertFalse(KmerIndex.exists(self.prefix))
+        index.save(self.prefix)
+        self.assertTrue(KmerIndex.exists(self.prefix))
+
+        loaded = KmerIndex.load(self.prefix, _K)
+        self.assertEqual(loaded.k, _K)
+        self.assertEqual(loaded.record_names, index.record_names)
+        self.assertEqual(list(loaded.kmers), list(index.kmers))
+        self.assertEqual(list(loaded.locations), list(index.locations))
+        self.assertEqual(list(loaded.record_lengths),
+                         [len(record) for record in self.records])
+        self.assertEqual(self.find(loaded), self.find(index))
+
+    def test_probe_shorter_than_k(self):
+        index = KmerIndex.from_twobit(self.twobit_file, _K)
+        self.assertRaises(Exception, index.find, [encode_sequence("ACG")])
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
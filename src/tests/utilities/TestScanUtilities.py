@@ -0,0 +1,85 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 31, 2014
+'''
+
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import random
+import string
+import shutil
+import tempfile
+import unittest
+
+from src.utilities.bio_utilities import fasta_to_twobit, encode_sequence
+from src.utilities.scan_utilities import build_probe_automaton, \
+    count_record_hits
+
+#===============================================================================
+# Global Private Variables
+#===============================================================================
+_COMPLEMENT = string.maketrans("ACGTN", "TGCAN")
+
+#===============================================================================
+# Test
+#===============================================================================
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(30)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.records = [''.join(rng.choice("ACGT") for _ in range(length))
+                        for length in (2000, 600, 30, 1200)]
+        self.records[3] = self.records[3][:100] + "N" * 10 + self.records[3][110:]
+
+        # Probes from either strand of the records, a probe spanning an N and
+        # a probe occurring several times in a record.
+        self.probes = list()
+        for i in range(40):
+            record = self.records[rng.choice([0, 1, 3])]
+            start  = rng.randrange(len(record) - 20)
+            probe  = record[start:start + 20]
+            self.probes.append(probe[::-1].translate(_COMPLEMENT) if i % 3 
+                               else probe)
+        self.probes.append(self.records[3][95:115])
+        self.records[2] = self.probes[0] + self.probes[0][:5] + self.probes[0]
+
+        fasta_path = os.path.join(self.tmp_dir, "targets.fasta")
+        with open(fasta_path, 'w') as f:
+            for (i, record) in enumerate(self.records):
+                f.write(">record_%d\n%s\n" % (i, record))
+        self.twobit_path = fasta_path + ".2bit"
+        fasta_to_twobit(fasta_path, self.twobit_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_count_record_hits_matches_naive_count(self):
+        automaton = build_probe_automaton([encode_sequence(p) for p in self.probes])
+        counts    = count_record_hits(automaton, len(self.probes), self.twobit_path)
+        expected  = [sum(1 for probe in self.probes if "N" not in probe and
+                         (probe in record or 
+                          probe[::-1].translate(_COMPLEMENT) in record))
+                     for record in self.records]
+        self.assertEqual(list(counts), expected)
+        self.assertEqual(counts[2], 1)
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,208 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 10, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import numpy as np
+
+from src.utilities.bio_utilities import N_CODE, pad_sequences
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+# Transition table columns: one per base code. Column N_CODE sends every
+# state back to the root, so patterns never match across an N.
+_NUM_CODES = N_CODE + 1
+
+#===============================================================================
+# Classes
+#===============================================================================
+class AhoCorasick(object):
+    '''
+    Aho-Corasick automaton over a set of patterns of base codes. The trie,
+    failure links and the complete transition function are stored in NumPy
+    arrays (one int32 row of next states per state) rather than in per-node
+    dictionaries, and are built one trie level at a time so that every step
+    is vectorized across all patterns. Patterns containing an N are never
+    reported.
+    '''
+    def __init__(self, patterns):
+        (padded, lengths) = pad_sequences(patterns)
+        has_n   = (padded == N_CODE) & \
+                  (np.arange(padded.shape[1]) < lengths[:, np.newaxis])
+        lengths[has_n.any(axis=1)] = 0
+
+        num_states  = 1 + lengths.sum()
+        goto        = np.empty((num_states, _NUM_CODES - 1), dtype=np.int32)
+        goto.fill(-1)
+        level_start = [0, 1]
+        nodes       = np.zeros(len(patterns), dtype=np.int64)
+        next_state  = 1
+        for depth in range(padded.shape[1]):
+            active = np.flatnonzero(lengths > depth)
+            if len(active) < 1:
+                break
+            keys = nodes[active] * (_NUM_CODES - 1) + padded[active, depth]
+            (unique_keys, inverse) = np.unique(keys, return_inverse=True)
+            children = np.arange(next_state, next_state + len(unique_keys))
+            goto[unique_keys // (_NUM_CODES - 1),
+                 unique_keys % (_NUM_CODES - 1)] = children
+            nodes[active] = children[inverse]
+            next_state   += len(unique_keys)
+            level_start.append(next_state)
+        num_states = next_state
+
+        # Patterns ending at each state, in CSR form.
+        nodes[lengths == 0] = -1
+        self._pattern_order   = np.argsort(nodes, kind='mergesort')
+        sorted_nodes          = nodes[self._pattern_order]
+        self._pattern_offsets = np.searchsorted(sorted_nodes,
+                                                np.arange(num_states + 1))
+        terminal = np.diff(self._pattern_offsets) > 0
+
+        # Failure links and the complete transition function, level by level.
+        # Every state's failure state lies on a shallower level, so its
+        # transitions are already complete when the level is processed.
+        delta     = np.zeros((num_states, _NUM_CODES), dtype=np.int32)
+        fail      = np.zeros(num_states, dtype=np.int32)
+        dict_link = np.empty(num_states, dtype=np.int32)
+        dict_link.fill(-1)
+        for code in range(_NUM_CODES - 1):
+            delta[0, code] = max(goto[0, code], 0)
+        for lo, hi in zip(level_start[:-1], level_start[1:]):
+            states = np.arange(lo, hi)
+            if lo > 0:
+                fail_states = fail[states]
+                has_output  = terminal[fail_states]
+                dict_link[states] = np.where(has_output, fail_states,
+                                             dict_link[fail_states])
+            for code in range(_NUM_CODES - 1):
+                children = goto[states, code]
+                has      = children >= 0
+                if lo > 0:
+                    delta[states, code] = np.where(has, children,
+                                                   delta[fail[states], code])
+                    fail[children[has]] = delta[fail[states[has]], code]
+                else:
+                    fail[children[has]] = 0
+
+        self._delta     = delta[:num_states]
+        self._fail      = fail[:num_states]
+        self._dict_link = dict_link[:num_states]
+        self._output    = np.where(terminal, np.arange(num_states),
+                                   self._dict_link).astype(np.int32)
+        self._lengths   = lengths
+
+    #===========================================================================
+    # Properties
+    #===========================================================================
+    @property
+    def num_states(self):
+        return len(self._delta)
+
+    @property
+    def transitions(self):
+        ''' num_states x 5 table of next states indexed by base code. '''
+        return self._delta
+
+    @property
+    def pattern_lengths(self):
+        ''' Length of each pattern (0 for patterns that are never reported). '''
+        return self._lengths
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def search(self, texts):
+        '''
+        Stream a set of texts (arrays of base codes) through the automaton in
+        lockstep, one column of every text per step. Return parallel arrays
+        of text index, pattern index and the end position (exclusive) of
+        every occurrence of every pattern in the texts.
+        '''
+        # Transposed so that each step reads one contiguous row.
+        columns = np.ascontiguousarray(pad_sequences(texts)[0].T)
+        states  = np.zeros(len(texts), dtype=np.int32)
+        matches = list()
+        for position, column in enumerate(columns):
+            states = self._delta[states, column]
+            matches.append(self._emit(states, position + 1))
+        return self._expand(matches)
+
+    def scan(self, codes, chunk_size=4096):
+        '''
+        Find every occurrence of every pattern in one long sequence of base
+        codes. The sequence is cut into chunks, overlapping by the length of
+        the longest pattern minus one, that are streamed through search() in
+        lockstep. An occurrence is reported by the chunk in which it ends.
+        Return parallel arrays of pattern index and end position (exclusive).
+        '''
+        overlap = max(int(self._lengths.max()) - 1, 0) if len(self._lengths) else 0
+        starts  = np.arange(0, len(codes), chunk_size)
+        firsts  = starts - np.minimum(starts, overlap)
+        chunks  = [codes[first:start + chunk_size]
+                   for first, start in zip(firsts, starts)]
+
+        (chunk_idxs, pattern_idxs, ends) = self.search(chunks)
+        ends = ends + firsts[chunk_idxs]
+        keep = ends > starts[chunk_idxs]
+        return pattern_idxs[keep], ends[keep]
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _emit(self, states, end):
+        '''
+        Return the (stream index, state, end) triples of the pattern states
+        reached at this step, following dictionary links for patterns that
+        are suffixes of longer ones.
+        '''
+        streams = np.flatnonzero(self._output[states] >= 0)
+        outputs = self._output[states[streams]]
+        found_streams = list()
+        found_states  = list()
+        while len(streams) > 0:
+            found_streams.append(streams)
+            found_states.append(outputs)
+            outputs = self._dict_link[outputs]
+            keep    = outputs >= 0
+            streams = streams[keep]
+            outputs = outputs[keep]
+        if not found_streams:
+            return None
+        found_streams = np.concatenate(found_streams)
+        return (found_streams, np.concatenate(found_states),
+                np.repeat(end, len(found_streams)))
+
+    def _expand(self, matches):
+        ''' Expand matched states into the patterns ending at them. '''
+        matches = [m for m in matches if m is not None]
+        if not matches:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty.copy(), empty.copy()
+        streams = np.concatenate([m[0] for m in matches])
+        states  = np.concatenate([m[1] for m in matches])
+        ends    = np.concatenate([m[2] for m in matches])
+
+        counts = self._pattern_offsets[states + 1] - self._pattern_offsets[states]
+        firsts = np.repeat(self._pattern_offsets[states], counts)
+        ranks  = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return (np.repeat(streams, counts).astype(np.int64),
+                self._pattern_order[firsts + ranks].astype(np.int64),
+                np.repeat(ends, counts).astype(np.int64))
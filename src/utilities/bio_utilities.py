@@ -19,8 +19,49 @@ limitations under the License.
 #===============================================================================
 # Imports
 #===============================================================================
+import os
+import struct
+import numpy as np
+
 from Bio import SeqIO
 
+#===============================================================================
+# Public Global Variables
+#===============================================================================
+TWOBIT_EXTENSION = ".2bit"
+
+# Record names are stored with a one byte length in the 2-bit index.
+MAX_TWOBIT_NAME_LENGTH = 255
+
+# Base codes used by the 2-bit format (and everything built on top of it).
+# The complement of a base code is code ^ 2. N_CODE marks any base that is
+# not A, C, G or T.
+T_CODE = 0
+C_CODE = 1
+A_CODE = 2
+G_CODE = 3
+N_CODE = 4
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_TWOBIT_SIGNATURE = 0x1A412743
+_TWOBIT_VERSION   = 0
+
+# ASCII byte -> base code
+_ENCODE = np.empty(256, dtype=np.uint8)
+_ENCODE.fill(N_CODE)
+for _base, _code in zip("TCAG", [T_CODE, C_CODE, A_CODE, G_CODE]):
+    _ENCODE[ord(_base)]         = _code
+    _ENCODE[ord(_base.lower())] = _code
+
+# Base code -> ASCII byte
+_DECODE = np.array([ord(b) for b in "TCAGN"], dtype=np.uint8)
+
+# Packed byte -> its four base codes (first base in the most significant bits)
+_UNPACK = np.array([[(b >> 6) & 3, (b >> 4) & 3, (b >> 2) & 3, b & 3]
+                    for b in range(256)], dtype=np.uint8)
+
 #===============================================================================
 # Utility Methods
 #===============================================================================
@@ -38,10 +79,289 @@ def validate_fasta(fasta):
         pass
     
     return len(identifiers) > 0
+
+def get_long_record_names(fasta):
+    '''
+    Return the names of the records of a FASTA (file path or file handle) too
+    long to be stored in a 2-bit file.
+    '''
+    names = [seq_record.id for seq_record in SeqIO.parse(fasta, "fasta")
+             if len(seq_record.id) > MAX_TWOBIT_NAME_LENGTH]
+
+    try:
+        # If input is a file handle, return it to the start of file.
+        fasta.seek(0)
+    except:
+        pass
+
+    return names
         
+def encode_sequence(sequence):
+    ''' Convert a sequence string into an array of base codes. '''
+    return _ENCODE[np.frombuffer(str(sequence), dtype=np.uint8)]
+
+def decode_sequence(codes, mask=None):
+    '''
+    Convert an array of base codes into a sequence string. If a boolean mask
+    is provided, masked bases are returned in lower case.
+    '''
+    ascii_bytes = _DECODE[codes]
+    if mask is not None:
+        ascii_bytes[mask] += ord('a') - ord('A')
+    return ascii_bytes.tostring()
+
+def decode_sequences(codes):
+    ''' Convert a 2D array of base codes into a list of sequence strings. '''
+    if codes.shape[1] < 1:
+        return [""] * len(codes)
+    ascii_bytes = np.ascontiguousarray(_DECODE[codes])
+    return ascii_bytes.view("S%d" % codes.shape[1]).ravel().tolist()
+
+def reverse_complement_codes(codes):
+    ''' Return the reverse complement of an array of base codes. '''
+    return np.where(codes == N_CODE, N_CODE, codes ^ 2)[::-1].astype(np.uint8)
+
+def pad_sequences(sequences, fill=N_CODE):
+    '''
+    Stack arrays of base codes of varying length into a 2D uint8 array padded
+    on the right with fill. Return the array and the sequence lengths.
+    '''
+    lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+    width   = lengths.max() if len(lengths) > 0 else 0
+    padded  = np.empty((len(sequences), width), dtype=np.uint8)
+    padded.fill(fill)
+    if len(sequences) > 0:
+        padded[np.arange(width) < lengths[:, np.newaxis]] = np.concatenate(sequences)
+    return padded, lengths
+
+def get_twobit_path(fasta_path):
+    ''' Path of the 2-bit file stored next to the provided FASTA file. '''
+    return fasta_path + TWOBIT_EXTENSION
+
+def fasta_to_twobit(fasta, twobit_path):
+    '''
+    Convert a FASTA file (path or file handle) into a UCSC .2bit file. Runs of
+    N and of lower case (soft-masked) bases are stored as interval lists. The
+    file is written to a temporary path first and renamed into place so that
+    readers never see a partially written file.
+    '''
+    records = list()
+    for seq_record in SeqIO.parse(fasta, "fasta"):
+        records.append((seq_record.id, _pack_record(str(seq_record.seq))))
+
+    try:
+        fasta.seek(0)
+    except:
+        pass
+
+    long_names = [name for name, _ in records 
+                  if len(name) > MAX_TWOBIT_NAME_LENGTH]
+    if long_names:
+        raise Exception("Record names must be at most %d characters long: %s" %
+                        (MAX_TWOBIT_NAME_LENGTH, ", ".join(long_names)))
+
+    index_size = sum(1 + len(name) + 4 for name, _ in records)
+    offset     = 16 + index_size
+    tmp_path   = twobit_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack("<IIII", _TWOBIT_SIGNATURE, _TWOBIT_VERSION,
+                            len(records), 0))
+        for name, packed_record in records:
+            f.write(struct.pack("<B", len(name)) + name)
+            f.write(struct.pack("<I", offset))
+            offset += len(packed_record)
+        for _, packed_record in records:
+            f.write(packed_record)
+    os.rename(tmp_path, twobit_path)
+
+#===============================================================================
+# Classes
+#===============================================================================
+class TwoBitFile(object):
+    '''
+    Read-only, memory-mapped access to a UCSC .2bit file. Regions are unpacked
+    on demand, so slicing a region only touches the pages backing that region
+    rather than the whole record. Records are addressed by name or by their
+    index in the file.
+    '''
+    def __init__(self, path):
+        self._path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+
+        signature = struct.unpack("<I", self._data[:4].tostring())[0]
+        if signature == _TWOBIT_SIGNATURE:
+            self._endian = "<"
+        elif signature == struct.unpack(">I", struct.pack("<I", _TWOBIT_SIGNATURE))[0]:
+            self._endian = ">"
+        else:
+            raise Exception("%s is not a 2bit file." % path)
+
+        (_, num_records, _) = self._unpack("III", 4)
+
+        self._names   = list()
+        self._offsets = list()
+        pos = 16
+        for _ in range(num_records):
+            name_size = int(self._data[pos])
+            self._names.append(self._data[pos+1:pos+1+name_size].tostring())
+            self._offsets.append(self._unpack("I", pos + 1 + name_size)[0])
+            pos += 1 + name_size + 4
+
+        self._name_indices = dict()
+        for i, name in enumerate(self._names):
+            self._name_indices.setdefault(name, i)
+        self._records = dict()
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def names(self):
+        ''' Record names in the order in which they appear in the file. '''
+        return list(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._name_indices
+
+    def length(self, record):
+        ''' Number of bases in the record. '''
+        return self._get_record(record)[0]
+
+    def get_codes(self, record, start=0, end=None):
+        '''
+        Return the base codes of record[start:end] as a uint8 array in which
+        N bases are N_CODE.
+        '''
+        (size, n_starts, n_sizes, _, _, dna_offset) = self._get_record(record)
+        (start, end) = self._clip(size, start, end)
+
+        first_byte = start // 4
+        last_byte  = (end + 3) // 4
+        packed     = self._data[dna_offset + first_byte:dna_offset + last_byte]
+        codes      = _UNPACK[packed].ravel()[start - 4*first_byte:end - 4*first_byte]
+
+        for (block_start, block_end) in self._overlapping(n_starts, n_sizes, start, end):
+            codes[block_start - start:block_end - start] = N_CODE
+        return codes
+
+    def get_mask(self, record, start=0, end=None):
+        ''' Return a boolean array marking soft-masked bases of record[start:end]. '''
+        (size, _, _, mask_starts, mask_sizes, _) = self._get_record(record)
+        (start, end) = self._clip(size, start, end)
+
+        mask = np.zeros(end - start, dtype=bool)
+        for (block_start, block_end) in self._overlapping(mask_starts, mask_sizes, start, end):
+            mask[block_start - start:block_end - start] = True
+        return mask
+
+    def get_sequence(self, record, start=0, end=None, soft_mask=True):
+        ''' Return record[start:end] as a string. '''
+        codes = self.get_codes(record, start, end)
+        mask  = self.get_mask(record, start, end) if soft_mask else None
+        return decode_sequence(codes, mask)
+
+    #===========================================================================
+    # Private Methods
+    #===========================================================================
+    def _unpack(self, fmt, pos):
+        fmt = self._endian + fmt
+        return struct.unpack(fmt, self._data[pos:pos+struct.calcsize(fmt)].tostring())
+
+    def _uint32_array(self, pos, count):
+        return self._data[pos:pos + 4*count].view(self._endian + "u4")
+
+    def _get_record(self, record):
+        '''
+        Parse (and cache) the record header: size, N blocks, mask blocks and
+        the offset of the packed DNA.
+        '''
+        if not isinstance(record, (int, long)):
+            if record not in self._name_indices:
+                raise KeyError("Record %s not found in %s." % (record, self._path))
+            record = self._name_indices[record]
+
+        if record not in self._records:
+            pos = self._offsets[record]
+            (size, n_count) = self._unpack("II", pos)
+            n_starts = self._uint32_array(pos + 8, n_count)
+            n_sizes  = self._uint32_array(pos + 8 + 4*n_count, n_count)
+            pos += 8 + 8*n_count
+            mask_count  = self._unpack("I", pos)[0]
+            mask_starts = self._uint32_array(pos + 4, mask_count)
+            mask_sizes  = self._uint32_array(pos + 4 + 4*mask_count, mask_count)
+            pos += 4 + 8*mask_count + 4
+            self._records[record] = (size, n_starts, n_sizes, mask_starts,
+                                     mask_sizes, pos)
+        return self._records[record]
+
+    @staticmethod
+    def _clip(size, start, end):
+        if end is None or end > size:
+            end = size
+        start = max(0, start)
+        if start > end:
+            start = end
+        return (start, end)
+
+    @staticmethod
+    def _overlapping(block_starts, block_sizes, start, end):
+        ''' Yield (start, end) of the blocks overlapping [start, end). '''
+        if len(block_starts) < 1:
+            return
+        # Blocks are sorted and disjoint, so only the block preceding start
+        # can straddle it.
+        first = max(0, np.searchsorted(block_starts, start, side='right') - 1)
+        last  = np.searchsorted(block_starts, end, side='left')
+        for i in range(first, last):
+            block_start = max(start, int(block_starts[i]))
+            block_end   = min(end, int(block_starts[i]) + int(block_sizes[i]))
+            if block_start < block_end:
+                yield (block_start, block_end)
+
+#===============================================================================
+# Private Helper Methods
+#===============================================================================
+def _runs(flags):
+    ''' Return the starts and sizes of the runs of True in a boolean array. '''
+    edges  = np.diff(np.concatenate(([0], flags.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends   = np.flatnonzero(edges == -1)
+    return starts.astype(np.uint32), (ends - starts).astype(np.uint32)
+
+def _pack_record(sequence):
+    ''' Pack a sequence string into a .2bit record (header and packed DNA). '''
+    ascii_bytes = np.frombuffer(sequence, dtype=np.uint8)
+    codes       = _ENCODE[ascii_bytes]
+    (n_starts, n_sizes)       = _runs(codes == N_CODE)
+    (mask_starts, mask_sizes) = _runs(ascii_bytes >= ord('a'))
+
+    # N bases are stored as T and restored from the N blocks when reading.
+    codes = np.where(codes == N_CODE, T_CODE, codes).astype(np.uint8)
+    codes = np.concatenate((codes, np.zeros(-len(codes) % 4, dtype=np.uint8)))
+    codes = codes.reshape(-1, 4)
+    packed = (codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]
+
+    return "".join([
+                    struct.pack("<II", len(sequence), len(n_starts)),
+                    n_starts.astype("<u4").tostring(),
+                    n_sizes.astype("<u4").tostring(),
+                    struct.pack("<I", len(mask_starts)),
+                    mask_starts.astype("<u4").tostring(),
+                    mask_sizes.astype("<u4").tostring(),
+                    struct.pack("<I", 0),
+                    packed.astype(np.uint8).tostring(),
+                   ])
+
 #===============================================================================
 # Run Main
 #===============================================================================
 if __name__ == "__main__":
     fasta_file = "../../full.fasta"
-    print validate_fasta(fasta_file)
\ No newline at end of file
+    print validate_fasta(fasta_file)
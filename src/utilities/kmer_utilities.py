@@ -0,0 +1,510 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 9, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import os
+import glob
+import numpy as np
+
+from collections import namedtuple
+
+from src.utilities.bio_utilities import N_CODE, pad_sequences, \
+    reverse_complement_codes
+
+#===============================================================================
+# Public Global Variables
+#===============================================================================
+MAX_K = 32
+
+# Version of the on-disk KmerIndex layout, part of the artifact file names so
+# that artifacts written by an older layout are rebuilt rather than misread.
+INDEX_VERSION = 1
+
+# Exact probe hits: parallel arrays of probe index, record index, strand
+# (0 = probe found as given, 1 = reverse complement found) and 0-based start
+# of the hit on the forward strand of the record.
+ProbeHits = namedtuple('ProbeHits', 'probes records strands starts')
+
+# Probe hits within a Hamming distance, with the number of mismatches of each.
+ApproximateHits = namedtuple('ApproximateHits',
+                             'probes records strands starts mismatches')
+
+#===============================================================================
+# Private Global Variables
+#===============================================================================
+_BASES_PER_WORD = 32
+_LOW_BITS       = np.uint64(0x5555555555555555)
+_POPCOUNT       = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Arrays of a KmerIndex persisted as <prefix>.<name>.npy
+_INDEX_ARRAYS = ["kmers", "locations", "record_offsets", "record_names"]
+
+#===============================================================================
+# Utility Methods
+#===============================================================================
+def kmer_values(codes, k):
+    '''
+    Return the 2-bit packed forward and reverse complement values (uint64) of
+    every k-mer in codes, along with a boolean array that is False for k-mers
+    containing an N. The i-th entries describe codes[i:i+k].
+    '''
+    if not 0 < k <= MAX_K:
+        raise Exception("k must be between 1 and %d but is %d." % (MAX_K, k))
+
+    num_kmers = len(codes) - k + 1
+    if num_kmers < 1:
+        empty = np.zeros(0, dtype=np.uint64)
+        return empty, empty.copy(), np.zeros(0, dtype=bool)
+
+    is_n    = codes == N_CODE
+    bases   = np.where(is_n, 0, codes).astype(np.uint64)
+    forward = np.zeros(num_kmers, dtype=np.uint64)
+    reverse = np.zeros(num_kmers, dtype=np.uint64)
+    two     = np.uint64(2)
+    for j in range(k):
+        column  = bases[j:j + num_kmers]
+        forward = (forward << two) | column
+        reverse = reverse | ((column ^ two) << np.uint64(2 * j))
+
+    n_counts = np.concatenate(([0], np.cumsum(is_n)))
+    valid    = n_counts[k:] == n_counts[:num_kmers]
+    return forward, reverse, valid
+
+def canonical_kmers(codes, k):
+    '''
+    Return the canonical (smaller of forward and reverse complement) value of
+    every k-mer in codes, a uint8 array that is 1 where the canonical value is
+    the reverse complement, a boolean array marking palindromic k-mers and the
+    validity array from kmer_values.
+    '''
+    (forward, reverse, valid) = kmer_values(codes, k)
+    canonical = np.minimum(forward, reverse)
+    return canonical, (forward > reverse).astype(np.uint8), forward == reverse, valid
+
+def probe_tiles(length, k):
+    '''
+    Offsets of the k-mers used to look up a probe: consecutive non-overlapping
+    tiles plus a final tile flush with the end of the probe. Together they
+    cover every base, so a location matching all tiles matches the probe.
+    '''
+    offsets = range(0, length - k + 1, k)
+    if offsets[-1] != length - k:
+        offsets.append(length - k)
+    return offsets
+
+def pack_codes(codes):
+    '''
+    Pack a 2D array of base codes (0-3) into uint64 words of 32 bases each,
+    first base in the most significant bits. Rows are padded with T (0).
+    '''
+    (num_rows, width) = codes.shape
+    num_words = -(-width // _BASES_PER_WORD)
+    padded    = np.zeros((num_rows, num_words * _BASES_PER_WORD), dtype=np.uint64)
+    padded[:, :width] = codes
+    padded    = padded.reshape(num_rows, num_words, _BASES_PER_WORD)
+    words     = np.zeros((num_rows, num_words), dtype=np.uint64)
+    for j in range(_BASES_PER_WORD):
+        words |= padded[:, :, j] << np.uint64(2 * (_BASES_PER_WORD - 1 - j))
+    return words
+
+def hamming_distances(words_a, words_b):
+    '''
+    Row-wise number of differing bases between two arrays of packed words:
+    XOR the words, fold each 2-bit base onto its low bit and popcount the
+    bytes with a lookup table.
+    '''
+    diff = words_a ^ words_b
+    diff = (diff | (diff >> np.uint64(1))) & _LOW_BITS
+    return _POPCOUNT[np.ascontiguousarray(diff).view(np.uint8)].sum(axis=1)
+
+def find_approximate(index, twobit_file, probes, max_mismatches):
+    '''
+    Find every occurrence, on either strand, of each probe within
+    max_mismatches substitutions in the records of twobit_file, using the
+    KmerIndex built over that file. By the pigeonhole principle a hit with at
+    most d mismatches matches at least one of d + 1 disjoint seeds of its
+    probe exactly, so only seed hits are verified. Candidates are verified
+    record by record by comparing 2-bit packed words. N bases (in the probe
+    or the target) always count as mismatches.
+    '''
+    k                 = index.k
+    num_seeds         = max_mismatches + 1
+    (padded, lengths) = pad_sequences(probes)
+    if len(probes) < 1 or (lengths < num_seeds * k).any():
+        raise Exception("Probes must be at least %d bases long to allow %d " \
+                        "mismatches with k = %d." % (num_seeds * k, max_mismatches, k))
+
+    seed_probes  = np.repeat(np.arange(len(probes)), num_seeds)
+    seed_offsets = np.tile(np.arange(num_seeds) * k, len(probes))
+    seeds        = padded[seed_probes[:, np.newaxis],
+                          seed_offsets[:, np.newaxis] + np.arange(k)]
+    (seed_idxs, records, strands, starts) = \
+        index.seed_hits(seeds, seed_offsets, lengths[seed_probes])
+
+    candidate_probes = seed_probes[seed_idxs]
+    if len(candidate_probes) < 1:
+        empty = np.zeros(0, dtype=np.int64)
+        return ApproximateHits(empty, empty, empty.astype(np.uint8), empty, empty)
+
+    # Several seeds of a probe can imply the same candidate.
+    keys   = (records.astype(np.int64) << 33) | \
+             (strands.astype(np.int64) << 32) | starts
+    order  = np.lexsort((keys, candidate_probes))
+    keys   = keys[order]
+    firsts = order[np.concatenate(([True],
+                   (candidate_probes[order][1:] != candidate_probes[order][:-1]) |
+                   (keys[1:] != keys[:-1])))]
+    (candidate_probes, records, strands, starts) = \
+        (candidate_probes[firsts], records[firsts], strands[firsts], starts[firsts])
+
+    # Compare each candidate window with the probe, or with its reverse 
+    # complement for hits on the reverse strand. Positions past the end of a
+    # probe, or holding an N on either side, are zeroed on both sides and the
+    # N positions counted separately.
+    width        = padded.shape[1]
+    in_probe     = np.arange(width) < lengths[:, np.newaxis]
+    reverse      = pad_sequences([reverse_complement_codes(p) for p in probes])[0]
+    probe_codes  = [padded, reverse]
+    probe_n      = [(padded == N_CODE) & in_probe, (reverse == N_CODE) & in_probe]
+
+    mismatches = np.zeros(len(starts), dtype=np.int64)
+    for record in np.unique(records):
+        selected = np.flatnonzero(records == record)
+        codes    = twobit_file.get_codes(int(record))
+        window   = np.minimum(starts[selected, np.newaxis] + np.arange(width), len(codes) - 1)
+        window   = codes[window]
+        valid    = in_probe[candidate_probes[selected]]
+        for strand in (0, 1):
+            on_strand = strands[selected] == strand
+            rows      = selected[on_strand]
+            probe_idx = candidate_probes[rows]
+            is_n      = valid[on_strand] & ((window[on_strand] == N_CODE) |
+                                            probe_n[strand][probe_idx])
+            compared  = valid[on_strand] & ~is_n
+            target    = pack_codes(np.where(compared, window[on_strand], 0))
+            probe     = pack_codes(np.where(compared, probe_codes[strand][probe_idx], 0))
+            mismatches[rows] = hamming_distances(target, probe) + is_n.sum(axis=1)
+
+    keep = mismatches <= max_mismatches
+    return ApproximateHits(candidate_probes[keep], records[keep],
+                           strands[keep].astype(np.uint8), starts[keep],
+                           mismatches[keep])
+
+def get_index_prefix(fasta_path, k):
+    ''' Prefix of the k-mer index artifacts stored next to a FASTA file. '''
+    return "%s.%dmer.v%d" % (fasta_path, k, INDEX_VERSION)
+
+def get_index_paths(fasta_path):
+    ''' Index artifacts, of any k and version, stored next to a FASTA file. '''
+    return glob.glob(fasta_path + ".*mer.v*")
+
+def _index_array_path(prefix, name):
+    return "%s.%s.npy" % (prefix, name)
+
+#===============================================================================
+# Classes
+#===============================================================================
+class KmerIndex(object):
+    '''
+    Sorted array index of the canonical k-mers of a set of records (e.g. the
+    records of a targets file). Each k-mer occurrence is stored as a location
+    ((global offset << 1) | orientation) where the global offset is relative
+    to the concatenation of the records, and record_offsets holds the global
+    offset at which each record starts. Lookups are vectorized binary searches
+    over the sorted k-mer array.
+    '''
+    def __init__(self, k, kmers, locations, record_offsets, record_names):
+        self._k              = k
+        self._kmers          = kmers
+        self._locations      = locations
+        self._record_offsets = record_offsets
+        self._record_names   = record_names
+
+    @classmethod
+    def from_twobit(cls, twobit_file, k):
+        ''' Build the index over every record of a TwoBitFile. '''
+        kmers          = list()
+        locations      = list()
+        record_offsets = [0]
+        for i in range(len(twobit_file)):
+            codes = twobit_file.get_codes(i)
+            (canonical, orientation, _, valid) = canonical_kmers(codes, k)
+            positions = np.arange(len(canonical), dtype=np.uint64) + \
+                        np.uint64(record_offsets[-1])
+            kmers.append(canonical[valid])
+            locations.append((positions[valid] << np.uint64(1)) |
+                             orientation[valid].astype(np.uint64))
+            record_offsets.append(record_offsets[-1] + len(codes))
+
+        kmers     = np.concatenate(kmers) if kmers else np.zeros(0, np.uint64)
+        locations = np.concatenate(locations) if locations else np.zeros(0, np.uint64)
+
+        # Sorting values is several times faster than argsort, so when a k-mer
+        # and its location fit in 64 bits they are sorted as one value.
+        location_bits = (2 * record_offsets[-1] + 1).bit_length()
+        if 2 * k + location_bits <= 64:
+            shift  = np.uint64(location_bits)
+            packed = (kmers << shift) | locations
+            del kmers, locations
+            packed.sort()
+            kmers     = packed >> shift
+            locations = packed & np.uint64((1 << location_bits) - 1)
+        else:
+            order     = np.argsort(kmers, kind='mergesort')
+            kmers     = kmers[order]
+            locations = locations[order]
+        return cls(k, kmers, locations, np.array(record_offsets, dtype=np.uint64),
+                   twobit_file.names)
+
+    @classmethod
+    def exists(cls, prefix):
+        ''' True if every artifact of an index saved under prefix exists. '''
+        return all(os.path.exists(_index_array_path(prefix, name))
+                   for name in _INDEX_ARRAYS)
+
+    @classmethod
+    def load(cls, prefix, k):
+        '''
+        Load an index saved under prefix. Arrays are memory-mapped read-only,
+        so loading is near-instant and processes loading the same index share
+        its pages through the page cache.
+        '''
+        arrays = dict()
+        for name in _INDEX_ARRAYS:
+            arrays[name] = np.load(_index_array_path(prefix, name), mmap_mode='r')
+        return cls(k, arrays["kmers"], arrays["locations"],
+                   arrays["record_offsets"],
+                   [str(name) for name in arrays["record_names"]])
+
+    #===========================================================================
+    # Properties
+    #===========================================================================
+    @property
+    def k(self):
+        return self._k
+
+    @property
+    def kmers(self):
+        return self._kmers
+
+    @property
+    def locations(self):
+        return self._locations
+
+    @property
+    def record_offsets(self):
+        return self._record_offsets
+
+    @property
+    def record_names(self):
+        return self._record_names
+
+    @property
+    def record_lengths(self):
+        return np.diff(self._record_offsets)
+
+    #===========================================================================
+    # Public Methods
+    #===========================================================================
+    def save(self, prefix):
+        '''
+        Write each array of the index to <prefix>.<name>.npy. Every file is
+        written to a temporary path and renamed into place, record names last,
+        so that an index is never loaded from partially written files.
+        '''
+        arrays = {"kmers": self._kmers,
+                  "locations": self._locations,
+                  "record_offsets": self._record_offsets,
+                  "record_names": np.array(self._record_names, dtype=np.string_)}
+        for name in _INDEX_ARRAYS:
+            path     = _index_array_path(prefix, name)
+            tmp_path = "%s.tmp%d" % (path, os.getpid())
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arrays[name])
+            os.rename(tmp_path, path)
+
+    def lookup(self, canonical):
+        '''
+        Return the [lo, hi) ranges of the sorted k-mer array matching each of
+        the provided canonical k-mer values.
+        '''
+        lo = np.searchsorted(self._kmers, canonical, side='left')
+        hi = np.searchsorted(self._kmers, canonical, side='right')
+        return lo, hi
+
+    def seed_hits(self, seeds, seed_offsets, probe_lengths):
+        '''
+        Look up k-mer seeds taken from probes and return, for every seed hit,
+        the index of the seed, the record index, the strand of the probe and
+        the start of the probe implied by the hit. seeds is a 2D array of seed
+        base codes, seed_offsets the offset of each seed within its probe and
+        probe_lengths the length of the probe each seed was taken from.
+        '''
+        k = self._k
+        (canonical, orientation, palindromic, valid) = \
+            canonical_kmers(seeds.ravel(), k)
+        # Only k-mers starting at a seed boundary are seeds.
+        starts      = np.arange(len(seeds)) * seeds.shape[1]
+        canonical   = canonical[starts]
+        orientation = orientation[starts]
+        palindromic = palindromic[starts]
+        valid       = valid[starts]
+
+        (lo, hi) = self.lookup(canonical)
+        counts   = np.where(valid, hi - lo, 0)
+        seed_ids = np.repeat(np.arange(len(seeds)), counts)
+        ranks    = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        hits     = lo[seed_ids] + ranks
+
+        # A palindromic seed matches both strands, so consider those hits twice.
+        doubled  = np.flatnonzero(palindromic[seed_ids])
+        hits     = np.concatenate((hits, hits[doubled]))
+        seed_ids = np.concatenate((seed_ids, seed_ids[doubled]))
+        flipped  = np.concatenate((np.zeros(len(hits) - len(doubled), dtype=bool),
+                                   np.ones(len(doubled), dtype=bool)))
+
+        locations     = self._locations[hits]
+        global_starts = (locations >> np.uint64(1)).astype(np.int64)
+        target_orient = (locations & np.uint64(1)).astype(np.uint8)
+        strands       = (target_orient != orientation[seed_ids]) ^ flipped
+
+        offsets = np.asarray(seed_offsets)[seed_ids]
+        lengths = np.asarray(probe_lengths)[seed_ids]
+        starts  = np.where(strands, global_starts - (lengths - offsets - k),
+                           global_starts - offsets)
+
+        records = np.searchsorted(self._record_offsets, global_starts,
+                                  side='right') - 1
+        record_starts = self._record_offsets[records].astype(np.int64)
+        record_ends   = self._record_offsets[records + 1].astype(np.int64)
+        starts       -= record_starts
+
+        # Discard hits implying a probe that runs off the end of its record.
+        in_record = (starts >= 0) & (starts + lengths <= record_ends - record_starts)
+        return (seed_ids[in_record], records[in_record],
+                strands[in_record].astype(np.uint8), starts[in_record])
+
+    def find(self, probes):
+        '''
+        Find every exact occurrence, on either strand, of each probe (an array
+        of base codes at least k long). Every probe is split into k-mer tiles
+        that are all looked up at once. A location is reported only if it is
+        implied by every tile of the probe.
+        '''
+        k = self._k
+        tile_probes  = list()
+        tile_offsets = list()
+        tile_codes   = list()
+        num_tiles    = np.zeros(len(probes), dtype=np.int64)
+        for i, probe in enumerate(probes):
+            if len(probe) < k:
+                raise Exception("Probe of length %d is shorter than k (%d)." % (len(probe), k))
+            offsets = probe_tiles(len(probe), k)
+            num_tiles[i] = len(offsets)
+            for offset in offsets:
+                tile_probes.append(i)
+                tile_offsets.append(offset)
+                tile_codes.append(probe[offset:offset + k])
+
+        empty = np.zeros(0, dtype=np.int64)
+        if not tile_codes:
+            return ProbeHits(empty, empty, empty.astype(np.uint8), empty)
+
+        tile_probes   = np.array(tile_probes, dtype=np.int64)
+        probe_lengths = np.array([len(p) for p in probes], dtype=np.int64)
+        (tiles, records, strands, starts) = \
+            self.seed_hits(np.vstack(tile_codes), tile_offsets,
+                           probe_lengths[tile_probes])
+        if len(tiles) < 1:
+            return ProbeHits(empty, empty, empty.astype(np.uint8), empty)
+
+        # Group hits by (probe, record, strand, start) and keep the groups
+        # supported by every tile of their probe.
+        hit_probes = tile_probes[tiles]
+        keys       = (records.astype(np.int64) << 33) | \
+                     (strands.astype(np.int64) << 32) | starts
+        order      = np.lexsort((keys, hit_probes))
+        hit_probes = hit_probes[order]
+        keys       = keys[order]
+
+        boundaries = np.flatnonzero(np.concatenate(([True],
+                                   (hit_probes[1:] != hit_probes[:-1]) |
+                                   (keys[1:] != keys[:-1]), [True])))
+        group_sizes  = np.diff(boundaries)
+        group_firsts = boundaries[:-1]
+        complete     = group_firsts[group_sizes == num_tiles[hit_probes[group_firsts]]]
+
+        keys = keys[complete]
+        return ProbeHits(hit_probes[complete], keys >> 33,
+                         ((keys >> 32) & 1).astype(np.uint8),
+                         keys & 0xFFFFFFFF)
+
+#===============================================================================
+# Run Main
+#===============================================================================
+if __name__ == "__main__":
+    # Benchmark off-target search of a probe panel against a random genome.
+    import os
+    import time
+    import tempfile
+
+    from src.utilities.bio_utilities import TwoBitFile, fasta_to_twobit, \
+        decode_sequence
+
+    num_records   = 12
+    record_length = 2000000
+    num_probes    = 10000
+    probe_length  = 40
+
+    random_state = np.random.RandomState(0)
+    records      = [random_state.randint(0, 4, record_length).astype(np.uint8)
+                    for _ in range(num_records)]
+    (fd, fasta_path) = tempfile.mkstemp(suffix=".fasta")
+    with os.fdopen(fd, 'w') as f:
+        for i, record in enumerate(records):
+            f.write(">chr%d\n%s\n" % (i, decode_sequence(record)))
+
+    probes = list()
+    for _ in range(num_probes):
+        record = records[random_state.randint(num_records)]
+        start  = random_state.randint(record_length - probe_length)
+        probe  = record[start:start + probe_length].copy()
+        mutate = random_state.randint(probe_length, size=random_state.randint(3))
+        probe[mutate] = (probe[mutate] + 1) % 4
+        probes.append(probe)
+
+    start_time = time.time()
+    fasta_to_twobit(fasta_path, fasta_path + ".2bit")
+    twobit_file = TwoBitFile(fasta_path + ".2bit")
+    print "Packed %d bases in %.2fs" % (num_records * record_length, time.time() - start_time)
+
+    for max_mismatches in range(4):
+        k = min(16, probe_length // (max_mismatches + 1))
+        start_time = time.time()
+        index = KmerIndex.from_twobit(twobit_file, k)
+        build_time = time.time() - start_time
+
+        start_time = time.time()
+        hits = find_approximate(index, twobit_file, probes, max_mismatches)
+        print "d=%d k=%d: index %.2fs, search %.2fs, %d hits" % \
+            (max_mismatches, k, build_time, time.time() - start_time, len(hits.probes))
+
+    os.remove(fasta_path)
+    os.remove(fasta_path + ".2bit")
@@ -0,0 +1,48 @@
+'''
+Copyright 2014 Bio-Rad Laboratories, Inc.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+@author: Dan DiCara
+@date:   Jul 11, 2014
+'''
+#===============================================================================
+# Imports
+#===============================================================================
+import numpy as np
+
+from src.utilities.aho_corasick import AhoCorasick
+from src.utilities.bio_utilities import TwoBitFile, reverse_complement_codes
+
+#===============================================================================
+# Utility Methods
+#===============================================================================
+def build_probe_automaton(probes):
+    '''
+    Build an automaton over a set of probes (arrays of base codes) and their
+    reverse complements. Pattern i and i + len(probes) both belong to probe i.
+    '''
+    return AhoCorasick(list(probes) + [reverse_complement_codes(p) for p in probes])
+
+def count_record_hits(automaton, num_probes, twobit_path):
+    '''
+    Stream every record of a 2-bit file through the probe automaton once and
+    return an array holding the number of distinct probes found, on either
+    strand, in each record.
+    '''
+    twobit_file = TwoBitFile(twobit_path)
+    counts      = np.zeros(len(twobit_file), dtype=np.int64)
+    for i in range(len(twobit_file)):
+        (pattern_idxs, _) = automaton.scan(twobit_file.get_codes(i))
+        counts[i] = len(np.unique(pattern_idxs % num_probes))
+    return counts